@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conffig.settings')
+# Under ASGI every request may run in a different thread, so a persistent connection
+# kept by one thread is rarely reused and piles up instead; close them per request.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.stream import with_event_stream  # noqa: E402  (needs the app registry loaded above)
+
+application = with_event_stream(django_application)
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ConnectionMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -87,20 +89,109 @@ WSGI_APPLICATION = 'conffig.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# MySQL when DB_NAME is set (or DB_ENGINE=mysql); otherwise a local SQLite file so the
+# project starts without a database server (DB_ENGINE=sqlite, DB_SQLITE_PATH).
+#
+# Connections are kept open between requests for DB_CONN_MAX_AGE seconds (0 closes
+# them after every request, "none" keeps them forever) and pinged before reuse when
+# DB_CONN_HEALTH_CHECKS is on. Django pools per worker thread this way; the pool size
+# is the server's thread/worker count, so keep it below MySQL's max_connections.
+# conffig/asgi.py defaults DB_CONN_MAX_AGE to 0: async requests do not stay on one
+# thread, so persistent connections would be opened per thread and rarely reused.
+# The core.backends engines are the stock ones plus a timer on connection setup
+# (reported by core.middleware).
+
+DB_ENGINE = os.getenv("DB_ENGINE") or ("mysql" if os.getenv("DB_NAME") else "sqlite")
+DB_CONN_MAX_AGE = os.getenv("DB_CONN_MAX_AGE", "60")
+
+_connection_settings = {
+    "CONN_MAX_AGE": None if DB_CONN_MAX_AGE.lower() == "none" else int(DB_CONN_MAX_AGE),
+    "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+}
 
-DATABASES = {
-    'default': {
-        "ENGINE": "django.db.backends.mysql",
-        "NAME": os.getenv("DB_NAME"),
-        "USER": os.getenv("DB_USER"),
-        "PASSWORD": os.getenv("DB_PASSWORD"),
-        "HOST": os.getenv("DB_HOST"),
-        "PORT": os.getenv("DB_PORT"),
-        "OPTIONS": {"charset": "utf8mb4"},
+if DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "core.backends.sqlite3",
+            "NAME": os.getenv("DB_SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
+            "OPTIONS": {
+                "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+                "transaction_mode": "IMMEDIATE",
+            },
+            **_connection_settings,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            "ENGINE": "core.backends.mysql",
+            "NAME": os.getenv("DB_NAME"),
+            "USER": os.getenv("DB_USER"),
+            "PASSWORD": os.getenv("DB_PASSWORD"),
+            "HOST": os.getenv("DB_HOST"),
+            "PORT": os.getenv("DB_PORT"),
+            "OPTIONS": {
+                "charset": "utf8mb4",
+                "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+            },
+            **_connection_settings,
+        }
+    }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# locmem by default; set CACHE_BACKEND to e.g. django.core.cache.backends.filebased.FileBasedCache
+# (CACHE_LOCATION = a directory) or ...db.DatabaseCache (CACHE_LOCATION = a table, see createcachetable).
+#
+# The dashboard, visibility and class analytics caches are evicted from signal handlers,
+# which only reaches other workers through a shared cache. On locmem they are bypassed
+# (core.shared_cache) unless CACHE_SINGLE_PROCESS says one process serves requests;
+# it defaults to DEBUG, i.e. runserver.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "edu-diary"),
     }
 }
 
+CACHE_SINGLE_PROCESS = os.getenv("CACHE_SINGLE_PROCESS", str(DEBUG)) == "True"
+
+DASHBOARD_CACHE_ALIAS = "default"
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", "60"))  # seconds; upcoming items age out
+
+# Class analytics (core.class_analytics, /api/grades/analytics): cached per subject and
+# evicted on grade writes, so the timeout is only a safety net.
+CLASS_ANALYTICS_CACHE_TIMEOUT = int(os.getenv("CLASS_ANALYTICS_CACHE_TIMEOUT", "3600"))
+CLASS_ANALYTICS_BIN_WIDTH = int(os.getenv("CLASS_ANALYTICS_BIN_WIDTH", "10"))  # histogram bucket width, in grade points
+
+# Request metrics (core.middleware.RequestMetricsMiddleware, /api/_metrics)
+# Requests over either budget are logged on the "core.metrics" logger. The metrics
+# endpoint is open to staff users, or to a scraper sending "Authorization: Bearer
+# <METRICS_TOKEN>" when METRICS_TOKEN is set.
+
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", "50"))
+REQUEST_TIME_BUDGET_MS = int(os.getenv("REQUEST_TIME_BUDGET_MS", "1000"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Server-sent event stream (core.stream, /api/stream/ under ASGI). PUBSUB_BACKEND is
+# in-process by default, so every worker only sees writes made in that worker;
+# run one ASGI worker or plug in a cross-process backend.
+
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "core.pubsub.LocalBroker")
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))        # undelivered events before a slow client is cut off
+STREAM_BACKLOG_LIMIT = int(os.getenv("STREAM_BACKLOG_LIMIT", "100"))  # per kind, replayed on Last-Event-ID resume
+STREAM_TICKET_SECONDS = int(os.getenv("STREAM_TICKET_SECONDS", "30"))  # lifetime of a ?ticket= from POST /api/stream/ticket/
+STREAM_COMMIT_GRACE_SECONDS = float(os.getenv("STREAM_COMMIT_GRACE_SECONDS", "60"))  # longest a transaction may hold an id before committing it
+
+# Background jobs (core.jobs, run by `manage.py run_jobs`)
+
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "120"))  # no heartbeat for this long = worker died; requeue
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "10"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "900"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -127,7 +218,17 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # orjson-backed when orjson is installed, stock DRF JSON otherwise (equivalent JSON; see core.renderers)
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.OptInCursorPagination",  # page numbers unless ?cursor is sent
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -1,5 +1,12 @@
-from django.contrib import admin
-from .models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .freebusy import event_conflicts
+from . import jobs
+from .models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement, Job
+
+MAX_CONFLICT_MESSAGES = 10
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
@@ -26,7 +33,8 @@ class AttendanceAdmin(admin.ModelAdmin):
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ("title", "owner", "subject", "starts_at", "ends_at", "location")
+    list_display = ("title", "owner", "subject", "starts_at", "ends_at", "recurrence", "location")
+    list_select_related = ("owner", "subject")  # the admin's automatic select_related() skips nullable FKs
     list_filter = ("subject", "owner")
     search_fields = ("title", "location")
     date_hierarchy = "starts_at"
@@ -35,6 +43,16 @@ class EventAdmin(admin.ModelAdmin):
         obj.full_clean()
         super().save_model(request, obj, form, change)
 
+        # double bookings are reported, not blocked: the event is already saved
+        conflicts = event_conflicts(obj)
+        names = dict(get_user_model().objects.filter(id__in = [w for k, w, _, _ in conflicts if k == "user"]).values_list("id", "username"))
+        for kind, who, start, end in conflicts[:MAX_CONFLICT_MESSAGES]:
+            label = f"User '{names.get(who, who)}'" if kind == "user" else f"Location '{who}'"
+            start, end = timezone.localtime(start), timezone.localtime(end)
+            self.message_user(request, f"{label} is already booked {start:%Y-%m-%d %H:%M} - {end:%H:%M}.", messages.WARNING)
+        if len(conflicts) > MAX_CONFLICT_MESSAGES:
+            self.message_user(request, f"... and {len(conflicts) - MAX_CONFLICT_MESSAGES} more conflicts.", messages.WARNING)
+
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ("user", "subject", "role", "created_at")
@@ -44,6 +62,7 @@ class EnrollmentAdmin(admin.ModelAdmin):
 @admin.register(Announcement)
 class AnnouncementAdmin(admin.ModelAdmin):
     list_display = ("title", "subject", "created_by", "created_at")
+    list_select_related = ("subject", "created_by")
     list_filter = ("subject", "created_at")
     search_fields = ("title", "body")
     date_hierarchy = "created_at"
@@ -53,4 +72,19 @@ class AnnouncementAdmin(admin.ModelAdmin):
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "attempts", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "kind")
+    list_select_related = ("created_by",)
+    readonly_fields = [f.name for f in Job._meta.fields]
+    actions = ["run_again"]
+
+    def has_add_permission(self, request):
+        return False
 
+    @admin.action(description = "Run selected jobs again")
+    def run_again(self, request, queryset):
+        # a job that is still queued or running is returned by enqueue, not duplicated
+        queued = {jobs.enqueue(j.kind, j.args, user = request.user).pk for j in queryset if j.kind in jobs.REGISTRY}
+        self.message_user(request, f"Queued {len(queued)} job(s).")
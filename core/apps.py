@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import rollups, class_analytics, dashboard_cache, visibility, search, shared_cache, stream  # noqa: F401  (connect signal handlers, register checks)
@@ -0,0 +1,162 @@
+"""
+Async (ASGI) read path for the dashboard and the hot list endpoints.
+
+Served under /api/async/... next to the regular views, which are untouched and stay
+the only path under WSGI. Authentication, permissions, filtering, pagination links
+and rendering reuse the DRF views in a worker thread; the reads themselves go
+through Django's async ORM (acount / aiterator), and the dashboard's independent
+reads are awaited together with asyncio.gather. Responses are the same bytes as
+the sync endpoints.
+
+Django's async ORM still executes each query through sync_to_async, so gathered
+queries overlap with other requests' I/O rather than running in parallel on one
+connection; `manage.py loadtest` measures what that buys on a given deployment.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import dashboard_cache, fast_serializers
+from .conditional import ConditionalListMixin, not_modified, set_validators
+from .views import AssignmentViewSet, GradeViewSet, AttendanceViewSet, AnnouncementViewSet, _dashboard_queries, _dashboard_data
+
+
+class _DashboardView(APIView):
+    permission_classes = [IsAuthenticated]
+
+
+def _start(view, request):
+    """Run DRF's request setup (auth, permissions, throttling, negotiation); a response if it fails."""
+    view.args, view.kwargs = (), {}
+    view.request = view.initialize_request(request)
+    view.headers = view.default_response_headers
+    try:
+        view.initial(view.request)
+    except Exception as exc:
+        return _finish(view, view.handle_exception(exc))
+    return None
+
+
+def _finish(view, response):
+    response = view.finalize_response(view.request, response)
+    if isinstance(response, Response):
+        response.render()
+    return response
+
+
+def _fail(view, exc):
+    return _finish(view, view.handle_exception(exc))
+
+
+async def _rows(queryset):
+    return [row async for row in queryset.aiterator()]
+
+
+@require_safe
+async def dashboard(request):
+    view = _DashboardView()
+    failed = await sync_to_async(_start)(view, request)
+    if failed is not None:
+        return failed
+    user = view.request.user
+
+    async def build():
+        queries = await sync_to_async(_dashboard_queries)(user)
+        branches = queries.pop("announcements")
+        names = list(queries)
+        results = await asyncio.gather(*(_rows(queries[n]) for n in names), *(_rows(b) for b in branches))
+        rows = dict(zip(names, results))
+        rows["announcements"] = results[len(names):]
+        return await sync_to_async(_dashboard_data)(rows)
+
+    entry, hit = await dashboard_cache.aget_or_build(user, build)
+    response = not_modified(view.request, entry["etag"], entry["last_modified"])
+    if response is None:
+        response = set_validators(Response(entry["data"]), entry["etag"], entry["last_modified"])
+    response["X-Dashboard-Cache"] = "hit" if hit else "miss"
+    return await sync_to_async(_finish)(view, response)
+
+
+def _prepare_list(view, request):
+    """
+    Everything before the reads: setup, the conditional-GET check and the lazy
+    .values() queryset. Returns (response, None, None) when the request is already
+    answered (error, 304, or a keyset page, which is left to the sync path).
+    """
+    failed = _start(view, request)
+    if failed is not None:
+        return failed, None, None
+    try:
+        validators = None
+        if isinstance(view, ConditionalListMixin):
+            validators = view.list_validators(view.request)
+            response = not_modified(view.request, *validators)
+            if response is not None:
+                return _finish(view, response), None, None
+        if view.paginator.cursor_query_param in view.request.query_params:
+            return _finish(view, view.list(view.request)), None, None
+        queryset = fast_serializers.to_values(view.filter_queryset(view.get_queryset()), view.fast_columns)
+    except Exception as exc:
+        return _fail(view, exc), None, None
+    return None, queryset, validators
+
+
+def _page(view, count):
+    """The Django page for the requested number; the paginator counts a range, not the table."""
+    paginator = view.paginator
+    django_paginator = paginator.django_paginator_class(range(count), paginator.get_page_size(view.request))
+    number = paginator.get_page_number(view.request, django_paginator)
+    try:
+        page = django_paginator.page(number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(page_number = number, message = str(exc)))
+    paginator.request = view.request
+    paginator.page = page
+    paginator.keyset = None
+    return page
+
+
+def _respond(view, page, rows, validators):
+    try:
+        data = fast_serializers.represent(rows, view.fast_columns)
+        page.object_list = rows
+        response = view.paginator.get_paginated_response(data)
+        if validators is not None:
+            set_validators(response, *validators)
+        return _finish(view, response)
+    except Exception as exc:
+        return _fail(view, exc)
+
+
+def list_view(viewset_class):
+    """An async `list` for a FastListMixin viewset, page-number paginated."""
+
+    @require_safe
+    async def view_func(request):
+        view = viewset_class()
+        view.action_map = {"get": "list"}
+        answered, queryset, validators = await sync_to_async(_prepare_list)(view, request)
+        if answered is not None:
+            return answered
+        try:
+            page = await sync_to_async(_page)(view, await queryset.acount())
+        except NotFound as exc:
+            return await sync_to_async(_fail)(view, exc)
+        bounds = page.object_list
+        rows = await _rows(queryset[bounds.start:bounds.stop])
+        return await sync_to_async(_respond)(view, page, rows, validators)
+
+    view_func.__name__ = f"async_{viewset_class.__name__}_list"
+    return view_func
+
+
+assignments = list_view(AssignmentViewSet)
+grades = list_view(GradeViewSet)
+attendance = list_view(AttendanceViewSet)
+announcements = list_view(AnnouncementViewSet)
@@ -0,0 +1,20 @@
+"""
+Thin wrappers around Django's database backends that time connection setup.
+
+Use "core.backends.sqlite3" or "core.backends.mysql" as the ENGINE. Each new
+connection records how long the driver took to open it in `connect_seconds`, which
+core.middleware reads when the `connection_created` signal fires. Queries and
+everything else are the stock backend's.
+"""
+import time
+
+
+class TimedConnectMixin:
+    connect_seconds = None
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            self.connect_seconds = time.perf_counter() - started
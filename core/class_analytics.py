@@ -0,0 +1,146 @@
+"""
+Class-level grade analytics for one subject.
+
+Each student's standing is their average grade in the subject, read from
+GradeRollup (one row per graded student, kept current by core.rollups), so a
+class of any size is one indexed read however many grades it holds. Students are
+ranked best first; ties share a rank (1, 2, 2, 4), and the percentile is the share
+of the rest of the class with a lower average (0 for the lowest, 100 for the top).
+
+Rank and percentile come from RANK() / PERCENT_RANK() window functions where the
+database supports them, and from the same definitions over the sorted averages
+otherwise. The distribution (histogram, mean, median, p10/p90, population standard
+deviation) is computed from those averages in one pass.
+
+Results are cached per subject in the default cache for
+CLASS_ANALYTICS_CACHE_TIMEOUT seconds and evicted once a transaction that writes
+one of the subject's grades commits; bulk writes that skip signals must call
+`evict_subjects`. Nothing is cached when the cache is not shared between workers
+(see core.shared_cache).
+"""
+import math
+import statistics
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import PercentRank, Rank
+from django.db.models.expressions import Window
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import shared_cache
+from .models import Grade, GradeRollup
+
+
+def _key(subject_id):
+    return f"class-analytics:{subject_id}"
+
+
+def _quantile(ordered, q):
+    """Linear interpolation between closest ranks (numpy's default) over a sorted list."""
+    pos = (len(ordered) - 1) * q
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _standings_window(subject_id):
+    avg = F("value_sum") / F("count")
+    return [
+        (r["user_id"], r["user__username"], r["count"], r["avg"], r["rank"], r["percent_rank"])
+        for r in GradeRollup.objects.filter(subject_id = subject_id, count__gt = 0)
+        .annotate(
+            avg = avg,
+            rank = Window(Rank(), order_by = avg.desc()),
+            percent_rank = Window(PercentRank(), order_by = avg.asc()),
+        )
+        .order_by("rank", "user_id")
+        .values("user_id", "user__username", "count", "avg", "rank", "percent_rank")
+    ]
+
+
+def _standings_sorted(subject_id):
+    rows = [
+        (user_id, username, count, value_sum / count)
+        for user_id, username, count, value_sum in GradeRollup.objects.filter(subject_id = subject_id, count__gt = 0)
+        .values_list("user_id", "user__username", "count", "value_sum")
+    ]
+    averages = sorted(r[3] for r in rows)
+    n = len(averages)
+    standings = [
+        (*r, n - bisect_right(averages, r[3]) + 1, bisect_left(averages, r[3]) / (n - 1) if n > 1 else 0.0)
+        for r in rows
+    ]
+    standings.sort(key = lambda s: (s[4], s[0]))
+    return standings
+
+
+def _histogram(ordered, width):
+    """Counts per [start, end) bucket of `width` points, from the lowest average's bucket to the highest's."""
+    if not ordered:
+        return []
+    first = math.floor(ordered[0] / width) * width
+    bins = math.floor(ordered[-1] / width) * width
+    edges = [first + i * width for i in range(int((bins - first) / width) + 2)]
+    return [
+        {"start": lo, "end": hi, "count": bisect_left(ordered, hi) - bisect_left(ordered, lo)}
+        for lo, hi in zip(edges, edges[1:])
+    ]
+
+
+def compute(subject_id):
+    """The analytics payload for `subject_id` (uncached)."""
+    standings = _standings_window(subject_id) if connection.features.supports_over_clause else _standings_sorted(subject_id)
+    ordered = sorted(s[3] for s in standings)
+    data = {
+        "subject": subject_id,
+        "students": len(ordered),
+        "grades": sum(s[2] for s in standings),
+        "mean": None, "median": None, "p10": None, "p90": None, "stddev": None,
+        "histogram": _histogram(ordered, settings.CLASS_ANALYTICS_BIN_WIDTH),
+        "ranking": [
+            {"user": user_id, "user_name": username, "grades": count, "avg": round(avg, 2), "rank": rank, "percentile": round(percent_rank * 100, 2)}
+            for user_id, username, count, avg, rank, percent_rank in standings
+        ],
+    }
+    if ordered:
+        data.update({
+            "mean": round(statistics.fmean(ordered), 2),
+            "median": round(_quantile(ordered, 0.5), 2),
+            "p10": round(_quantile(ordered, 0.1), 2),
+            "p90": round(_quantile(ordered, 0.9), 2),
+            "stddev": round(statistics.pstdev(ordered), 2),
+        })
+    return data
+
+
+def get(subject_id):
+    """Return (payload, hit) for `subject_id`, computing and caching it on a miss."""
+    cache = shared_cache.get()
+    if cache is None:
+        return compute(subject_id), False
+    key = _key(subject_id)
+    data = cache.get(key)
+    if data is not None:
+        return data, True
+    data = compute(subject_id)
+    cache.set(key, data, settings.CLASS_ANALYTICS_CACHE_TIMEOUT)
+    return data, False
+
+
+def evict_subjects(subject_ids):
+    """Drop the cached analytics of `subject_ids` once the current transaction commits."""
+    cache = shared_cache.get()
+    keys = [_key(s) for s in set(subject_ids)]
+    if keys and cache is not None:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver([post_save, post_delete], sender = Grade)
+def _evict_grade_subject(sender, instance, raw = False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_rollup_previous", None)  # set by core.rollups on updates
+    evict_subjects([instance.subject_id] + ([previous.subject_id] if previous is not None else []))
@@ -0,0 +1,60 @@
+"""
+Conditional GET (ETag / Last-Modified) for polled read endpoints.
+
+The validator for a list is one aggregate over the same filtered queryset the view
+would serialize: row count, sum of ids and the newest change timestamp(s). Together
+with the user and the full request path (filters, page, cursor) that changes whenever
+the visible rows do, so a matching If-None-Match is answered with 304 before the
+page is fetched or serialized.
+
+Lists send no Last-Modified: the newest timestamp does not move when a row is
+deleted (or leaves the filter), so If-Modified-Since would keep answering 304 for
+a list that lost rows. Only the ETag, which also covers count and ids, is reliable.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(":".join(str(p) for p in parts).encode()).hexdigest())
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response when the request's validators still match, otherwise None."""
+    response = get_conditional_response(request, etag = etag, last_modified = last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class ConditionalListMixin:
+    # timestamp lookups whose maximum changes when a listed row (or what it embeds) changes
+    validator_timestamps = ("updated_at",)
+
+    def list_validators(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        agg = queryset.aggregate(
+            n = Count("pk"),
+            ids = Sum("pk"),
+            **{f"ts{i}": Max(f) for i, f in enumerate(self.validator_timestamps)},
+        )
+        stamps = [agg[f"ts{i}"] for i in range(len(self.validator_timestamps))]
+        etag = make_etag(request.user.pk, request.get_full_path(), agg["n"], agg["ids"], *stamps)
+        return etag, None
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.list_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
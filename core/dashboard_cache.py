@@ -0,0 +1,186 @@
+"""
+Per-user cache for the dashboard snapshot.
+
+Entries live in the cache alias named by settings.DASHBOARD_CACHE_ALIAS and are
+keyed by user id plus a global generation number. The alias must be shared by all
+workers (see core.shared_cache); on a process-local one every request builds its
+snapshot. Writes evict only the users they affect, once their transaction commits
+(an earlier eviction lets a concurrent request re-cache the pre-commit rows):
+
+- Enrollment / Grade       -> that user
+- Assignment / Subject     -> users enrolled in the subject (both subjects when
+                              an assignment moves)
+- Announcement             -> users enrolled in its subject (likewise); a general
+                              (subject-less) announcement bumps the generation
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import shared_cache
+from .conditional import make_etag
+from .models import Subject, Assignment, Grade, Enrollment, Announcement
+
+GENERATION_KEY = "dashboard:generation"
+
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return shared_cache.get(getattr(settings, "DASHBOARD_CACHE_ALIAS", "default"))
+
+
+def _timeout():
+    return getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60)
+
+
+def _count(name, n = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def stats():
+    """Hit/miss/eviction counters for this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _key(user_id, generation):
+    return f"dashboard:{generation}:{user_id}"
+
+
+def _new_generation():
+    # time-based so a culled generation key never revives older entries
+    return time.time_ns()
+
+
+def _generation(cache):
+    return cache.get_or_set(GENERATION_KEY, _new_generation, timeout = None)
+
+
+def get_or_build(user, build):
+    """
+    Return (entry, hit) for `user`, calling `build()` on a miss. The entry holds the
+    snapshot plus its validators: {"data", "etag", "last_modified"}.
+    """
+    cache = _cache()
+    if cache is None:
+        _count("misses")
+        return _entry(user, build()), False
+    key = _key(user.pk, _generation(cache))
+    entry = cache.get(key)
+    if entry is not None:
+        _count("hits")
+        return entry, True
+    _count("misses")
+    entry = _entry(user, build())
+    cache.set(key, entry, _timeout())
+    return entry, False
+
+
+async def aget_or_build(user, build):
+    """`get_or_build` for async views; `build` is a coroutine function."""
+    cache = _cache()
+    if cache is None:
+        _count("misses")
+        return _entry(user, await build()), False
+    generation = await cache.aget_or_set(GENERATION_KEY, _new_generation, timeout = None)
+    key = _key(user.pk, generation)
+    entry = await cache.aget(key)
+    if entry is not None:
+        _count("hits")
+        return entry, True
+    _count("misses")
+    entry = _entry(user, await build())
+    await cache.aset(key, entry, _timeout())
+    return entry, False
+
+
+def _entry(user, data):
+    return {
+        "data": data,
+        "etag": make_etag(user.pk, json.dumps(data, cls = DjangoJSONEncoder, sort_keys = True)),
+        "last_modified": int(time.time()),
+    }
+
+
+def evict_users(user_ids):
+    """Drop the snapshots of `user_ids` once the current transaction commits."""
+    user_ids = set(user_ids)
+    cache = _cache()
+    if not user_ids or cache is None:
+        return
+
+    def evict():
+        generation = _generation(cache)
+        cache.delete_many([_key(uid, generation) for uid in user_ids])
+        _count("evictions", len(user_ids))
+
+    transaction.on_commit(evict)
+
+
+def evict_all():
+    """Drop every snapshot once the current transaction commits."""
+    cache = _cache()
+    if cache is None:
+        return
+
+    def evict():
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, _new_generation(), timeout = None)
+        _count("evictions")
+
+    transaction.on_commit(evict)
+
+
+def _subject_members(subject_id):
+    if subject_id is None:
+        return []
+    return Enrollment.objects.filter(subject_id = subject_id).values_list("user_id", flat = True)
+
+
+@receiver([post_save, post_delete], sender = Enrollment)
+@receiver([post_save, post_delete], sender = Grade)
+def _evict_owner(sender, instance, **kwargs):
+    evict_users([instance.user_id])
+
+
+@receiver(pre_save, sender = Assignment)
+@receiver(pre_save, sender = Announcement)
+def _remember_subject(sender, instance, raw = False, **kwargs):
+    # a row moved to another subject must also leave the old subject's dashboards
+    instance._dashboard_previous_subject = instance.subject_id
+    if not raw and instance.pk is not None:
+        previous = sender.objects.filter(pk = instance.pk).values_list("subject_id", flat = True)
+        instance._dashboard_previous_subject = next(iter(previous), instance.subject_id)
+
+
+def _subjects(instance):
+    return {instance.subject_id, getattr(instance, "_dashboard_previous_subject", instance.subject_id)}
+
+
+@receiver([post_save, post_delete], sender = Assignment)
+def _evict_assignment_subject(sender, instance, **kwargs):
+    evict_users(user_id for s in _subjects(instance) for user_id in _subject_members(s))
+
+
+@receiver([post_save, post_delete], sender = Subject)
+def _evict_subject(sender, instance, **kwargs):
+    evict_users(_subject_members(instance.pk))
+
+
+@receiver([post_save, post_delete], sender = Announcement)
+def _evict_announcement(sender, instance, **kwargs):
+    subjects = _subjects(instance)
+    if None in subjects:
+        evict_all()
+    evict_users(user_id for s in subjects for user_id in _subject_members(s))
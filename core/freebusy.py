@@ -0,0 +1,136 @@
+"""
+Free/busy lookups and double-booking detection for events.
+
+A user is busy during the events they own and during every event of a subject they
+are enrolled in; a location is busy during every event held there. BusyIndex loads
+the events overlapping a window with two index range scans (see `overlapping`), expands recurring series only
+inside that window, and keeps a sorted, merged interval list per owner, subject and
+location. A user's list is the merge of their own and their subjects' lists, so the
+work is proportional to the events in the window rather than to users x events, and
+"is X busy in [a, b)" is a binary search.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from itertools import chain
+
+from django.db.models import Q
+from django.db.models.functions import Lower, Trim
+
+from . import recurrence
+from .models import Enrollment, Event
+
+# events shorter than this (nearly all of them) are found by their start time alone
+SHORT_EVENT = timedelta(days = 1)
+
+
+def location_key(name):
+    return (name or "").strip().lower()
+
+
+def _merge(intervals):
+    """Sorted, non-overlapping (start, end) list covering `intervals` (which must be sorted)."""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def first_overlap(intervals, start, end):
+    """The first merged interval overlapping [start, end), or None."""
+    i = bisect_right(intervals, (start,))
+    if i and intervals[i - 1][1] > start:
+        return intervals[i - 1]
+    if i < len(intervals) and intervals[i][0] < end:
+        return intervals[i]
+    return None
+
+
+def overlapping(queryset, start, end):
+    """
+    The rows of `queryset` (events, possibly values()) that can have an occurrence
+    overlapping [start, end). `series_ends_at > start` alone bounds nothing for an
+    index on starts_at, so the search is split in two bounded ranges: rows starting
+    within SHORT_EVENT before the window (the starts_at index), and the few older rows
+    still running at its start, i.e. series and long one-offs (the series_ends_at
+    index). A one-off row starting before that has ended by `start`.
+    """
+    earlier = start - SHORT_EVENT
+    queryset = queryset.order_by()
+    recent = queryset.filter(starts_at__gte = earlier, starts_at__lt = end, series_ends_at__gt = start)
+    running = queryset.filter(starts_at__lt = earlier, series_ends_at__gt = start)
+    return recent.union(running, all = True)
+
+
+class BusyIndex:
+    def __init__(self, start, end, users = (), locations = (), exclude = None):
+        self.start, self.end = start, end
+        self.subjects = defaultdict(set)
+        for user_id, subject_id in Enrollment.objects.filter(user_id__in = users).values_list("user_id", "subject_id"):
+            self.subjects[user_id].add(subject_id)
+        subject_ids = set().union(*self.subjects.values())
+        location_keys = {location_key(l) for l in locations} - {""}
+
+        match = Q(owner_id__in = users) | Q(subject_id__in = subject_ids)
+        if location_keys:
+            match |= Q(location_key__in = location_keys)
+        events = Event.objects.annotate(location_key = Lower(Trim("location"))).filter(match)
+        if exclude is not None:
+            events = events.exclude(pk = exclude)
+        events = overlapping(
+            events.values_list("owner_id", "subject_id", "location_key", "starts_at", "ends_at", "recurrence", "exdates"),
+            start, end,
+        )
+
+        by_owner, by_subject, by_location = defaultdict(list), defaultdict(list), defaultdict(list)
+        for owner_id, subject_id, loc, starts_at, ends_at, rule, exdates in events:
+            for occ in recurrence.occurrences(starts_at, ends_at, rule, exdates, start, end):
+                by_owner[owner_id].append(occ)
+                if subject_id is not None:
+                    by_subject[subject_id].append(occ)
+                if loc in location_keys:
+                    by_location[loc].append(occ)
+
+        self._owner = {k: _merge(sorted(v)) for k, v in by_owner.items()}
+        self._subject = {k: _merge(sorted(v)) for k, v in by_subject.items()}
+        self._location = {k: _merge(sorted(v)) for k, v in by_location.items()}
+        self._users = {}
+
+    def user(self, user_id):
+        if user_id not in self._users:
+            parts = [self._owner.get(user_id, [])] + [self._subject.get(s, []) for s in self.subjects[user_id]]
+            # timsort merges the already-sorted runs in linear time
+            self._users[user_id] = _merge(sorted(chain.from_iterable(parts)))
+        return self._users[user_id]
+
+    def location(self, name):
+        return self._location.get(location_key(name), [])
+
+
+def event_conflicts(event):
+    """
+    (kind, who, start, end) for every attendee or the location of `event` that is
+    already busy during one of its occurrences. Attendees are the owner and the
+    users enrolled in its subject; the event itself is ignored when it exists.
+    """
+    occurrences = list(event.occurrences())
+    if not occurrences:
+        return []
+    users = {event.owner_id}
+    if event.subject_id is not None:
+        users |= set(Enrollment.objects.filter(subject_id = event.subject_id).values_list("user_id", flat = True))
+    locations = [event.location] if location_key(event.location) else []
+    index = BusyIndex(occurrences[0][0], occurrences[-1][1], users, locations, exclude = event.pk)
+
+    found = []
+    for kind, who, busy in [("user", u, index.user(u)) for u in sorted(users)] + [("location", l, index.location(l)) for l in locations]:
+        for start, end in occurrences:
+            hit = first_overlap(busy, start, end)
+            if hit is not None:
+                found.append((kind, who, max(start, hit[0]), min(end, hit[1])))
+                break
+    return found
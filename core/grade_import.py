@@ -0,0 +1,169 @@
+"""
+Bulk grade import from CSV or XLSX.
+
+Rows (username, subject code, value, credits) are streamed from the file and handled
+in chunks: usernames and subject codes are resolved with one query per chunk into
+in-memory maps, each row is validated, and the valid rows of a chunk are written with
+bulk_create inside that chunk's transaction. Errors are reported with their line
+numbers and do not stop the rest of the file. A file that cannot be read (wrong
+encoding, malformed CSV, corrupt XLSX) raises ImportFileError, also when that is
+only found partway through; chunks before that point have been written.
+"""
+import codecs
+import csv
+import math
+import os
+import zipfile
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import class_analytics, dashboard_cache, stream
+from .models import Subject, Grade
+from .rollups import apply_grade_inserts
+
+User = get_user_model()
+
+CHUNK_SIZE = 5000
+COLUMNS = {
+    "username": "username",
+    "user": "username",
+    "subject": "subject",
+    "subject_code": "subject",
+    "code": "subject",
+    "value": "value",
+    "grade": "value",
+    "credits": "credits",
+}
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be read (unknown type, missing columns, ...)."""
+
+
+def _csv_rows(fileobj):
+    # decoding is lazy, so encoding errors surface while iterating, not up front
+    reader = csv.reader(codecs.iterdecode(fileobj, "utf-8-sig"))
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except UnicodeDecodeError:
+        raise ImportFileError(f"Line {reader.line_num + 1}: the file is not UTF-8 encoded text.")
+    except csv.Error as e:
+        raise ImportFileError(f"Line {reader.line_num}: malformed CSV ({e}).")
+
+
+def _xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ImportFileError("XLSX import requires openpyxl (pip install openpyxl).")
+    line = 0
+    try:
+        sheet = load_workbook(fileobj, read_only = True, data_only = True).active
+        for line, row in enumerate(sheet.iter_rows(values_only = True), start = 1):
+            yield line, ["" if v is None else str(v) for v in row]
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, ValueError, EOFError) as e:
+        where = f"Row {line + 1}: " if line else ""
+        raise ImportFileError(f"{where}not a readable XLSX workbook ({e}).")
+
+
+def read_rows(fileobj, filename):
+    """Yield (line number, {username, subject, value, credits}) from a binary CSV or XLSX file object."""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".xlsx":
+        rows = _xlsx_rows(fileobj)
+    elif ext in (".csv", ".txt"):
+        rows = _csv_rows(fileobj)
+    else:
+        raise ImportFileError(f"Unsupported file type '{ext}'; use .csv or .xlsx.")
+
+    _, header = next(rows, (None, None))
+    if header is None:
+        return
+    keys = [COLUMNS.get(h.strip().lower()) for h in header]
+    missing = {"username", "subject", "value"} - set(keys)
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(sorted(missing))}.")
+
+    for line, row in rows:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield line, {k: cell.strip() for k, cell in zip(keys, row) if k}
+
+
+def _number(raw, name, required):
+    if raw in (None, ""):
+        if required:
+            raise ValueError(f"{name} is required")
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"{name} '{raw}' is not a number")
+    if not math.isfinite(value):
+        raise ValueError(f"{name} '{raw}' is not a finite number")
+    return value
+
+
+def import_grades(rows, chunk_size = CHUNK_SIZE, dry_run = False):
+    """
+    Import (line, row) pairs from read_rows(). Returns {"created": n, "errors": [{line, error}]}.
+    With dry_run nothing is written, but every row is still resolved and validated.
+    """
+    users, subjects = {}, {}
+    created, errors = 0, []
+    rows = iter(rows)
+
+    while True:
+        try:
+            chunk = list(islice(rows, chunk_size))
+        except ImportFileError as e:
+            if created and not dry_run:
+                raise ImportFileError(f"{e} The {created} grades before it were imported.")
+            raise
+        if not chunk:
+            break
+
+        # resolve every new username / subject code of the chunk in one query each
+        new_users = {r.get("username") for _, r in chunk} - users.keys() - {None, ""}
+        new_codes = {r.get("subject") for _, r in chunk} - subjects.keys() - {None, ""}
+        if new_users:
+            found = dict(User.objects.filter(username__in = new_users).values_list("username", "id"))
+            users.update({u: found.get(u) for u in new_users})
+        if new_codes:
+            found = dict(Subject.objects.filter(code__in = new_codes).values_list("code", "id"))
+            subjects.update({c: found.get(c) for c in new_codes})
+
+        grades = []
+        for line, r in chunk:
+            try:
+                user_id = users.get(r.get("username"))
+                if user_id is None:
+                    raise ValueError(f"unknown username '{r.get('username', '')}'")
+                subject_id = subjects.get(r.get("subject"))
+                if subject_id is None:
+                    raise ValueError(f"unknown subject code '{r.get('subject', '')}'")
+                value = _number(r.get("value"), "value", required = True)
+                credits = _number(r.get("credits"), "credits", required = False)
+            except ValueError as e:
+                errors.append({"line": line, "error": str(e)})
+                continue
+            grades.append(Grade(user_id = user_id, subject_id = subject_id, value = value, credits = credits))
+
+        if dry_run or not grades:
+            created += len(grades)
+            continue
+
+        # bulk_create skips the signal handlers, so refresh rollups, notify streams and evict caches here
+        with transaction.atomic():
+            Grade.objects.bulk_create(grades)
+            apply_grade_inserts(grades)
+            stream.publish_grades(grades)
+            class_analytics.evict_subjects({g.subject_id for g in grades})
+        dashboard_cache.evict_users({g.user_id for g in grades})
+        created += len(grades)
+
+    return {"created": created, "errors": errors}
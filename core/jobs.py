@@ -0,0 +1,237 @@
+"""
+Database-backed background jobs.
+
+Work that is too heavy for a request (full rollup rebuilds, term reports) is queued
+as a Job row and run by `manage.py run_jobs`, which needs nothing beyond the
+database, so it works against SQLite locally as well as MySQL.
+
+- `@register("kind", concurrency = 2, max_attempts = 3)` declares a handler. A
+  handler takes the job's JSON args as keyword arguments and returns a JSON-able
+  result. It must be idempotent: a job whose worker died is run again.
+- `enqueue(kind, args)` returns the queued or running job with the same kind and
+  key (by default a hash of the args) if there is one, so repeated clicks share one job.
+  Unfinished jobs also carry the key in `active_key`, which is unique per kind, so
+  two concurrent enqueues cannot both insert; the loser returns the winner's job.
+- Workers claim a job with a conditional UPDATE (status QUEUED -> RUNNING), which
+  only one of several workers can win without row locks or SKIP LOCKED, and run it
+  on a thread or process pool. Per-kind `concurrency` is enforced per worker.
+- A failed attempt is retried after an exponential, jittered backoff until
+  max_attempts.
+- A worker refreshes the lock (locked_at) of the jobs it runs every quarter of
+  JOB_LOCK_TIMEOUT_SECONDS, however long they take; RUNNING jobs whose lock is
+  older than that (a worker that died) are put back in the queue.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import report_cards
+from .models import Job
+
+User = get_user_model()
+
+logger = logging.getLogger("core.jobs")
+
+
+@dataclass(frozen = True)
+class JobType:
+    func: object
+    concurrency: int = None   # per worker; None = up to the pool size
+    max_attempts: int = 3
+    staff_only: bool = True
+
+
+REGISTRY = {}
+
+
+def register(kind, **options):
+    def decorator(func):
+        REGISTRY[kind] = JobType(func, **options)
+        return func
+    return decorator
+
+
+def default_key(args):
+    return hashlib.sha256(json.dumps(args, sort_keys = True, default = str).encode()).hexdigest()
+
+
+def enqueue(kind, args = None, user = None, key = None, delay = 0):
+    """Queue `kind` (or return the queued / running job with the same key)."""
+    if kind not in REGISTRY:
+        raise LookupError(f"Unknown job kind '{kind}'.")
+    args = args or {}
+    key = default_key(args) if key is None else key
+    existing = Job.objects.filter(kind = kind, active_key = key).first()
+    if existing is not None:
+        return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                kind = kind, args = args, key = key, active_key = key, created_by = user,
+                max_attempts = REGISTRY[kind].max_attempts, run_after = timezone.now() + timedelta(seconds = delay),
+            )
+    except IntegrityError:
+        # a concurrent enqueue inserted it first (that job may even have finished since)
+        return Job.objects.filter(kind = kind, key = key).order_by("-id").first()
+
+
+def backoff(attempts):
+    """Seconds to wait before attempt `attempts + 1`: exponential, capped, with jitter."""
+    delay = min(settings.JOB_BACKOFF_MAX_SECONDS, settings.JOB_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1)
+
+
+def perform(kind, args):
+    """Run one handler; the pool calls this in a worker thread or process."""
+    close_old_connections()
+    try:
+        return REGISTRY[kind].func(**args)
+    finally:
+        close_old_connections()
+
+
+# --- the worker ---------------------------------------------------------------
+
+def heartbeat(worker_id, running_jobs):
+    """Refresh the locks `worker_id` still holds on `running_jobs`, so requeue_stale leaves them be."""
+    return Job.objects.filter(pk__in = [job.pk for job in running_jobs], status = Job.RUNNING, locked_by = worker_id).update(locked_at = timezone.now())
+
+
+def requeue_stale():
+    cutoff = timezone.now() - timedelta(seconds = settings.JOB_LOCK_TIMEOUT_SECONDS)
+    return Job.objects.filter(status = Job.RUNNING, locked_at__lt = cutoff).update(status = Job.QUEUED, locked_by = "", locked_at = None)
+
+
+def claim(worker_id, running, kinds = None, batch = 20):
+    """Claim the next due job this worker may run, given its Counter of running kinds."""
+    now = timezone.now()
+    due = Job.objects.filter(status = Job.QUEUED, run_after__lte = now)
+    if kinds:
+        due = due.filter(kind__in = kinds)
+    full = [k for k, t in REGISTRY.items() if t.concurrency is not None and running[k] >= t.concurrency]
+    if full:
+        due = due.exclude(kind__in = full)
+    for pk in due.order_by("run_after", "id").values_list("pk", flat = True)[:batch]:
+        won = Job.objects.filter(pk = pk, status = Job.QUEUED).update(
+            status = Job.RUNNING, locked_by = worker_id, locked_at = now, attempts = F("attempts") + 1,
+        )
+        if won:
+            return Job.objects.get(pk = pk)
+    return None
+
+
+def finish(job, result = None, error = None):
+    now = timezone.now()
+    if error is None:
+        updates = {"status": Job.SUCCEEDED, "result": result, "error": "", "finished_at": now, "active_key": None}
+    elif job.attempts < job.max_attempts:
+        updates = {"status": Job.QUEUED, "error": error, "run_after": now + timedelta(seconds = backoff(job.attempts))}
+    else:
+        updates = {"status": Job.FAILED, "error": error, "finished_at": now, "active_key": None}
+    # only the worker holding the lock may finish the job
+    Job.objects.filter(pk = job.pk, status = Job.RUNNING, locked_by = job.locked_by).update(locked_by = "", locked_at = None, **updates)
+    return updates["status"]
+
+
+class Worker:
+    def __init__(self, concurrency = 4, pool = "thread", kinds = None, poll = None):
+        self.concurrency = concurrency
+        self.pool = pool
+        self.kinds = kinds
+        self.poll = settings.JOB_POLL_SECONDS if poll is None else poll
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.stopping = threading.Event()
+
+    def _executor(self):
+        if self.pool == "process":
+            import multiprocessing
+            import django
+            # spawn, not fork: children must not share the parent's DB connections
+            return ProcessPoolExecutor(self.concurrency, mp_context = multiprocessing.get_context("spawn"), initializer = django.setup)
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix = "job")
+
+    def run(self, once = False):
+        """Run jobs until stop() (or, with once, until nothing is due); returns a Counter of outcomes."""
+        outcomes = Counter()
+        futures = {}
+        running = Counter()
+        next_sweep = next_beat = 0
+        with self._executor() as executor:
+            while True:
+                if time.monotonic() >= next_sweep:
+                    if requeue_stale():
+                        logger.warning("Requeued jobs whose worker stopped responding.")
+                    next_sweep = time.monotonic() + settings.JOB_LOCK_TIMEOUT_SECONDS / 2
+                if time.monotonic() >= next_beat:
+                    if futures and heartbeat(self.id, futures.values()) < len(futures):
+                        logger.warning("Lost the lock of a running job; it was requeued and may run twice.")
+                    next_beat = time.monotonic() + settings.JOB_LOCK_TIMEOUT_SECONDS / 4
+
+                while not self.stopping.is_set() and len(futures) < self.concurrency:
+                    job = claim(self.id, running, self.kinds)
+                    if job is None:
+                        break
+                    running[job.kind] += 1
+                    futures[executor.submit(perform, job.kind, job.args)] = job
+
+                if not futures:
+                    if once or self.stopping.is_set():
+                        break
+                    self.stopping.wait(self.poll)
+                    continue
+
+                timeout = max(0, min(self.poll, next_beat - time.monotonic()))
+                done, _ = wait(futures, timeout = timeout, return_when = FIRST_COMPLETED)
+                for future in done:
+                    job = futures.pop(future)
+                    running[job.kind] -= 1
+                    try:
+                        outcome = finish(job, result = future.result())
+                    except Exception:
+                        outcome = finish(job, error = traceback.format_exc(limit = 20))
+                        logger.warning("Job %s (%s) attempt %d failed.", job.pk, job.kind, job.attempts)
+                    outcomes[outcome] += 1
+        close_old_connections()
+        return outcomes
+
+    def stop(self):
+        self.stopping.set()
+
+
+# --- jobs ---------------------------------------------------------------------
+
+@register("rebuild_rollups", concurrency = 1)
+def rebuild_rollups():
+    from .rollups import compute_attendance_rollups, compute_grade_rollups, replace_rollups
+
+    grades, attendance = compute_grade_rollups(), compute_attendance_rollups()
+    replace_rollups(grades, attendance)
+    return {"grade_rollups": len(grades), "attendance_rollups": len(attendance)}
+
+
+@register("term_report", concurrency = 2, staff_only = False)
+def term_report(user, start, end):
+    """One student's report card (see core.report_cards) over [start, end]."""
+    start, end = parse_date(start), parse_date(end)
+    cards = report_cards.compute(start, end, users = [user])
+    if cards:
+        return cards[0]
+    username = User.objects.filter(pk = user).values_list("username", flat = True).first() or ""
+    return report_cards.empty_card(user, username, start, end)
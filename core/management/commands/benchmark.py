@@ -0,0 +1,261 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import fast_serializers, report_cards, rollups, search
+from core.models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement
+from core.renderers import FastJSONRenderer
+from core.serializers import GradeSerializer, RollCallSerializer
+
+User = get_user_model()
+
+CASES = {}
+PER_STUDENT_SAMPLE = 500
+
+
+def case(name):
+    def decorator(func):
+        CASES[name] = func
+        return func
+    return decorator
+
+
+def _timed(func, repeat, before = None):
+    """(p50 ms, p99 ms, queries of the last call) over `repeat` calls; `before` runs untimed."""
+    samples = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        queries = [0]   # counted by a wrapper: CaptureQueriesContext miscounts past the 9000-entry query log
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))], queries[0]
+
+
+def _user(name):
+    return User.objects.create_user(f"bench-{name}-{timezone.now():%Y%m%d%H%M%S%f}", password = None)
+
+
+def _seed_student(user, rows):
+    now = timezone.now()
+    for i in range(rows):
+        subject = Subject.objects.create(code = f"bn-{user.pk}-{i}", name = f"Benchmark {i}")
+        Enrollment.objects.create(user = user, subject = subject)
+        Assignment.objects.create(subject = subject, title = f"Assignment {i}", due_at = now + timedelta(days = i % 30 + 1))
+        Announcement.objects.create(subject = subject, title = f"Announcement {i}", body = "-")
+        Grade.objects.create(user = user, subject = subject, value = 50 + i % 50, credits = 1 + i % 3)
+        Attendance.objects.create(user = user, subject = subject, date = date.today() - timedelta(days = i), status = Attendance.PRESENT)
+        Event.objects.create(owner = user, subject = subject, title = f"Event {i}", starts_at = now + timedelta(hours = i), ends_at = now + timedelta(hours = i + 1))
+
+
+@case("dashboard")
+def dashboard(rows, repeat):
+    """GET /api/dashboard/ rebuilt on every request (cold) and served from the snapshot cache (warm)."""
+    user = _user("dashboard")
+    _seed_student(user, rows)
+    api = APIClient()
+    api.force_authenticate(user)
+
+    def get():
+        assert api.get(reverse("dashboard")).status_code == 200
+
+    # one process, so the process-local default cache is as good as a shared one here
+    with override_settings(CACHE_SINGLE_PROCESS = True):
+        # evictions wait for a commit that never comes in here; drop the snapshots directly
+        cold = _timed(get, repeat, before = lambda: caches[settings.DASHBOARD_CACHE_ALIAS].clear())
+        get()
+        warm = _timed(get, repeat)
+    return [("cold", *cold), ("warm", *warm)]
+
+
+@case("renderer")
+def renderer(rows, repeat):
+    """The grade list payload (`rows` * 10 grades) rendered by DRF's JSONRenderer and by FastJSONRenderer."""
+    user = _user("renderer")
+    subject = Subject.objects.create(code = f"bn-{user.pk}", name = "Benchmark")
+    Grade.objects.bulk_create(Grade(user = user, subject = subject, value = 50 + i % 50 + 0.25, credits = 1 + i % 3) for i in range(rows * 10))
+    columns = fast_serializers.GRADE
+    data = fast_serializers.represent(fast_serializers.to_values(Grade.objects.filter(user = user), columns), columns)
+    return [
+        (name, *_timed(lambda: renderer_class().render(data), repeat))
+        for name, renderer_class in (("JSONRenderer", JSONRenderer), ("FastJSONRenderer", FastJSONRenderer))
+    ]
+
+
+@case("grade_summary")
+def grade_summary(rows, repeat):
+    """
+    GET /api/grades/summary/ for one student with `rows` * 50, * 500 and * 5000 grades
+    over 10 subjects: from the rollups, and from the raw rows (?min=0 needs them).
+    """
+    user = _user("summary")
+    subjects = [Subject.objects.create(code = f"bn-{user.pk}-sum-{i}", name = f"Benchmark {i}") for i in range(10)]
+    api = APIClient()
+    api.force_authenticate(user)
+    url = reverse("grade-summary")
+    results, seeded = [], 0
+    for size in (rows * 50, rows * 500, rows * 5000):
+        while seeded < size:
+            batch = min(size - seeded, 10000)
+            grades = [Grade(user = user, subject = subjects[(seeded + i) % 10], value = 50 + i % 50, credits = (1 + i % 3) if i % 4 else None) for i in range(batch)]
+            Grade.objects.bulk_create(grades, batch_size = 1000)
+            rollups.apply_grade_inserts(grades)
+            seeded += batch
+        for variant, params in (("rollups", {}), ("raw rows", {"min": "0"})):
+            def get():
+                assert api.get(url, params).status_code == 200
+
+            results.append((f"{variant} {size:,}", *_timed(get, repeat)))
+    return results
+
+
+@case("fast_lists")
+def fast_lists(rows, repeat):
+    """A grade list page of 20, 200 and 2000 rows built by GradeSerializer and by the .values() fast path."""
+    user = _user("fast-lists")
+    subject = Subject.objects.create(code = f"bn-{user.pk}-fast", name = "Benchmark")
+    Grade.objects.bulk_create(Grade(user = user, subject = subject, value = 50 + i % 50, credits = 1 + i % 3) for i in range(2000))
+    queryset = Grade.objects.filter(user = user).select_related("user", "subject").order_by("-graded_at", "id")
+    columns = fast_serializers.GRADE
+    results = []
+    for size in (20, 200, 2000):
+        results.append((f"ModelSerializer {size}", *_timed(lambda: GradeSerializer(queryset[:size], many = True).data, repeat)))
+        results.append((f"values {size}", *_timed(lambda: fast_serializers.represent(fast_serializers.to_values(queryset, columns)[:size], columns), repeat)))
+    return results
+
+
+@case("report_cards")
+def report_cards_case(rows, repeat):
+    """
+    Term report cards for `rows` * 50 students (10k by default) in 10 subjects, with a
+    grade and an attendance mark per subject: one batch, and one student at a time for
+    the first PER_STUDENT_SAMPLE of them (the rest would take minutes per call).
+    """
+    subjects = [Subject.objects.create(code = f"bn-rc-{timezone.now():%H%M%S%f}-{i}", name = f"Benchmark {i}") for i in range(10)]
+    users = User.objects.bulk_create(User(username = f"bench-rc-{timezone.now():%Y%m%d%H%M%S%f}-{i}") for i in range(rows * 50))
+    ids = [u.pk for u in User.objects.filter(username__in = [u.username for u in users]).order_by("pk")]
+    today = date.today()
+    Enrollment.objects.bulk_create((Enrollment(user_id = u, subject = s) for u in ids for s in subjects), batch_size = 10000)
+    Grade.objects.bulk_create(
+        (Grade(user_id = u, subject = s, value = 50 + (u + i) % 50, credits = 1 + i % 3) for u in ids for i, s in enumerate(subjects)), batch_size = 10000,
+    )
+    Attendance.objects.bulk_create(
+        (Attendance(user_id = u, subject = s, date = today - timedelta(days = i), status = Attendance.PRESENT) for u in ids for i, s in enumerate(subjects)), batch_size = 10000,
+    )
+    start = today - timedelta(days = 30)
+    sample = ids[:PER_STUDENT_SAMPLE]
+    return [
+        (f"batched {len(ids)}", *_timed(lambda: report_cards.compute(start, today, users = ids), repeat)),
+        (f"per student {len(sample)}", *_timed(lambda: [report_cards.compute(start, today, users = [u]) for u in sample], repeat)),
+    ]
+
+
+@case("roll_call")
+def roll_call(rows, repeat):
+    """POST /api/attendance/roll-call/ for a class of `rows` * 10 students (at most RollCallSerializer.MAX_RECORDS); variants show rows/s at p50."""
+    size = min(rows * 10, RollCallSerializer.MAX_RECORDS)
+    staff = _user("roll-call")
+    staff.is_staff = True
+    staff.save()
+    subject = Subject.objects.create(code = f"bn-{staff.pk}-roll", name = "Benchmark")
+    users = User.objects.bulk_create(User(username = f"bench-roll-{staff.pk}-{i}") for i in range(size))
+    ids = list(User.objects.filter(username__in = [u.username for u in users]).values_list("pk", flat = True))
+    Enrollment.objects.bulk_create(Enrollment(user_id = u, subject = subject, role = Enrollment.STUDENT) for u in ids)
+    api = APIClient()
+    api.force_authenticate(staff)
+    calls = [0]
+    statuses = (Attendance.PRESENT, Attendance.ABSENT, Attendance.LATE)
+
+    def post(day):
+        calls[0] += 1
+        records = [{"user": u, "status": statuses[(u + calls[0]) % len(statuses)]} for u in ids]
+        response = api.post(reverse("attendance-roll-call"), {"subject": subject.pk, "date": day.isoformat(), "records": records}, format = "json")
+        assert response.status_code == 200, response.content
+
+    # a fresh month per call: every student gets a new attendance row and a new rollup row
+    new_month = _timed(lambda: post(date(2001 + calls[0] // 12, calls[0] % 12 + 1, 1)), repeat)
+    # the same day again with every status moved on: updates of existing rows only
+    post(date(2000, 1, 1))
+    changed = _timed(lambda: post(date(2000, 1, 1)), repeat)
+    return [(f"{name} {size / p50 * 1000:,.0f}/s", p50, p99, queries) for name, (p50, p99, queries) in (("new month", new_month), ("status change", changed))]
+
+
+@case("search")
+def search_announcements(rows, repeat):
+    """
+    GET /api/announcements/?search= as the matching corpus grows from `rows` * 10 to
+    `rows` * 1000 announcements; 3 of them are visible to the student.
+    """
+    student, staff = _user("search"), _user("search-staff")
+    staff.is_staff = True
+    staff.save()
+    mine = Subject.objects.create(code = f"bn-{student.pk}-mine", name = "Chemistry")
+    other = Subject.objects.create(code = f"bn-{student.pk}-other", name = "History")
+    Enrollment.objects.create(user = student, subject = mine)
+    clients = []
+    for variant, user in (("student", student), ("staff", staff)):
+        api = APIClient()
+        api.force_authenticate(user)
+        clients.append((variant, api))
+
+    results, seeded = [], 0
+    for size in (rows * 10, rows * 100, rows * 1000):
+        while seeded < size:
+            batch = min(size - seeded, 10000)
+            docs = Announcement.objects.bulk_create(
+                Announcement(subject = mine if seeded + i < 3 else other, title = f"Quiz {seeded + i}", body = "bring notes for the quiz")
+                for i in range(batch)
+            )
+            search.index_documents(Announcement.objects.filter(pk__in = [d.pk for d in docs]).select_related("subject"))
+            seeded += batch
+        for variant, api in clients:
+            def get():
+                assert api.get(reverse("announcement-list"), {"search": "quiz notes"}).status_code == 200
+
+            with override_settings(CACHE_SINGLE_PROCESS = True):
+                get()
+                results.append((f"{variant} {size:,}", *_timed(get, repeat)))
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Time hot code paths against freshly seeded rows, inside a transaction that is rolled back: "
+        + ", ".join(sorted(CASES)) + "."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("cases", nargs = "*", help = f"Any of {', '.join(sorted(CASES))}; default: all.")
+        parser.add_argument("--rows", type = int, default = 200, help = "Seeded rows per table (per case).")
+        parser.add_argument("--repeat", type = int, default = 20, help = "Timed calls per measurement.")
+
+    def handle(self, *args, cases = None, rows = 200, repeat = 20, **options):
+        unknown = set(cases or ()) - set(CASES)
+        if unknown:
+            raise CommandError(f"Unknown case(s): {', '.join(sorted(unknown))}.")
+        self.stdout.write(f"{'case':<14} {'variant':<22} {'p50 ms':>9} {'p99 ms':>9} {'queries':>8}")
+        for name in cases or sorted(CASES):
+            with transaction.atomic():
+                results = CASES[name](rows, repeat)
+                transaction.set_rollback(True)
+            for variant, p50, p99, queries in results:
+                self.stdout.write(f"{name:<14} {variant:<22} {p50:>9.2f} {p99:>9.2f} {queries:>8}")
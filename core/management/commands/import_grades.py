@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.grade_import import CHUNK_SIZE, ImportFileError, import_grades, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import grades from a CSV or XLSX file with columns username, subject (code), value, credits."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--chunk-size", type = int, default = CHUNK_SIZE)
+        parser.add_argument("--dry-run", action = "store_true", help = "Validate every row without writing.")
+
+    def handle(self, path, chunk_size = CHUNK_SIZE, dry_run = False, **options):
+        try:
+            with open(path, "rb") as f:
+                result = import_grades(read_rows(f, path), chunk_size = chunk_size, dry_run = dry_run)
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for err in result["errors"]:
+            self.stderr.write(f"line {err['line']}: {err['error']}")
+        verb = "would be created" if dry_run else "created"
+        self.stdout.write(self.style.SUCCESS(f"{result['created']} grades {verb}, {len(result['errors'])} rows rejected."))
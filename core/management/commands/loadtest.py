@@ -0,0 +1,122 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+ENDPOINTS = ("dashboard", "grades", "attendance", "assignments", "announcements")
+
+
+async def _worker(client, url, headers, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, headers = headers)
+            ok = response.status_code == 200
+        except Exception:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors.append(url)
+
+
+async def _run(httpx, url, headers, clients, duration):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections = clients, max_keepalive_connections = clients)
+    async with httpx.AsyncClient(limits = limits, timeout = 60) as client:
+        await client.get(url, headers = headers)  # warm caches and the connection pool
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(_worker(client, url, headers, deadline, latencies, errors) for _ in range(clients)))
+    return latencies, errors
+
+
+async def _hold_stream(client, url, headers, opened, failed):
+    started = time.perf_counter()
+    try:
+        async with client.stream("GET", url, headers = headers) as response:
+            if response.status_code != 200:
+                failed.append(response.status_code)
+                return
+            async for chunk in response.aiter_bytes():
+                if chunk.startswith(b"retry:"):
+                    opened.append(time.perf_counter() - started)
+    except Exception as e:
+        failed.append(type(e).__name__)
+
+
+async def _run_streams(httpx, url, headers, count, duration):
+    opened, failed = [], []
+    limits = httpx.Limits(max_connections = count, max_keepalive_connections = 0)
+    async with httpx.AsyncClient(limits = limits, timeout = httpx.Timeout(60, read = None)) as client:
+        tasks = [asyncio.ensure_future(_hold_stream(client, url, headers, opened, failed)) for _ in range(count)]
+        await asyncio.sleep(duration)
+        held = sum(not t.done() for t in tasks)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions = True)
+    return opened, failed, held
+
+
+class Command(BaseCommand):
+    help = (
+        "Closed-loop load test of the sync endpoints against their /api/async/ twins on a running "
+        "server, e.g. `uvicorn conffig.asgi:application` with the SQLite settings, or with --streams, "
+        "how many idle event streams one server holds. Needs httpx."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default = "http://127.0.0.1:8000")
+        parser.add_argument("--username")
+        parser.add_argument("--password")
+        parser.add_argument("--token", help = "JWT access token (instead of --username/--password).")
+        parser.add_argument("--clients", type = int, nargs = "+", default = [50, 200])
+        parser.add_argument("--duration", type = float, default = 10, help = "Seconds per run.")
+        parser.add_argument("--endpoint", action = "append", choices = ENDPOINTS, help = "Repeatable; default: dashboard and grades.")
+        parser.add_argument("--streams", type = int, help = "Instead: hold this many idle /api/stream/ connections open for --duration.")
+
+    def handle(self, *args, **options):
+        try:
+            import httpx
+        except ImportError:
+            raise CommandError("The load test needs httpx (pip install httpx).")
+
+        base = options["base_url"].rstrip("/")
+        token = options["token"] or self._login(httpx, base, options["username"], options["password"])
+        headers = {"Authorization": f"Bearer {token}"}
+
+        if options["streams"]:
+            opened, failed, held = asyncio.run(_run_streams(httpx, f"{base}/api/stream/", headers, options["streams"], options["duration"]))
+            ms = sorted(o * 1000 for o in opened) or [float("nan")]
+            self.stdout.write(
+                f"streams: {options['streams']} requested, {len(opened)} opened, {held} still open after {options['duration']:g}s, "
+                f"{len(failed)} failed; open p50 {statistics.median(ms):.1f} ms, p95 {ms[min(len(ms) - 1, int(len(ms) * 0.95))]:.1f} ms"
+            )
+            return
+
+        self.stdout.write(f"{'endpoint':<14} {'path':<6} {'clients':>7} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for endpoint in options["endpoint"] or ["dashboard", "grades"]:
+            for clients in options["clients"]:
+                for label, prefix in (("sync", "/api/"), ("async", "/api/async/")):
+                    url = f"{base}{prefix}{endpoint}/"
+                    latencies, errors = asyncio.run(_run(httpx, url, headers, clients, options["duration"]))
+                    self._report(endpoint, label, clients, latencies, errors, options["duration"])
+
+    def _login(self, httpx, base, username, password):
+        if not username or not password:
+            raise CommandError("Pass --token, or --username and --password.")
+        response = httpx.post(f"{base}/api/token/", json = {"username": username, "password": password})
+        if response.status_code != 200:
+            raise CommandError(f"Login failed ({response.status_code}): {response.text}")
+        return response.json()["access"]
+
+    def _report(self, endpoint, label, clients, latencies, errors, duration):
+        if latencies:
+            ms = sorted(l * 1000 for l in latencies)
+            p50, p95 = statistics.median(ms), ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+        else:
+            p50 = p95 = float("nan")
+        self.stdout.write(
+            f"{endpoint:<14} {label:<6} {clients:>7} {len(latencies):>9} {len(latencies) / duration:>8.1f} "
+            f"{p50:>8.1f} {p95:>8.1f} {len(errors):>7}"
+        )
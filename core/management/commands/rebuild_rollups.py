@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import jobs
+from core.models import GradeRollup, AttendanceRollup
+from core.rollups import compute_grade_rollups, compute_attendance_rollups, replace_rollups, STATUS_FIELDS
+
+GRADE_FIELDS = ["count", "value_sum", "weighted_sum", "credit_sum"]
+ATTENDANCE_FIELDS = list(STATUS_FIELDS.values())
+
+
+def _drift(model, fresh, key_fields, value_fields):
+    """Count stored rows that are missing, stale, or no longer backed by raw data."""
+    def key(r):
+        return tuple(getattr(r, f) for f in key_fields)
+
+    stored = {key(r): r for r in model.objects.all()}
+    drift = 0
+    for r in fresh:
+        s = stored.pop(key(r), None)
+        if s is None or any(abs(getattr(s, f) - getattr(r, f)) > 1e-6 for f in value_fields):
+            drift += 1
+    return drift + len(stored)
+
+
+class Command(BaseCommand):
+    help = "Rebuild GradeRollup / AttendanceRollup from raw rows, or verify them with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action = "store_true", help = "Only report drift; exit non-zero if any.")
+        parser.add_argument("--enqueue", action = "store_true", help = "Queue the rebuild for `run_jobs` instead of running it here.")
+
+    def handle(self, *args, check = False, enqueue = False, **options):
+        if enqueue:
+            job = jobs.enqueue("rebuild_rollups")
+            self.stdout.write(self.style.SUCCESS(f"Queued as job {job.pk} ({job.status})."))
+            return
+
+        grades = compute_grade_rollups()
+        attendance = compute_attendance_rollups()
+
+        grade_drift = _drift(GradeRollup, grades, ["user_id", "subject_id"], GRADE_FIELDS)
+        attendance_drift = _drift(AttendanceRollup, attendance, ["user_id", "subject_id", "month"], ATTENDANCE_FIELDS)
+        self.stdout.write(f"grade rollups: {len(grades)} expected, {grade_drift} drifted")
+        self.stdout.write(f"attendance rollups: {len(attendance)} expected, {attendance_drift} drifted")
+
+        if check:
+            if grade_drift or attendance_drift:
+                raise CommandError("Rollups have drifted; run rebuild_rollups without --check.")
+            return
+
+        replace_rollups(grades, attendance)
+        self.stdout.write(self.style.SUCCESS("Rollups rebuilt."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import SearchToken
+from core.search import INDEXES, document_tokens
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Rebuild the assignment / announcement search index (SearchToken) from the documents."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            SearchToken.objects.all().delete()
+            for kind, (model, fields) in INDEXES.items():
+                docs = model.objects.select_related("subject").only("pk", "subject__name", *fields)
+                rows, total = [], 0
+                for doc in docs.iterator(chunk_size = BATCH_SIZE):
+                    rows += document_tokens(doc)
+                    if len(rows) >= BATCH_SIZE:
+                        SearchToken.objects.bulk_create(rows)
+                        total += len(rows)
+                        rows = []
+                SearchToken.objects.bulk_create(rows)
+                total += len(rows)
+                self.stdout.write(f"{kind}: {total} tokens")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
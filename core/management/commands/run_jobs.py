@@ -0,0 +1,34 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.jobs import REGISTRY, Worker
+from core.models import Job
+
+OUTCOMES = {Job.SUCCEEDED: "succeeded", Job.QUEUED: "to be retried", Job.FAILED: "failed"}
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (core.jobs) until stopped, or with --once until none is due."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type = int, default = 4, help = "Jobs run at the same time by this worker.")
+        parser.add_argument("--pool", choices = ["thread", "process"], default = "thread", help = "process suits CPU-bound jobs.")
+        parser.add_argument("--kind", action = "append", help = "Only run this kind; repeatable.")
+        parser.add_argument("--once", action = "store_true", help = "Exit once nothing is due instead of polling.")
+
+    def handle(self, *args, concurrency, pool, kind, once, **options):
+        unknown = set(kind or ()) - set(REGISTRY)
+        if unknown:
+            raise CommandError(f"Unknown job kind(s): {', '.join(sorted(unknown))}. Known: {', '.join(sorted(REGISTRY))}.")
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        worker = Worker(concurrency = concurrency, pool = pool, kinds = kind)
+        # finish the running jobs, claim no new ones
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: worker.stop())
+
+        self.stdout.write(f"Worker {worker.id}: {concurrency} {pool}(s).")
+        outcomes = worker.run(once = once)
+        self.stdout.write(", ".join(f"{n} {OUTCOMES[status]}" for status, n in sorted(outcomes.items())) or "No jobs run.")
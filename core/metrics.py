@@ -0,0 +1,110 @@
+"""
+In-process request metrics, rendered in the Prometheus text format.
+
+RequestMetricsMiddleware records, per resolved view name, request counts, DB query
+counts and time, response rendering (serialization) time and total time. Each
+worker process keeps its own totals; scrape every worker (or run one per
+container) as usual for in-process Prometheus metrics.
+"""
+import threading
+from bisect import bisect_left
+
+from . import dashboard_cache, middleware
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_views = {}
+
+
+def _new_view():
+    return {
+        "requests": {},          # status code -> count
+        "queries": 0,
+        "db_seconds": 0.0,
+        "render_seconds": 0.0,
+        "seconds": 0.0,
+        "buckets": [0] * (len(DURATION_BUCKETS) + 1),
+        "over_budget": {"queries": 0, "time": 0},
+    }
+
+
+def record(view, status, queries, db_seconds, render_seconds, seconds, over_budget = ()):
+    with _lock:
+        m = _views.get(view)
+        if m is None:
+            m = _views[view] = _new_view()
+        m["requests"][status] = m["requests"].get(status, 0) + 1
+        m["queries"] += queries
+        m["db_seconds"] += db_seconds
+        m["render_seconds"] += render_seconds
+        m["seconds"] += seconds
+        m["buckets"][bisect_left(DURATION_BUCKETS, seconds)] += 1
+        for budget in over_budget:
+            m["over_budget"][budget] += 1
+
+
+def snapshot():
+    with _lock:
+        return {
+            view: {**m, "requests": dict(m["requests"]), "buckets": list(m["buckets"]), "over_budget": dict(m["over_budget"])}
+            for view, m in _views.items()
+        }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus():
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{k}="{_label(v)}"' for k, v in labels)
+            lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+
+    views = sorted(snapshot().items())
+
+    family("edu_http_requests_total", "counter", "Requests by resolved view and status code.", [
+        ("", (("view", v), ("code", code)), n) for v, m in views for code, n in sorted(m["requests"].items())
+    ])
+
+    duration = []
+    for v, m in views:
+        cumulative = 0
+        for le, n in zip(DURATION_BUCKETS + ("+Inf",), m["buckets"]):
+            cumulative += n
+            duration.append(("_bucket", (("view", v), ("le", le)), cumulative))
+        duration.append(("_sum", (("view", v),), repr(m["seconds"])))
+        duration.append(("_count", (("view", v),), cumulative))
+    family("edu_http_request_duration_seconds", "histogram", "Total request time by resolved view.", duration)
+
+    family("edu_db_queries_total", "counter", "SQL queries executed by resolved view.", [
+        ("", (("view", v),), m["queries"]) for v, m in views
+    ])
+    family("edu_db_query_seconds_total", "counter", "Time spent in SQL queries by resolved view.", [
+        ("", (("view", v),), repr(m["db_seconds"])) for v, m in views
+    ])
+    family("edu_render_seconds_total", "counter", "Time spent rendering (serializing) responses by resolved view.", [
+        ("", (("view", v),), repr(m["render_seconds"])) for v, m in views
+    ])
+    family("edu_budget_exceeded_total", "counter", "Requests over the query or time budget by resolved view.", [
+        ("", (("view", v), ("budget", b)), n) for v, m in views for b, n in sorted(m["over_budget"].items())
+    ])
+
+    conn = middleware.connection_stats()
+    family("edu_db_connections_total", "counter", "Requests by whether the DB connection was reused, opened or not used.", [
+        ("", (("state", state),), conn[state]) for state in ("reused", "opened", "unused")
+    ])
+    family("edu_db_connection_setup_seconds_total", "counter", "Time spent opening DB connections during requests.", [
+        ("", (), repr(conn["connect_seconds"])),
+    ])
+
+    cache = dashboard_cache.stats()
+    family("edu_dashboard_cache_events_total", "counter", "Dashboard cache hits, misses and evictions.", [
+        ("", (("event", k),), cache[k]) for k in ("hits", "misses", "evictions")
+    ])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,197 @@
+"""
+Request-level database connection and timing metrics.
+
+ConnectionMetricsMiddleware records, for the default database, whether a request
+reused a persistent connection, had to open one, or never touched the database. It
+does no database work itself: a connection opened while the request runs shows up
+as a `connection_created` signal, and use as a query through an execute wrapper.
+The per-request outcome is sent as `X-DB-Connection: reused|new|unused`;
+process-wide totals are available from `connection_stats()`. With a core.backends
+engine the time spent opening a connection is also reported, as `db-connect` in
+`Server-Timing` and in the totals.
+
+RequestMetricsMiddleware counts queries and DB time through an execute wrapper (no
+DEBUG query log needed), times response rendering and the whole request, reports
+them in `Server-Timing`, feeds the per-view totals in core.metrics and logs
+requests over REQUEST_QUERY_BUDGET queries or REQUEST_TIME_BUDGET_MS.
+
+Both middlewares run sync under WSGI and async under ASGI. Under ASGI the queries of
+a request run in sync_to_async threads, each with its own connection objects, so
+rather than wrapping the current thread's connections per request, one execute
+wrapper (`_observe`) is installed on every connection as it opens and reports to
+whichever request is measuring the current context; sync_to_async carries the
+context into its threads.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import metrics
+
+logger = logging.getLogger("core.metrics")
+
+_stats = {"requests": 0, "reused": 0, "opened": 0, "unused": 0, "connect_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+# {"opened": bool, "connect_seconds": float, "queries": int} for the request running in this context
+_current = ContextVar("connection_metrics", default = None)
+# the _QueryTimer of the request running in this context
+_timer = ContextVar("request_timer", default = None)
+
+
+def connection_stats():
+    """Connection counters for this process, plus the reuse rate of requests that used the database."""
+    with _stats_lock:
+        stats = dict(_stats)
+    used = stats["reused"] + stats["opened"]
+    stats["reuse_rate"] = stats["reused"] / used if used else 0.0
+    return stats
+
+
+def _observe(execute, sql, params, many, context):
+    state = _current.get()
+    if state is not None and context["connection"].alias == DEFAULT_DB_ALIAS:
+        state["queries"] += 1
+    timer = _timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def _install(connection):
+    # first in line: execute_wrapper() removes the last wrapper when its block exits
+    if _observe not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _observe)
+
+
+class _Middleware:
+    """Measures each request in `context` around the rest of the chain, sync or async like the chain."""
+    sync_capable = True
+    async_capable = True
+    context = None
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # connections this thread opened before _connection_opened was connected
+        for conn in connections.all(initialized_only = True):
+            _install(conn)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        measured = self.start(request)
+        token = self.context.set(measured)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.context.reset(token)
+        return self.finish(request, response, measured)
+
+    async def __acall__(self, request):
+        measured = self.start(request)
+        token = self.context.set(measured)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.context.reset(token)
+        return self.finish(request, response, measured)
+
+
+@receiver(connection_created)
+def _connection_opened(sender, connection, **kwargs):
+    _install(connection)
+    state = _current.get()
+    if state is not None and connection.alias == DEFAULT_DB_ALIAS:
+        state["opened"] = True
+        # set by core.backends; the stock backends do not time their connections
+        state["connect_seconds"] += getattr(connection, "connect_seconds", None) or 0.0
+
+
+def _add_timing(response, timing):
+    response["Server-Timing"] = f"{response['Server-Timing']}, {timing}" if response.has_header("Server-Timing") else timing
+
+
+class ConnectionMetricsMiddleware(_Middleware):
+    context = _current
+
+    def start(self, request):
+        return {"opened": False, "connect_seconds": 0.0, "queries": 0}
+
+    def finish(self, request, response, state):
+        outcome = "new" if state["opened"] else "reused" if state["queries"] else "unused"
+        with _stats_lock:
+            _stats["requests"] += 1
+            _stats["opened" if outcome == "new" else outcome] += 1
+            _stats["connect_seconds"] += state["connect_seconds"]
+        response["X-DB-Connection"] = outcome
+        if state["opened"]:
+            _add_timing(response, f"db-connect;dur={state['connect_seconds'] * 1000:.2f}")
+        return response
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestMetricsMiddleware(_Middleware):
+    context = _timer
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.query_budget = getattr(settings, "REQUEST_QUERY_BUDGET", None)
+        self.time_budget = getattr(settings, "REQUEST_TIME_BUDGET_MS", None)
+
+    def start(self, request):
+        request._render_timing = [0.0, 0.0]
+        return _QueryTimer()
+
+    def finish(self, request, response, timer):
+        total = time.perf_counter() - timer.started
+        render = request._render_timing[1] - request._render_timing[0] if request._render_timing[1] else 0.0
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None else "<unresolved>"
+        over = []
+        if self.query_budget is not None and timer.count > self.query_budget:
+            over.append("queries")
+        if self.time_budget is not None and total * 1000 > self.time_budget:
+            over.append("time")
+        if over:
+            logger.warning(
+                "%s %s (%s) over budget: %d queries, %.1f ms in DB, %.1f ms total",
+                request.method, request.get_full_path(), view, timer.count, timer.seconds * 1000, total * 1000,
+            )
+        metrics.record(view, response.status_code, timer.count, timer.seconds, render, total, over)
+
+        timing = f'db;dur={timer.seconds * 1000:.2f};desc="{timer.count} queries", render;dur={render * 1000:.2f}, total;dur={total * 1000:.2f}'
+        _add_timing(response, timing)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time just that step
+        timing = request._render_timing
+        timing[0] = time.perf_counter()
+        response.add_post_render_callback(lambda r: timing.__setitem__(1, time.perf_counter()))
+        return response
@@ -0,0 +1,96 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Grade = apps.get_model("core", "Grade")
+    Attendance = apps.get_model("core", "Attendance")
+    GradeRollup = apps.get_model("core", "GradeRollup")
+    AttendanceRollup = apps.get_model("core", "AttendanceRollup")
+
+    grades = (
+        Grade.objects.order_by()
+        .values("user_id", "subject_id")
+        .annotate(
+            n=Count("id"),
+            total=Sum("value"),
+            weighted=Sum(F("value") * F("credits"), filter=Q(credits__isnull=False)),
+            credits=Sum("credits"),
+        )
+    )
+    GradeRollup.objects.bulk_create(
+        [
+            GradeRollup(
+                user_id=r["user_id"], subject_id=r["subject_id"], count=r["n"], value_sum=r["total"],
+                weighted_sum=r["weighted"] or 0, credit_sum=r["credits"] or 0,
+            )
+            for r in grades
+        ],
+        batch_size=1000,
+    )
+
+    statuses = {"PRESENT": "present", "ABSENT": "absent", "LATE": "late", "EXCUSED": "excused"}
+    attendance = (
+        Attendance.objects.order_by()
+        .annotate(period=TruncMonth("date"))
+        .values("user_id", "subject_id", "period")
+        .annotate(**{f: Count("id", filter=Q(status=s)) for s, f in statuses.items()})
+    )
+    AttendanceRollup.objects.bulk_create(
+        [
+            AttendanceRollup(
+                user_id=r["user_id"], subject_id=r["subject_id"], month=r["period"],
+                **{f: r[f] for f in statuses.values()},
+            )
+            for r in attendance
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_announcement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('excused', models.PositiveIntegerField(default=0)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='core.subject')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'subject', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='GradeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('value_sum', models.FloatField(default=0)),
+                ('weighted_sum', models.FloatField(default=0)),
+                ('credit_sum', models.FloatField(default=0)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_rollups', to='core.subject')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'subject')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['-created_at', 'id'], name='core_announ_created_a4e4dc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['due_at', 'id'], name='core_assign_due_at_85d291_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['user', '-date', 'id'], name='core_attend_user_id_13643a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['user', '-graded_at', 'id'], name='core_grade_user_id_de794d_idx'),
+        ),
+    ]
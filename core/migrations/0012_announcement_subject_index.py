@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_change_timestamps'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['subject', '-created_at'], name='core_announ_subject_65c0d2_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_announcement_subject_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['owner', 'starts_at', 'ends_at'], name='core_event_owner_i_d2eff5_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='core_event_owner_i_c61d6d_idx',
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:09
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_series_end(apps, schema_editor):
+    # every existing event is a one-off
+    apps.get_model("core", "Event").objects.update(series_ends_at = F("ends_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_event_interval_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='exdates',
+            field=models.JSONField(blank=True, default=list, help_text='Dates (YYYY-MM-DD) on which a recurring event does not take place'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', help_text='Optional weekly rule, e.g. FREQ=WEEKLY;BYDAY=MO,WE;COUNT=15 or FREQ=WEEKLY;UNTIL=20261220', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='series_ends_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_series_end, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='event',
+            name='series_ends_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['owner', 'starts_at', 'series_ends_at'], name='core_event_owner_i_6cd349_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='core_event_owner_i_d2eff5_idx',
+        ),
+    ]
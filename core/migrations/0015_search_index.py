@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:23
+
+import re
+
+from django.db import migrations, models
+
+WORD = re.compile(r"\w+")
+INDEXED = {"assignment": ("Assignment", ["title", "description"]), "announcement": ("Announcement", ["title", "body"])}
+
+
+def build_index(apps, schema_editor):
+    # what core.search indexes on save, frozen here: the existing documents would otherwise be unsearchable
+    SearchToken = apps.get_model("core", "SearchToken")
+    for kind, (model_name, fields) in INDEXED.items():
+        docs = apps.get_model("core", model_name).objects.values_list("pk", "subject__name", *fields)
+        rows = []
+        for pk, subject_name, *texts in docs.iterator(chunk_size = 2000):
+            for field, text in [*zip(fields, texts), ("subject", subject_name)]:
+                rows += [
+                    SearchToken(kind = kind, doc_id = pk, field = field, token = token[:32], position = position)
+                    for position, token in enumerate(WORD.findall((text or "").lower()))
+                ]
+            if len(rows) >= 2000:
+                SearchToken.objects.bulk_create(rows)
+                rows = []
+        SearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_event_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16)),
+                ('doc_id', models.PositiveBigIntegerField()),
+                ('field', models.CharField(max_length=16)),
+                ('token', models.CharField(max_length=32)),
+                ('position', models.PositiveIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'token', 'doc_id'], name='core_search_kind_b70e44_idx'), models.Index(fields=['kind', 'doc_id'], name='core_search_kind_89a482_idx')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_active_key(apps, schema_editor):
+    # the oldest unfinished job per (kind, key) holds the key; duplicates from earlier
+    # enqueue races still run, they just do not claim it
+    Job = apps.get_model("core", "Job")
+    claimed = set()
+    for pk, kind, key in Job.objects.filter(status__in = ["QUEUED", "RUNNING"]).order_by("id").values_list("id", "kind", "key"):
+        if (kind, key) not in claimed:
+            claimed.add((kind, key))
+            Job.objects.filter(pk = pk).update(active_key = key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='active_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_active_key, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(fields=('kind', 'active_key'), name='core_job_one_active_per_key'),
+        ),
+    ]
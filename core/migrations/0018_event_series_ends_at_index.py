@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_job_active_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['series_ends_at', 'starts_at'], name='core_event_series__20f6b3_idx'),
+        ),
+    ]
@@ -8,11 +8,14 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 
+from . import recurrence
+
 class Subject(models.Model):
     code = models.CharField(max_length = 10, unique = True)  # MS for Math
     name = models.CharField(max_length = 100)                # Mathematics
     color = models.CharField(max_length = 7, blank = True, null = True)  # #22c55e
     created_at = models.DateTimeField(auto_now_add = True)
+    updated_at = models.DateTimeField(auto_now = True)
 
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -29,6 +32,12 @@ class Assignment(models.Model):
     created_at = models.DateTimeField(auto_now_add = True)
     updated_at = models.DateTimeField(auto_now = True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields = ["due_at", "id"]),
+            models.Index(fields = ["subject", "status", "due_at"]),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.subject.name})"
 
@@ -40,6 +49,12 @@ class Grade(models.Model):
     credits = models.FloatField(blank = True, null = True)
     graded_at = models.DateTimeField(auto_now_add = True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields = ["user", "-graded_at", "id"]),
+            models.Index(fields = ["user", "subject"]),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.subject.name}: {self.value}"
 
@@ -60,6 +75,10 @@ class Attendance(models.Model):
     class Meta:
         unique_together = ("user", "subject", "date")
         ordering = ["-date"]
+        indexes = [
+            models.Index(fields = ["user", "-date", "id"]),
+            models.Index(fields = ["subject", "date"]),
+        ]
 
     def __str__(self):
         return f"{self.user.username} {self.subject.name} {self.date} {self.status}"
@@ -71,17 +90,41 @@ class Event(models.Model):
     location = models.CharField(max_length = 200, blank = True, null = True)
     starts_at = models.DateTimeField()
     ends_at = models.DateTimeField()
+    recurrence = models.CharField(max_length = 200, blank = True, default = "", help_text = "Optional weekly rule, e.g. FREQ=WEEKLY;BYDAY=MO,WE;COUNT=15 or FREQ=WEEKLY;UNTIL=20261220")
+    exdates = models.JSONField(default = list, blank = True, help_text = "Dates (YYYY-MM-DD) on which a recurring event does not take place")
+    series_ends_at = models.DateTimeField(editable = False)  # end of the last occurrence; ends_at for one-off events
     created_at = models.DateTimeField(auto_now_add = True)
 
     class Meta:
         ordering = ["starts_at"]
         indexes = [
             models.Index(fields = ["starts_at"]),
+            models.Index(fields = ["owner", "starts_at", "series_ends_at"]),
+            models.Index(fields = ["series_ends_at", "starts_at"]),  # long-running rows in overlap queries (core.freebusy)
         ]
 
     def clean(self):
         if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
             raise ValidationError({"ends_at": "Ends at must be after Starts at."})
+        if self.recurrence:
+            try:
+                rule = recurrence.parse_rule(self.recurrence)
+                if self.starts_at:
+                    recurrence.check_bounds(self.starts_at, rule)
+            except ValueError as e:
+                raise ValidationError({"recurrence": str(e)})
+        try:
+            recurrence.parse_exdates(self.exdates)
+        except (TypeError, ValueError):
+            raise ValidationError({"exdates": "Use a list of YYYY-MM-DD dates."})
+
+    def occurrences(self, start = None, end = None):
+        return recurrence.occurrences(self.starts_at, self.ends_at, self.recurrence, self.exdates, start, end)
+
+    def save(self, *args, **kwargs):
+        last = recurrence.last_occurrence(self.starts_at, self.ends_at, self.recurrence, self.exdates)
+        self.series_ends_at = last[1] if last is not None else self.ends_at
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} -- {self.starts_at or 'TBD'}"
@@ -112,10 +155,106 @@ class Announcement(models.Model):
     body = models.TextField()
     created_by = models.ForeignKey(User, on_delete = models.SET_NULL, null = True, blank = True, related_name = "announcement_created",)
     created_at = models.DateTimeField(auto_now_add = True)
+    updated_at = models.DateTimeField(auto_now = True)
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields = ["-created_at"])]
+        indexes = [
+            models.Index(fields = ["-created_at"]),
+            models.Index(fields = ["-created_at", "id"]),
+            models.Index(fields = ["subject", "-created_at"]),
+        ]
 
     def __str__(self):
         return self.title or f"Announcement #{self.pk}"
+
+
+class GradeRollup(models.Model):
+    """Running per-(user, subject) grade totals, kept in sync by core.rollups."""
+    user = models.ForeignKey(User, on_delete = models.CASCADE, related_name = "grade_rollups")
+    subject = models.ForeignKey(Subject, on_delete = models.CASCADE, related_name = "grade_rollups")
+    count = models.PositiveIntegerField(default = 0)
+    value_sum = models.FloatField(default = 0)
+    weighted_sum = models.FloatField(default = 0)   # sum(value * credits) over graded rows with credits
+    credit_sum = models.FloatField(default = 0)
+
+    class Meta:
+        unique_together = ("user", "subject")
+
+    def __str__(self):
+        return f"{self.user_id}/{self.subject_id}: {self.count} grades"
+
+
+class AttendanceRollup(models.Model):
+    """Per-(user, subject, month) attendance counters, kept in sync by core.rollups."""
+    user = models.ForeignKey(User, on_delete = models.CASCADE, related_name = "attendance_rollups")
+    subject = models.ForeignKey(Subject, on_delete = models.CASCADE, related_name = "attendance_rollups")
+    month = models.DateField()  # first day of the month
+    present = models.PositiveIntegerField(default = 0)
+    absent = models.PositiveIntegerField(default = 0)
+    late = models.PositiveIntegerField(default = 0)
+    excused = models.PositiveIntegerField(default = 0)
+
+    class Meta:
+        unique_together = ("user", "subject", "month")
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.late + self.excused
+
+    def __str__(self):
+        return f"{self.user_id}/{self.subject_id} {self.month:%Y-%m}: {self.total}"
+
+
+class SearchToken(models.Model):
+    """One token occurrence in an indexed document field (inverted index), kept in sync by core.search."""
+    kind = models.CharField(max_length = 16)          # "assignment" | "announcement"
+    doc_id = models.PositiveBigIntegerField()
+    field = models.CharField(max_length = 16)         # "title", "body", "description", "subject"
+    token = models.CharField(max_length = 32)
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields = ["kind", "token", "doc_id"]),
+            models.Index(fields = ["kind", "doc_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.doc_id} {self.field}[{self.position}] {self.token}"
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_jobs` (see core.jobs)."""
+    QUEUED, RUNNING, SUCCEEDED, FAILED = "QUEUED", "RUNNING", "SUCCEEDED", "FAILED"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (SUCCEEDED, "Succeeded"), (FAILED, "Failed")]
+
+    kind = models.CharField(max_length = 50)
+    args = models.JSONField(default = dict, blank = True)
+    key = models.CharField(max_length = 64, blank = True, default = "")   # same kind + key while queued/running = same job
+    active_key = models.CharField(max_length = 64, null = True, blank = True, editable = False)  # `key` while queued/running, else NULL
+    status = models.CharField(max_length = 10, choices = STATUS_CHOICES, default = QUEUED)
+    attempts = models.PositiveIntegerField(default = 0)
+    max_attempts = models.PositiveIntegerField(default = 3)
+    run_after = models.DateTimeField(default = timezone.now)
+    locked_by = models.CharField(max_length = 100, blank = True, default = "")
+    locked_at = models.DateTimeField(null = True, blank = True)
+    result = models.JSONField(null = True, blank = True)
+    error = models.TextField(blank = True, default = "")
+    created_by = models.ForeignKey(User, on_delete = models.SET_NULL, null = True, blank = True, related_name = "jobs")
+    created_at = models.DateTimeField(auto_now_add = True)
+    finished_at = models.DateTimeField(null = True, blank = True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields = ["status", "run_after"]),
+            models.Index(fields = ["kind", "key", "status"]),
+        ]
+        constraints = [
+            # NULLs never collide, so this only binds unfinished jobs; unlike a conditional
+            # constraint it is also enforced by MySQL
+            models.UniqueConstraint(fields = ["kind", "active_key"], name = "core_job_one_active_per_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
@@ -0,0 +1,127 @@
+"""
+Keyset ("cursor") pagination.
+
+PageNumberPagination issues COUNT(*) plus OFFSET scans that get slower on every
+page. KeysetPagination instead remembers the last row's ordering values and asks
+for rows strictly after them, so each page is one index range scan regardless of
+depth, and no total count is returned.
+
+Views opt in by declaring `cursor_ordering`, a tuple of field names ending in a
+unique tie-breaker (e.g. ("-date", "id")). With OptInCursorPagination as the
+default class, clients keep page numbers unless they send `?cursor=` (empty for
+the first page, then the `next` value from each response).
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view = None):
+        self.request = request
+        self.ordering = tuple(view.cursor_ordering)
+        self.fields = [queryset.model._meta.get_field(f.lstrip("-")) for f in self.ordering]
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = [self._value(rows[-1], f.attname) for f in self.fields] if self.has_next else None
+        return rows
+
+    @staticmethod
+    def _value(row, attname):
+        # rows are model instances, or dicts when a view paginates a .values() queryset
+        return row[attname] if isinstance(row, dict) else getattr(row, attname)
+
+    def _after(self, position):
+        # (a, b, c) > (x, y, z) spelled out per column so mixed ASC/DESC orderings work
+        clauses = []
+        for i, (name, field) in enumerate(zip(self.ordering, self.fields)):
+            lookup = "lt" if name.startswith("-") else "gt"
+            cond = {self.fields[j].attname: position[j] for j in range(i)}
+            cond[f"{field.attname}__{lookup}"] = position[i]
+            clauses.append(Q(**cond))
+        return reduce(or_, clauses)
+
+    def encode_cursor(self, position):
+        raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in position])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if not isinstance(raw, list) or len(raw) != len(self.fields):
+                raise ValueError
+            return [f.to_python(v) for f, v in zip(self.fields, raw)]
+        except (TypeError, ValueError, ValidationError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class OptInCursorPagination(PageNumberPagination):
+    """Page numbers by default; keyset pages when `?cursor` is sent to a view with `cursor_ordering`."""
+
+    cursor_query_param = KeysetPagination.cursor_query_param
+
+    def paginate_queryset(self, queryset, request, view = None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params and getattr(view, "cursor_ordering", None):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        params = super().get_schema_operation_parameters(view)
+        if getattr(view, "cursor_ordering", None):
+            params.append({
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opt into keyset pagination: empty for the first page, then the `next` cursor.",
+                "schema": {"type": "string"},
+            })
+        return params
@@ -0,0 +1,97 @@
+"""
+Topic-based publish/subscribe for pushing model changes to open streams.
+
+Publishers are ordinary sync code (signal handlers, usually in a request or worker
+thread); subscribers are coroutines on an event loop. LocalBroker keeps everything
+in this process: publish() hands the message to each subscriber's loop with
+call_soon_threadsafe, and a subscriber that falls STREAM_QUEUE_SIZE messages behind
+is cut off (it gets OVERFLOW and is expected to reconnect and resume).
+
+The broker class is settings.PUBSUB_BACKEND. A multi-process deployment needs a
+backend that fans out between processes (e.g. Redis pub/sub) with the same
+interface: publish(topic, message), subscribe(topics) -> an object with
+`async get()` and `close()`.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+OVERFLOW = object()
+
+
+class Subscription:
+    def __init__(self, broker, topics, maxsize):
+        self.broker = broker
+        self.topics = frozenset(topics)
+        self.maxsize = maxsize
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def _deliver(self, message):
+        # runs on the subscriber's loop
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.maxsize:
+            self.overflowed = True
+            message = OVERFLOW
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class LocalBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = defaultdict(set)
+
+    def subscribe(self, topics, maxsize = None):
+        """Subscribe the running event loop to `topics`; call from a coroutine."""
+        sub = Subscription(self, topics, maxsize or settings.STREAM_QUEUE_SIZE)
+        with self._lock:
+            for topic in sub.topics:
+                self._topics[topic].add(sub)
+        return sub
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._topics.get(topic)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._topics[topic]
+
+    def publish(self, topic, message):
+        with self._lock:
+            subs = list(self._topics.get(topic, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, message)
+            except RuntimeError:  # the loop has closed; the stream is gone
+                self._unsubscribe(sub)
+        return len(subs)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._topics.values()))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.PUBSUB_BACKEND)()
+    return _broker
@@ -0,0 +1,110 @@
+"""
+Guard against N+1 queries in tests and during development.
+
+QueryGuard records every query run on any connection while it is active and
+reduces each one to its structure: literals, placeholders and IN lists are
+folded away, so `SELECT ... WHERE id = 1` and `... WHERE id = 2` count as the
+same query. Leaving the guard raises RepeatedQueriesError when one structure ran
+more than `max_repeats` times, which is what a missing select_related /
+prefetch_related looks like from the database's side.
+
+    with QueryGuard():
+        client.get("/api/grades/")
+
+    @no_repeated_queries(max_repeats = 1)
+    def test_grades(client): ...
+
+For pytest, enable the `query_guard` fixture with `pytest_plugins = ["core.query_guard"]`
+in a conftest; it guards the whole test body.
+"""
+import re
+from collections import Counter
+from contextlib import ContextDecorator, ExitStack
+
+from django.db import connections
+
+DEFAULT_MAX_REPEATS = 2
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.\"`])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_SPACE = re.compile(r"\s+")
+# transaction bookkeeping repeats legitimately and says nothing about the view
+_IGNORED = re.compile(r"^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|BEGIN|COMMIT|ROLLBACK)\b", re.I)
+
+
+def fingerprint(sql):
+    """The structure of `sql`, with every literal and parameter replaced by `?`."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class RepeatedQueriesError(AssertionError):
+    def __init__(self, repeated, total):
+        self.repeated = repeated
+        lines = [f"{n}x {sql}" for sql, n in repeated]
+        super().__init__(f"{len(repeated)} query shape(s) repeated ({total} queries in total):\n  " + "\n  ".join(lines))
+
+
+class QueryGuard(ContextDecorator):
+    def __init__(self, max_repeats = DEFAULT_MAX_REPEATS, using = None):
+        self.max_repeats = max_repeats
+        self.using = using
+        self.queries = []
+
+    def _recreate_cm(self):
+        # as a decorator each call gets its own guard (and query log)
+        return type(self)(self.max_repeats, self.using)
+
+    def _wrapper(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.queries = []
+        self._stack = ExitStack()
+        aliases = [self.using] if self.using else list(connections)
+        for alias in aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._wrapper))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+        if exc_type is None:
+            self.check()
+        return False
+
+    def counts(self):
+        return Counter(fingerprint(sql) for sql in self.queries if not _IGNORED.match(sql))
+
+    def repeated(self):
+        """(fingerprint, count) for each shape over the limit, most frequent first."""
+        return [(sql, n) for sql, n in self.counts().most_common() if n > self.max_repeats]
+
+    def check(self):
+        repeated = self.repeated()
+        if repeated:
+            raise RepeatedQueriesError(repeated, len(self.queries))
+
+
+def no_repeated_queries(max_repeats = DEFAULT_MAX_REPEATS, using = None):
+    """Decorator (or context manager) form of QueryGuard."""
+    return QueryGuard(max_repeats, using)
+
+
+try:
+    import pytest
+except ImportError:  # pytest is only needed for the fixture
+    pytest = None
+
+if pytest is not None:
+    @pytest.fixture
+    def query_guard():
+        """Fails the test if its body repeats a query shape; adjust `query_guard.max_repeats` if needed."""
+        guard = QueryGuard()
+        with guard:
+            yield guard
@@ -0,0 +1,156 @@
+"""
+Weekly recurrence for events (a subset of RFC 5545 RRULE).
+
+Supported: FREQ=WEEKLY, optional BYDAY (defaults to the weekday of the first
+occurrence) and exactly one of UNTIL=YYYYMMDD (inclusive) or COUNT=n. Exception
+dates are stored separately on the event. Like RRULE, COUNT counts occurrences
+before exception dates are removed.
+
+A series is stored as one row; `occurrences` expands it lazily, jumping straight to
+the week a window starts in, so the work is bounded by the window, not the series.
+`last_occurrence` finds the end of a series arithmetically. New series are limited
+to MAX_OCCURRENCES occurrences and to UNTIL dates before MAX_UNTIL (`check_bounds`).
+"""
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from django.utils import timezone
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+Rule = namedtuple("Rule", ["weekdays", "until", "count"])
+
+MAX_OCCURRENCES = 1000
+MAX_UNTIL = date(2200, 1, 1)
+
+
+def parse_rule(text):
+    """Parse an RRULE string into a Rule; ValueError when it is outside the supported subset."""
+    parts = {}
+    for part in text.upper().replace("RRULE:", "").split(";"):
+        if part:
+            key, sep, value = part.partition("=")
+            if not sep or not value:
+                raise ValueError(f"Malformed rule part '{part}'.")
+            parts[key] = value
+
+    if parts.pop("FREQ", None) != "WEEKLY":
+        raise ValueError("Only FREQ=WEEKLY is supported.")
+
+    weekdays = None
+    if "BYDAY" in parts:
+        names = parts.pop("BYDAY").split(",")
+        if any(n not in WEEKDAYS for n in names):
+            raise ValueError("BYDAY takes two-letter weekdays: MO,TU,WE,TH,FR,SA,SU.")
+        weekdays = tuple(sorted({WEEKDAYS.index(n) for n in names}))
+
+    until = count = None
+    if "UNTIL" in parts:
+        until = datetime.strptime(parts.pop("UNTIL")[:8], "%Y%m%d").date()
+    if "COUNT" in parts:
+        count = int(parts.pop("COUNT"))
+        if count < 1:
+            raise ValueError("COUNT must be positive.")
+    if parts:
+        raise ValueError(f"Unsupported rule part(s): {', '.join(sorted(parts))}.")
+    if (until is None) == (count is None):
+        raise ValueError("Give exactly one of UNTIL or COUNT.")
+    return Rule(weekdays, until, count)
+
+
+def parse_exdates(values):
+    return {v if isinstance(v, date) else date.fromisoformat(v) for v in values or ()}
+
+
+def check_bounds(starts_at, rule):
+    """ValueError when the series starting at `starts_at` is longer than MAX_OCCURRENCES or runs past MAX_UNTIL."""
+    rule = parse_rule(rule) if isinstance(rule, str) else rule
+    if rule.until is not None and rule.until >= MAX_UNTIL:
+        raise ValueError(f"UNTIL must be before {MAX_UNTIL:%Y%m%d}.")
+    if series_length(starts_at, rule) > MAX_OCCURRENCES:
+        raise ValueError(f"A series can have at most {MAX_OCCURRENCES} occurrences.")
+
+
+def _grid(starts_at, rule):
+    """(first day, wall-clock time, weekdays, Monday of the first week, weekdays of that week before the first day)."""
+    first = timezone.localtime(starts_at)
+    first_day = first.date()
+    weekdays = rule.weekdays or (first_day.weekday(),)
+    week0 = first_day - timedelta(days = first_day.weekday())
+    return first_day, first.time(), weekdays, week0, sum(1 for wd in weekdays if wd < first_day.weekday())
+
+
+def series_length(starts_at, rule):
+    """The number of occurrences of the series, counted like COUNT (exception dates included)."""
+    rule = parse_rule(rule) if isinstance(rule, str) else rule
+    if rule.count is not None:
+        return rule.count
+    first_day, _, weekdays, week0, before_first = _grid(starts_at, rule)
+    if rule.until < first_day:
+        return 0
+    weeks, rest = divmod((rule.until - week0).days, 7)
+    return weeks * len(weekdays) + sum(1 for wd in weekdays if wd <= rest) - before_first
+
+
+def last_occurrence(starts_at, ends_at, rule, exdates = ()):
+    """
+    (starts_at, ends_at) of the last occurrence, or None when exception dates remove
+    all of them. Occurrences are numbered across the weekly grid, so the last one is
+    found without expanding the series; only trailing exception dates are stepped over.
+    """
+    if not rule:
+        return starts_at, ends_at
+    rule = parse_rule(rule) if isinstance(rule, str) else rule
+    skip = parse_exdates(exdates)
+    _, at, weekdays, week0, before_first = _grid(starts_at, rule)
+    for n in range(series_length(starts_at, rule), 0, -1):
+        weeks, i = divmod(before_first + n - 1, len(weekdays))
+        day = week0 + timedelta(weeks = weeks, days = weekdays[i])
+        if day not in skip:
+            occ_start = timezone.make_aware(datetime.combine(day, at))
+            return occ_start, occ_start + (ends_at - starts_at)
+    return None
+
+
+def occurrences(starts_at, ends_at, rule, exdates = (), start = None, end = None):
+    """
+    Yield (starts_at, ends_at) for each occurrence overlapping [start, end), in order.
+
+    Without a rule the event itself is the only occurrence. Occurrences keep the
+    wall-clock time of the first one in the current time zone.
+    """
+    if not rule:
+        if (start is None or ends_at > start) and (end is None or starts_at < end):
+            yield starts_at, ends_at
+        return
+
+    rule = parse_rule(rule) if isinstance(rule, str) else rule
+    skip = parse_exdates(exdates)
+    duration = ends_at - starts_at
+    first_day, at, weekdays, week0, before_first = _grid(starts_at, rule)
+
+    # jump to the week in which an occurrence could first reach the window
+    week = 0
+    if start is not None:
+        earliest = timezone.localtime(start - duration).date()
+        week = max(0, (earliest - week0).days // 7)
+    index = week * len(weekdays) - before_first if week else 0   # occurrences before `week`
+
+    while True:
+        monday = week0 + timedelta(weeks = week)
+        for wd in weekdays:
+            day = monday + timedelta(days = wd)
+            if day < first_day:
+                continue
+            if (rule.count is not None and index >= rule.count) or (rule.until is not None and day > rule.until):
+                return
+            index += 1
+            if day in skip:
+                continue
+            occ_start = timezone.make_aware(datetime.combine(day, at))
+            if end is not None and occ_start >= end:
+                return
+            occ_end = occ_start + duration
+            if start is None or occ_end > start:
+                yield occ_start, occ_end
+        week += 1
@@ -0,0 +1,58 @@
+"""
+JSON renderer / parser backed by orjson when it is installed.
+
+The output parses to the same JSON as rest_framework.renderers.JSONRenderer with the
+default COMPACT_JSON / UNICODE_JSON settings: datetimes, dates, times, Decimals and
+other non-native types are passed back to DRF's own JSONEncoder.default, and U+2028 /
+U+2029 are escaped the same way, so for the payloads the API serves (strings, ints,
+decimal-place floats) the bytes are identical too (core/tests/test_renderers.py).
+Two spellings differ: floats in exponent notation (orjson writes 1e16 and 1.5e-7,
+the json module 1e+16 and 1.5e-07), and NaN / Infinity, which render as null instead
+of raising under STRICT_JSON. Anything orjson cannot encode (indented output for the
+browsable API, non-default JSON settings, integers beyond 64 bits, ...) falls back to
+the stock implementation, which is also used when orjson is missing.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type = None, renderer_context = None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default = self.encoder_class().default,
+                option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type = None, parser_context = None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -0,0 +1,159 @@
+"""
+Term report cards for many students at once.
+
+A card combines, per subject over a term, a student's grades (average and
+credit-weighted GPA, as in /api/grades/summary), attendance (present percentage,
+as in /api/attendance/summary) and the subject's assignment completion (assignments
+are per subject, so every student of a subject shares that figure). Where no
+sessions were held, the card's present percentage is None, not the summary's 0.0:
+a student with no marks has not attended 0% of them.
+
+Instead of one set of queries per student, `compute` runs six queries for the whole
+term: student enrollments, grades and attendance grouped by (student, subject) in
+the database, assignment counts per subject, subject names and usernames. The
+grouped rows are folded into array-backed columns indexed by (student, subject)
+pair and every card is built in one pass over those columns, so only one row per
+pair leaves the database, not one per grade or attendance mark.
+"""
+import csv
+import io
+from array import array
+from datetime import datetime, time as dtime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Assignment, Attendance, Enrollment, Grade, Subject
+
+User = get_user_model()
+
+CHUNK_SIZE = 10000
+CSV_COLUMNS = ["subject", "grades", "avg", "gpa", "sessions", "present_percent", "assignments", "assignments_done", "completion_percent"]
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, dtime.min))
+
+
+def _pct(part, whole):
+    return round(part / whole * 100, 2) if whole else None
+
+
+class _Pairs:
+    """Dense per-(user, subject) accumulators; a pair's index is its position in every column."""
+
+    def __init__(self):
+        self.index = {}
+        self.users, self.subjects = array("q"), array("q")
+        self.grades, self.present, self.sessions = array("q"), array("q"), array("q")
+        self.value_sum, self.weighted_sum, self.credit_sum = array("d"), array("d"), array("d")
+
+    def key(self, user_id, subject_id):
+        k = self.index.get((user_id, subject_id))
+        if k is None:
+            k = self.index[(user_id, subject_id)] = len(self.users)
+            self.users.append(user_id)
+            self.subjects.append(subject_id)
+            for column in (self.grades, self.present, self.sessions):
+                column.append(0)
+            for column in (self.value_sum, self.weighted_sum, self.credit_sum):
+                column.append(0.0)
+        return k
+
+
+def compute(start, end, users = None):
+    """Report cards (dicts, ordered by user id) for [start, end]; `users` limits them to those ids."""
+    pairs = _Pairs()
+    key = pairs.key
+
+    enrollments = Enrollment.objects.filter(role = Enrollment.STUDENT)
+    grades = Grade.objects.filter(graded_at__gte = _day_start(start), graded_at__lt = _day_start(end + timedelta(days = 1)))
+    attendance = Attendance.objects.filter(date__gte = start, date__lte = end)
+    if users is not None:
+        enrollments, grades, attendance = (qs.filter(user_id__in = users) for qs in (enrollments, grades, attendance))
+
+    for user_id, subject_id in enrollments.values_list("user_id", "subject_id").iterator(chunk_size = CHUNK_SIZE):
+        key(user_id, subject_id)
+
+    graded = grades.values("user_id", "subject_id").annotate(
+        n = Count("id"), total = Sum("value"),
+        weighted = Sum(F("value") * F("credits"), filter = Q(credits__isnull = False)), credit_sum = Sum("credits"),
+    ).values_list("user_id", "subject_id", "n", "total", "weighted", "credit_sum").order_by()
+    for user_id, subject_id, n, total, weighted, credits in graded.iterator(chunk_size = CHUNK_SIZE):
+        k = key(user_id, subject_id)
+        pairs.grades[k], pairs.value_sum[k] = n, total
+        pairs.weighted_sum[k], pairs.credit_sum[k] = weighted or 0.0, credits or 0.0
+
+    attended = attendance.values("user_id", "subject_id").annotate(
+        n = Count("id"), present = Count("id", filter = Q(status = Attendance.PRESENT)),
+    ).values_list("user_id", "subject_id", "n", "present").order_by()
+    for user_id, subject_id, n, present in attended.iterator(chunk_size = CHUNK_SIZE):
+        k = key(user_id, subject_id)
+        pairs.sessions[k], pairs.present[k] = n, present
+
+    assignments = {
+        r["subject_id"]: (r["total"], r["done"])
+        for r in Assignment.objects.filter(due_at__gte = _day_start(start), due_at__lt = _day_start(end + timedelta(days = 1)))
+        .values("subject_id").annotate(total = Count("id"), done = Count("id", filter = Q(status = Assignment.DONE)))
+    }
+    subjects = dict(Subject.objects.values_list("pk", "name"))
+    people = User.objects.all() if users is None else User.objects.filter(pk__in = users)
+    usernames = dict(people.values_list("pk", "username").iterator(chunk_size = CHUNK_SIZE))
+
+    by_user = {}
+    for k in sorted(range(len(pairs.users)), key = lambda k: (pairs.users[k], subjects[pairs.subjects[k]], pairs.subjects[k])):
+        by_user.setdefault(pairs.users[k], []).append(k)
+
+    count, value_sum, weighted_sum, credit_sum = pairs.grades, pairs.value_sum, pairs.weighted_sum, pairs.credit_sum
+    sessions, present = pairs.sessions, pairs.present
+    cards = []
+    for user_id, keys in sorted(by_user.items()):
+        rows = []
+        n = total = weighted = credits = attended = held = 0
+        for k in keys:
+            a_total, a_done = assignments.get(pairs.subjects[k], (0, 0))
+            rows.append({
+                "subject": subjects[pairs.subjects[k]],
+                "grades": count[k],
+                "avg": round(value_sum[k] / count[k], 2) if count[k] else None,
+                "gpa": round(weighted_sum[k] / credit_sum[k], 2) if credit_sum[k] else None,
+                "sessions": sessions[k],
+                "present_percent": _pct(present[k], sessions[k]),
+                "assignments": a_total,
+                "assignments_done": a_done,
+                "completion_percent": _pct(a_done, a_total),
+            })
+            n, total = n + count[k], total + value_sum[k]
+            weighted, credits = weighted + weighted_sum[k], credits + credit_sum[k]
+            attended, held = attended + present[k], held + sessions[k]
+        cards.append({
+            "user": user_id,
+            "username": usernames.get(user_id, ""),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "avg": round(total / n, 2) if n else None,
+            "gpa": round(weighted / credits, 2) if credits else None,
+            "present_percent": _pct(attended, held),
+            "by_subject": rows,
+        })
+    return cards
+
+
+def empty_card(user_id, username, start, end):
+    return {
+        "user": user_id, "username": username, "start": start.isoformat(), "end": end.isoformat(),
+        "avg": None, "gpa": None, "present_percent": None, "by_subject": [],
+    }
+
+
+def to_csv(card):
+    """One CSV per card: a row per subject, then an overall row."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for row in card["by_subject"]:
+        writer.writerow(["" if row[c] is None else row[c] for c in CSV_COLUMNS])
+    overall = {"subject": "ALL", "avg": card["avg"], "gpa": card["gpa"], "present_percent": card["present_percent"]}
+    writer.writerow(["" if overall.get(c) is None else overall[c] for c in CSV_COLUMNS])
+    return out.getvalue()
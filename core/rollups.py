@@ -0,0 +1,275 @@
+"""
+Incrementally maintained grade / attendance rollups.
+
+Every Grade or Attendance insert adds its +1 delta to the matching GradeRollup /
+AttendanceRollup row inside one transaction, so summary endpoints can read
+O(subjects) rollup rows instead of O(history) raw rows. Updates and deletes instead
+recompute the keys they touch from the raw rows: a handful of rows per key, and
+exact, where subtracting deltas would let the float sums drift and would hit the
+counters' CHECK (>= 0) constraint on a rollup that had already drifted.
+
+Bulk writes (bulk_create, queryset.update) skip model signals; callers that use
+them must call refresh_grade_rollups / refresh_attendance_rollups for the keys
+they touched, or apply_grade_inserts / apply_attendance_changes when the deltas
+are known. `manage.py rebuild_rollups` recomputes everything from scratch.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q, F, Sum, Count
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Grade, Attendance, GradeRollup, AttendanceRollup, Subject
+
+STATUS_FIELDS = {s: s.lower() for s, _ in Attendance.STATUS_CHOICES}
+
+
+# --- deltas -----------------------------------------------------------------
+
+def _grade_added(user_id, subject_id, value, credits):
+    key = {"user_id": user_id, "subject_id": subject_id}
+    GradeRollup.objects.get_or_create(**key)
+    GradeRollup.objects.filter(**key).update(
+        count = F("count") + 1,
+        value_sum = F("value_sum") + value,
+        weighted_sum = F("weighted_sum") + (value * credits if credits is not None else 0),
+        credit_sum = F("credit_sum") + (credits or 0),
+    )
+
+
+def _attendance_added(user_id, subject_id, date, status):
+    field = STATUS_FIELDS[status]
+    key = {"user_id": user_id, "subject_id": subject_id, "month": date.replace(day = 1)}
+    AttendanceRollup.objects.get_or_create(**key)
+    AttendanceRollup.objects.filter(**key).update(**{field: F(field) + 1})
+
+
+def _refresh_attendance_keys(keys):
+    """Recompute the rollups of (user_id, subject_id, any date in the month) keys."""
+    by_month = {}
+    for user_id, subject_id, date in keys:
+        by_month.setdefault(date.replace(day = 1), set()).add((user_id, subject_id))
+    for month, pairs in by_month.items():
+        refresh_attendance_rollups(pairs, month = month)
+
+
+# --- signal handlers ----------------------------------------------------------
+
+@receiver(pre_save, sender = Grade)
+@receiver(pre_save, sender = Attendance)
+def _remember_previous(sender, instance, raw = False, **kwargs):
+    # only updates pay for the lookup: the keys the row leaves are recomputed after the save
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = sender.objects.filter(pk = instance.pk).first()
+
+
+@receiver(post_save, sender = Grade)
+def _grade_saved(sender, instance, raw = False, **kwargs):
+    if raw:
+        return
+    prev = getattr(instance, "_rollup_previous", None)
+    if prev is None:
+        with transaction.atomic():
+            _grade_added(instance.user_id, instance.subject_id, instance.value, instance.credits)
+    else:
+        refresh_grade_rollups({(prev.user_id, prev.subject_id), (instance.user_id, instance.subject_id)})
+
+
+@receiver(post_delete, sender = Grade)
+def _grade_deleted(sender, instance, **kwargs):
+    refresh_grade_rollups([(instance.user_id, instance.subject_id)])
+
+
+@receiver(post_save, sender = Attendance)
+def _attendance_saved(sender, instance, raw = False, **kwargs):
+    if raw:
+        return
+    prev = getattr(instance, "_rollup_previous", None)
+    if prev is None:
+        with transaction.atomic():
+            _attendance_added(instance.user_id, instance.subject_id, instance.date, instance.status)
+    else:
+        _refresh_attendance_keys({(prev.user_id, prev.subject_id, prev.date), (instance.user_id, instance.subject_id, instance.date)})
+
+
+@receiver(post_delete, sender = Attendance)
+def _attendance_deleted(sender, instance, **kwargs):
+    _refresh_attendance_keys([(instance.user_id, instance.subject_id, instance.date)])
+
+
+def apply_grade_inserts(grades):
+    """
+    Fold freshly bulk-inserted Grade objects into their rollups: one locking read of the
+    affected rows, in-memory sums, then one bulk upsert.
+    """
+    sums = {}
+    for g in grades:
+        s = sums.setdefault((g.user_id, g.subject_id), [0, 0.0, 0.0, 0.0])
+        s[0] += 1
+        s[1] += g.value
+        if g.credits is not None:
+            s[2] += g.value * g.credits
+            s[3] += g.credits
+    if not sums:
+        return
+
+    fields = ["count", "value_sum", "weighted_sum", "credit_sum"]
+    conflict = {"unique_fields": ["user", "subject"]} if connection.features.supports_update_conflicts_with_target else {}
+    with transaction.atomic():
+        current = {
+            (r.user_id, r.subject_id): r
+            for r in GradeRollup.objects.select_for_update().filter(_pairs_q(sums))
+        }
+        rows = []
+        for (user_id, subject_id), delta in sums.items():
+            r = current.get((user_id, subject_id)) or GradeRollup(user_id = user_id, subject_id = subject_id)
+            for f, d in zip(fields, delta):
+                setattr(r, f, getattr(r, f) + d)
+            rows.append(r)
+        GradeRollup.objects.bulk_create(rows, update_conflicts = True, update_fields = fields, **conflict)
+
+
+def apply_attendance_changes(changes, chunk_size = 900):
+    """
+    Apply a batch of attendance writes that bypassed signals (e.g. bulk_create upserts).
+
+    `changes` holds (user_id, subject_id, date, old_status or None, new_status). Missing
+    rollup rows are inserted with their counts in one bulk INSERT; users with the same
+    net delta on existing rows share one UPDATE ... SET f = f + n, so a whole class
+    costs a handful of statements. Rows a decrement would take below zero have
+    drifted; they are left alone by the UPDATE and recomputed from the raw rows.
+    """
+    fields = list(STATUS_FIELDS.values())
+    deltas = {}
+    for user_id, subject_id, date, old, new in changes:
+        if old == new:
+            continue
+        d = deltas.setdefault((subject_id, date.replace(day = 1)), {}).setdefault(user_id, dict.fromkeys(fields, 0))
+        if old is not None:
+            d[STATUS_FIELDS[old]] -= 1
+        d[STATUS_FIELDS[new]] += 1
+
+    with transaction.atomic():
+        for (subject_id, month), per_user in deltas.items():
+            key = {"subject_id": subject_id, "month": month}
+            have = set(AttendanceRollup.objects.filter(**key).values_list("user_id", flat = True))
+            # a missing row can only gain marks; a negative delta means it had drifted
+            new_rows = [
+                AttendanceRollup(user_id = uid, **key, **{f: max(n, 0) for f, n in d.items()})
+                for uid, d in per_user.items() if uid not in have
+            ]
+            try:
+                with transaction.atomic():
+                    AttendanceRollup.objects.bulk_create(new_rows)
+            except IntegrityError:
+                # a concurrent write created some of them: start every row at zero and add the deltas
+                AttendanceRollup.objects.bulk_create([AttendanceRollup(user_id = r.user_id, **key) for r in new_rows], ignore_conflicts = True)
+                have.update(r.user_id for r in new_rows)
+
+            by_delta = {}
+            for user_id, d in per_user.items():
+                if user_id in have:
+                    by_delta.setdefault(tuple(d[f] for f in fields), []).append(user_id)
+            drifted = []
+            for delta, user_ids in by_delta.items():
+                updates = {f: F(f) + n for f, n in zip(fields, delta) if n}
+                if not updates:
+                    continue
+                enough = {f"{f}__gte": -n for f, n in zip(fields, delta) if n < 0}
+                for i in range(0, len(user_ids), chunk_size):
+                    chunk = user_ids[i:i + chunk_size]
+                    if AttendanceRollup.objects.filter(user_id__in = chunk, **key, **enough).update(**updates) < len(chunk):
+                        drifted.extend(chunk)
+            if drifted:
+                # recomputing rows that did get their update is harmless: the raw rows are already written
+                refresh_attendance_rollups([(uid, subject_id) for uid in drifted], month = month)
+
+
+# --- full / partial recomputation --------------------------------------------
+
+def compute_grade_rollups(grades = None):
+    """Fresh GradeRollup instances (unsaved) computed from raw Grade rows."""
+    grades = Grade.objects.all() if grades is None else grades
+    rows = (
+        grades.order_by()
+        .values("user_id", "subject_id")
+        .annotate(
+            n = Count("id"),
+            total = Sum("value"),
+            weighted = Sum(F("value") * F("credits"), filter = Q(credits__isnull = False)),
+            credits = Sum("credits"),
+        )
+    )
+    return [
+        GradeRollup(
+            user_id = r["user_id"], subject_id = r["subject_id"], count = r["n"],
+            value_sum = r["total"], weighted_sum = r["weighted"] or 0, credit_sum = r["credits"] or 0,
+        )
+        for r in rows
+    ]
+
+
+def compute_attendance_rollups(attendance = None):
+    """Fresh AttendanceRollup instances (unsaved) computed from raw Attendance rows."""
+    attendance = Attendance.objects.all() if attendance is None else attendance
+    rows = (
+        attendance.order_by()
+        .annotate(period = TruncMonth("date"))
+        .values("user_id", "subject_id", "period")
+        .annotate(**{f: Count("id", filter = Q(status = s)) for s, f in STATUS_FIELDS.items()})
+    )
+    return [
+        AttendanceRollup(
+            user_id = r["user_id"], subject_id = r["subject_id"], month = r["period"],
+            **{f: r[f] for f in STATUS_FIELDS.values()},
+        )
+        for r in rows
+    ]
+
+
+def _pairs_q(pairs):
+    # one OR branch per subject keeps the expression shallow for large batches
+    by_subject = {}
+    for user_id, subject_id in pairs:
+        by_subject.setdefault(subject_id, set()).add(user_id)
+    q = Q(pk__in = [])
+    for subject_id, user_ids in by_subject.items():
+        q |= Q(subject_id = subject_id, user_id__in = user_ids)
+    return q
+
+
+@transaction.atomic
+def refresh_grade_rollups(pairs):
+    """Recompute the rollups for the given (user_id, subject_id) pairs after a bulk write."""
+    q = _pairs_q(pairs)
+    GradeRollup.objects.filter(q).delete()
+    GradeRollup.objects.bulk_create(compute_grade_rollups(Grade.objects.filter(q)))
+
+
+@transaction.atomic
+def refresh_attendance_rollups(pairs, month = None):
+    """Recompute the rollups for the given (user_id, subject_id) pairs after a bulk write, optionally for one month only."""
+    q = _pairs_q(pairs)
+    stored, attendance = AttendanceRollup.objects.filter(q), Attendance.objects.filter(q)
+    if month is not None:
+        stored = stored.filter(month = month)
+        attendance = attendance.filter(date__gte = month, date__lt = (month + timedelta(days = 31)).replace(day = 1))
+    stored.delete()
+    AttendanceRollup.objects.bulk_create(compute_attendance_rollups(attendance))
+
+
+def replace_rollups(grade_rollups, attendance_rollups):
+    """Swap every stored rollup row for freshly computed ones, in one transaction."""
+    # imported here so its Grade receivers connect after the ones above (see CoreConfig.ready)
+    from . import class_analytics
+
+    with transaction.atomic():
+        GradeRollup.objects.all().delete()
+        GradeRollup.objects.bulk_create(grade_rollups, batch_size = 1000)
+        AttendanceRollup.objects.all().delete()
+        AttendanceRollup.objects.bulk_create(attendance_rollups, batch_size = 1000)
+        class_analytics.evict_subjects(Subject.objects.values_list("pk", flat = True))
@@ -0,0 +1,216 @@
+"""
+Inverted-index search for assignments and announcements.
+
+SearchFilter compiles `?search=` to `LIKE '%term%'` over every searched column
+(joined subject name included), a full scan that grows with the content. Instead,
+each indexed document is split into lowercase word tokens stored in SearchToken as
+(kind, token, doc id, field, position) rows; saves and deletes keep them in sync
+through signals and `manage.py rebuild_search_index` rebuilds them from scratch.
+
+A query is a grouped read of the (kind, token) index. Every term is matched as a
+token prefix (terms shorter than MIN_PREFIX only as whole tokens), a document has
+to match all terms, and documents are ranked by field-weighted hits, with a bonus
+for whole-token matches and earlier positions breaking ties. Prefixes are turned
+into a `token >= 'abc' AND token < 'abd'` range rather than LIKE, so SQLite and
+MySQL both read them off the index. The match runs as a subquery of the view's own
+queryset (`pk IN (SELECT doc_id ...)`), so visibility filters apply in the same
+statement, before pagination, and the index holds no per-user data. A user who
+can see only a few documents has just their tokens read (see `search`).
+
+Bulk writes (bulk_create, queryset.update) skip the signals; call `index_documents`
+for the rows they touched.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Max, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import Announcement, Assignment, SearchToken, Subject
+
+# kind -> (model, {field: rank weight}); the subject name is indexed for both
+INDEXES = {
+    "assignment": (Assignment, {"title": 3, "description": 1}),
+    "announcement": (Announcement, {"title": 3, "body": 1}),
+}
+SUBJECT_WEIGHT = 2
+EXACT_BONUS = 1
+MIN_PREFIX = 3        # a one- or two-letter prefix would read a large slice of the index
+MAX_TERMS = 8
+VISIBLE_PROBE = 1000  # at most this many visible documents are matched by id
+MAX_TOKEN_LENGTH = SearchToken._meta.get_field("token").max_length
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return [t[:MAX_TOKEN_LENGTH] for t in _WORD.findall((text or "").lower())]
+
+
+def kind_for(model):
+    for kind, (indexed, _) in INDEXES.items():
+        if issubclass(model, indexed):
+            return kind
+    raise LookupError(f"{model.__name__} is not search-indexed.")
+
+
+# --- indexing -----------------------------------------------------------------
+
+def _tokens(kind, doc_id, field, text):
+    return [
+        SearchToken(kind = kind, doc_id = doc_id, field = field, token = token, position = position)
+        for position, token in enumerate(tokenize(text))
+    ]
+
+
+def document_tokens(doc):
+    kind = kind_for(type(doc))
+    rows = []
+    for field in INDEXES[kind][1]:
+        rows += _tokens(kind, doc.pk, field, getattr(doc, field))
+    if doc.subject_id is not None:
+        rows += _tokens(kind, doc.pk, "subject", doc.subject.name)
+    return rows
+
+
+def index_documents(docs):
+    """(Re)index saved Assignment / Announcement objects, e.g. after a bulk write."""
+    docs = list(docs)
+    if not docs:
+        return
+    with transaction.atomic():
+        for kind in {kind_for(type(d)) for d in docs}:
+            SearchToken.objects.filter(kind = kind, doc_id__in = [d.pk for d in docs if kind_for(type(d)) == kind]).delete()
+        SearchToken.objects.bulk_create([row for d in docs for row in document_tokens(d)], batch_size = 1000)
+
+
+def _reindex_subject_name(subject):
+    with transaction.atomic():
+        for kind, (model, _) in INDEXES.items():
+            doc_ids = list(model.objects.filter(subject = subject).values_list("pk", flat = True))
+            SearchToken.objects.filter(kind = kind, field = "subject", doc_id__in = doc_ids).delete()
+            rows = [row for doc_id in doc_ids for row in _tokens(kind, doc_id, "subject", subject.name)]
+            SearchToken.objects.bulk_create(rows, batch_size = 1000)
+
+
+@receiver(post_save, sender = Assignment)
+@receiver(post_save, sender = Announcement)
+def _document_saved(sender, instance, raw = False, update_fields = None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & {*INDEXES[kind_for(sender)][1], "subject"}:
+        return  # e.g. a status-only save
+    index_documents([instance])
+
+
+@receiver(post_delete, sender = Assignment)
+@receiver(post_delete, sender = Announcement)
+def _document_deleted(sender, instance, **kwargs):
+    SearchToken.objects.filter(kind = kind_for(sender), doc_id = instance.pk).delete()
+
+
+@receiver(pre_save, sender = Subject)
+def _remember_subject_name(sender, instance, raw = False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._search_previous_name = Subject.objects.filter(pk = instance.pk).values_list("name", flat = True).first()
+
+
+@receiver(post_save, sender = Subject)
+def _subject_saved(sender, instance, created = False, raw = False, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, "_search_previous_name", None) != instance.name:
+        _reindex_subject_name(instance)
+
+
+# --- lookup -------------------------------------------------------------------
+
+def _term_q(term):
+    if len(term) < MIN_PREFIX:
+        return Q(token = term)
+    # [term, term with its last character bumped) == every token starting with term
+    return Q(token__gte = term, token__lt = term[:-1] + chr(ord(term[-1]) + 1))
+
+
+def matches(kind, text, doc_ids = None):
+    """
+    One row per `kind` document matching every term of `text`: (doc_id, score, first),
+    or None when `text` has no terms. Use it as a subquery; it is not limited.
+    `doc_ids` restricts the match to those documents.
+    """
+    terms = list(dict.fromkeys(tokenize(text)))[:MAX_TERMS]
+    if not terms:
+        return None
+    term_qs = [_term_q(t) for t in terms]
+    weights = [When(field = f, then = Value(w)) for f, w in INDEXES[kind][1].items()]
+    matched = {f"m{i}": Max(Case(When(q, then = Value(1)), default = Value(0))) for i, q in enumerate(term_qs)}
+
+    tokens = SearchToken.objects.filter(kind = kind).filter(reduce(or_, term_qs))
+    if doc_ids is not None:
+        tokens = tokens.filter(doc_id__in = doc_ids)
+    return (
+        tokens.values("doc_id")
+        .annotate(
+            **matched,
+            score = Sum(Case(*weights, default = Value(SUBJECT_WEIGHT)))
+                + Sum(Case(When(token__in = terms, then = Value(EXACT_BONUS)), default = Value(0))),
+            first = Min("position"),
+        )
+        .filter(**{name: 1 for name in matched})
+        .order_by()
+    )
+
+
+def visible_ids(queryset):
+    """The ids of `queryset` when it holds at most VISIBLE_PROBE documents, else None."""
+    ids = list(queryset.order_by().values_list("pk", flat = True)[:VISIBLE_PROBE + 1])
+    return ids if len(ids) <= VISIBLE_PROBE else None
+
+
+def search(queryset, text, rank = True, visible = False):
+    """
+    `queryset` narrowed to the documents matching `text`; with `rank`, ordered best
+    match first (by score, then earliest position, then newest id).
+
+    When `queryset` holds at most VISIBLE_PROBE documents (one cheap, limited id read
+    tells), only their tokens are read, so a student's search costs the same however
+    large the corpus is. Otherwise the terms are matched corpus-wide, which is then
+    proportional to the matches the user can see anyway. Pass `visible` when
+    `visible_ids(queryset)` is already known.
+    """
+    if not tokenize(text):
+        return queryset
+    if visible is False:
+        visible = visible_ids(queryset)
+    found = matches(kind_for(queryset.model), text, visible)
+    queryset = queryset.filter(pk__in = found.values("doc_id"))
+    if not rank:
+        return queryset
+    mine = found.filter(doc_id = OuterRef("pk"))
+    return queryset.annotate(
+        search_score = Subquery(mine.values("score")[:1]),
+        search_first = Subquery(mine.values("first")[:1]),
+    ).order_by("-search_score", "search_first", "-pk")
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    `?search=` through the inverted index. Results are ranked by relevance unless
+    `?ordering=` is given; list it after OrderingFilter so the ranking wins otherwise.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "")
+        if not tokenize(text):
+            return queryset
+        # the conditional-request validators and the page filter the same queryset: probe it once
+        probes = request.__dict__.setdefault("_search_visible", {})
+        if queryset.model not in probes:
+            probes[queryset.model] = visible_ids(queryset)
+        return search(queryset, text, rank = not request.query_params.get(api_settings.ORDERING_PARAM), visible = probes[queryset.model])
@@ -2,7 +2,8 @@ from importlib.util import source_hash
 from wsgiref.validate import validator
 
 from rest_framework import serializers
-from .models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement
+from .models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement, Job
+from . import jobs
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
@@ -37,12 +38,41 @@ class AttendanceSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = ["id", "user", "user_name", "subject", "subject_name", "date", "status"]
 
+class RollCallEntrySerializer(serializers.Serializer):
+    user = serializers.IntegerField(min_value = 1)
+    status = serializers.ChoiceField(choices = Attendance.STATUS_CHOICES)
+
+class RollCallSerializer(serializers.Serializer):
+    MAX_RECORDS = 5000
+
+    subject = serializers.PrimaryKeyRelatedField(queryset = Subject.objects.all())
+    date = serializers.DateField()
+    records = RollCallEntrySerializer(many = True, allow_empty = False, max_length = MAX_RECORDS)
+
+class RollCallResultSerializer(serializers.Serializer):
+    inserted = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    rejected = serializers.IntegerField()
+    rejected_users = serializers.ListField(child = serializers.IntegerField())
+
+class GradeImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    dry_run = serializers.BooleanField(default = False)
+
+class GradeImportErrorSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    error = serializers.CharField()
+
+class GradeImportResultSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    errors = GradeImportErrorSerializer(many = True)
+
 class EventSerializer(serializers.ModelSerializer):
     owner_name = serializers.SerializerMethodField()
     subject_name = serializers.SerializerMethodField()
     class Meta:
         model = Event
-        fields = ["id", "owner", "owner_name", "subject", "subject_name", "title", "location", "starts_at", "ends_at", "created_at"]
+        fields = ["id", "owner", "owner_name", "subject", "subject_name", "title", "location", "starts_at", "ends_at", "recurrence", "exdates", "created_at"]
     @extend_schema_field(OpenApiTypes.STR)
     def get_owner_name(self,obj):
         return obj.owner.username if getattr(obj, "owner", None) else None
@@ -51,6 +81,106 @@ class EventSerializer(serializers.ModelSerializer):
     def get_subject_name(self, obj):
         return obj.subject.name if getattr(obj, "subject", None) else None
 
+class EventCalendarDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    count = serializers.IntegerField()
+
+class EventCalendarSerializer(serializers.Serializer):
+    month = serializers.CharField()
+    total = serializers.IntegerField()
+    days = EventCalendarDaySerializer(many = True)
+
+class FreeBusyQuerySerializer(serializers.Serializer):
+    MAX_WINDOW_DAYS = 366
+
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    users = serializers.ListField(child = serializers.IntegerField(min_value = 1), required = False, default = list, max_length = 5000)
+    locations = serializers.ListField(child = serializers.CharField(max_length = 200), required = False, default = list, max_length = 500)
+
+    def validate(self, attrs):
+        if attrs["end"] <= attrs["start"]:
+            raise serializers.ValidationError({"end": "End must be after start."})
+        if (attrs["end"] - attrs["start"]).days > self.MAX_WINDOW_DAYS:
+            raise serializers.ValidationError({"end": f"The window can span at most {self.MAX_WINDOW_DAYS} days."})
+        if not attrs["users"] and not attrs["locations"]:
+            raise serializers.ValidationError("Give at least one user or location.")
+        return attrs
+
+class BusyIntervalSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+class FreeBusyUserSerializer(serializers.Serializer):
+    user = serializers.IntegerField()
+    busy = BusyIntervalSerializer(many = True)
+
+class FreeBusyLocationSerializer(serializers.Serializer):
+    location = serializers.CharField()
+    busy = BusyIntervalSerializer(many = True)
+
+class FreeBusyResultSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    users = FreeBusyUserSerializer(many = True)
+    locations = FreeBusyLocationSerializer(many = True)
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ["id", "kind", "args", "status", "attempts", "max_attempts", "run_after", "result", "error", "created_by", "created_at", "finished_at"]
+        read_only_fields = fields
+
+class JobCreateSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices = [])
+    args = serializers.DictField(required = False, default = dict)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["kind"].choices = sorted(jobs.REGISTRY)
+
+class TermReportArgsSerializer(serializers.Serializer):
+    MAX_TERM_DAYS = 366
+
+    user = serializers.IntegerField(min_value = 1, required = False)
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs["end"] < attrs["start"]:
+            raise serializers.ValidationError({"end": "End must not be before start."})
+        if (attrs["end"] - attrs["start"]).days > self.MAX_TERM_DAYS:
+            raise serializers.ValidationError({"end": f"A term can span at most {self.MAX_TERM_DAYS} days."})
+        return attrs
+
+class ClassAnalyticsQuerySerializer(serializers.Serializer):
+    subject = serializers.PrimaryKeyRelatedField(queryset = Subject.objects.all())
+
+class HistogramBinSerializer(serializers.Serializer):
+    start = serializers.FloatField()
+    end = serializers.FloatField()
+    count = serializers.IntegerField()
+
+class StudentStandingSerializer(serializers.Serializer):
+    user = serializers.IntegerField()
+    user_name = serializers.CharField()
+    grades = serializers.IntegerField()
+    avg = serializers.FloatField()
+    rank = serializers.IntegerField()
+    percentile = serializers.FloatField()
+
+class ClassAnalyticsSerializer(serializers.Serializer):
+    subject = serializers.IntegerField()
+    students = serializers.IntegerField()
+    grades = serializers.IntegerField()
+    mean = serializers.FloatField(allow_null = True)
+    median = serializers.FloatField(allow_null = True)
+    p10 = serializers.FloatField(allow_null = True)
+    p90 = serializers.FloatField(allow_null = True)
+    stddev = serializers.FloatField(allow_null = True)
+    histogram = HistogramBinSerializer(many = True)
+    ranking = StudentStandingSerializer(many = True)
+
 class RegisterSerializer(serializers.ModelSerializer):
     username = serializers.CharField(
         max_length = 150,
@@ -118,4 +248,8 @@ class DashboardOut(serializers.Serializer):
     my_subjects = SubjectSerializer (many = True)
     upcoming_assignments = AssignmentSerializer(many = True)
     recent_grades = GradeSerializer(many = True)
-    announcements = AnnouncementSerializer(many = True)
\ No newline at end of file
+    announcements = AnnouncementSerializer(many = True)
+
+class StreamTicketSerializer(serializers.Serializer):
+    ticket = serializers.CharField()
+    expires_in = serializers.IntegerField(help_text = "Seconds the ticket stays valid; it opens one stream.")
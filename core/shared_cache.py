@@ -0,0 +1,38 @@
+"""
+The cache behind the signal-evicted caches (dashboard snapshots, enrolled subject
+ids, class analytics).
+
+Those caches stay correct only because writes evict entries from signal handlers,
+and an eviction only reaches the cache of the process that made the write. On a
+process-local backend (LocMemCache) every other worker would keep serving the
+stale entry until it times out, so there `get()` returns None and callers skip
+caching altogether, unless CACHE_SINGLE_PROCESS says a single process serves
+requests (runserver, one-worker deployments). Check `core.W001` reports the bypass.
+"""
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared(alias = "default"):
+    return not isinstance(caches[alias], LocMemCache) or settings.CACHE_SINGLE_PROCESS
+
+
+def get(alias = "default"):
+    """The cache `alias`, or None if it is process-local and caching must be skipped."""
+    return caches[alias] if is_shared(alias) else None
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    return [
+        checks.Warning(
+            f"The '{alias}' cache is process-local, so the dashboard, visibility and class analytics caches are disabled.",
+            hint = "Use a cache all workers share (CACHE_BACKEND, e.g. Redis, Memcached or the database cache), "
+                   "or set CACHE_SINGLE_PROCESS=True if only one process serves requests.",
+            id = "core.W001",
+        )
+        for alias in sorted({"default", settings.DASHBOARD_CACHE_ALIAS})
+        if not is_shared(alias)
+    ]
@@ -0,0 +1,370 @@
+"""
+Server-sent event stream of new announcements and grades (ASGI only).
+
+GET /api/stream/ keeps one response open per client and pushes
+
+    id: <announcement cursor>:<grade cursor>
+    event: announcement | grade
+    data: <the same JSON as the list endpoints' items>
+
+for each announcement created in one of the user's subjects (or a general one;
+staff get all of them) and each grade created for the user. A client reconnecting
+with `Last-Event-ID` (EventSource does this by itself) is first sent what it
+missed, newest STREAM_BACKLOG_LIMIT of each kind, then live events. Without it the
+stream starts at the current newest rows.
+
+Ids are handed out at INSERT but rows become visible at COMMIT, so on MySQL a row
+can commit after one with a higher id; a cursor at "the highest id sent" would
+skip it on resume. Each kind's cursor is therefore `floor[.id...]`: every id up to
+the floor was sent or is given up on, and the ids listed were sent above it. The
+floor only passes an id once its row is STREAM_COMMIT_GRACE_SECONDS old, by when
+any transaction holding a lower id is assumed to have committed or rolled back; a
+settled cursor is pushed on the heartbeat as an `id:`-only block, which moves
+EventSource's lastEventId without firing an event. A plain `a:g` is still accepted.
+
+Rows are published from post_save (and grade imports, see `publish_grades`)
+through core.pubsub once their transaction commits, serialized once however many
+streams receive them. Topics are picked when the stream opens, so a new
+enrollment shows up after a reconnect.
+
+The stream is a plain ASGI app mounted in front of Django (`with_event_stream`)
+rather than a Django view: a view would keep a thread and a database connection
+per open stream for the life of the response, while an idle stream here is one
+coroutine and a queue, and the database is only touched while it opens.
+
+Browsers cannot set headers on EventSource, and a JWT in the query string ends up
+in access logs, so besides `Authorization: Bearer` the stream takes `?ticket=`: a
+signed, single-purpose ticket from POST /api/stream/ticket/ that opens one stream
+within STREAM_TICKET_SECONDS. Tickets are single-use per cache (each worker's own
+when the default cache is process-local). Being outside Django's middleware, the
+stream applies the django-cors-headers allow-list (CORS_ALLOWED_ORIGINS, ...) itself.
+"""
+import asyncio
+import json
+import re
+import secrets
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from asgiref.sync import sync_to_async
+from corsheaders.conf import conf as cors
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+from . import pubsub, visibility
+from .models import Announcement, Grade
+from .renderers import FastJSONRenderer
+from .serializers import AnnouncementSerializer, GradeSerializer
+
+STREAM_PATH = "/api/stream/"
+TICKET_SALT = "core.stream.ticket"
+KINDS = ("announcement", "grade")
+MAX_PENDING = 50  # unsettled ids kept in a cursor per kind; past that the floor moves up
+
+
+def _render(serializer_class, instance):
+    return FastJSONRenderer().render(serializer_class(instance).data).decode()
+
+
+# --- publishing ---------------------------------------------------------------
+
+def _announcement_topics(subject_id):
+    return ["announcements:all", "announcements:general" if subject_id is None else f"announcements:subject:{subject_id}"]
+
+
+@receiver(post_save, sender = Announcement)
+def _announcement_created(sender, instance, created = False, raw = False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: _publish("announcement", instance, AnnouncementSerializer, _announcement_topics(instance.subject_id)))
+
+
+@receiver(post_save, sender = Grade)
+def _grade_created(sender, instance, created = False, raw = False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: _publish("grade", instance, GradeSerializer, [f"grades:user:{instance.user_id}"]))
+
+
+def _publish(kind, instance, serializer_class, topics):
+    broker = pubsub.get_broker()
+    message = (kind, instance.pk, _render(serializer_class, instance))
+    for topic in topics:
+        broker.publish(topic, message)
+
+
+def publish_grades(grades):
+    """Publish bulk-created grades (bulk_create skips post_save) once the transaction commits."""
+    # MySQL's bulk_create does not return primary keys; those rows reach streams on the next resume
+    ids = [g.pk for g in grades if g.pk is not None]
+    if not ids:
+        return
+
+    def publish():
+        for g in Grade.objects.select_related("subject", "user").filter(pk__in = ids).order_by("id"):
+            _publish("grade", g, GradeSerializer, [f"grades:user:{g.user_id}"])
+
+    transaction.on_commit(publish)
+
+
+# --- the stream ---------------------------------------------------------------
+
+class Cursor:
+    """A stream's resume point; see the module docstring."""
+
+    def __init__(self, floors, pending = None):
+        self.floor = dict(zip(KINDS, floors))
+        self.pending = pending or {kind: {} for kind in KINDS}  # kind -> {id: when its row was written}
+
+    @classmethod
+    def parse(cls, value):
+        """The cursor in a Last-Event-ID, or None if there is none or it is malformed."""
+        try:
+            parts = [[int(i) for i in part.split(".")] for part in value.split(":")]
+        except (AttributeError, ValueError):
+            return None
+        if len(parts) != len(KINDS):
+            return None
+        # when the listed rows were written is not known any more: settle them from now
+        now = time.time()
+        return cls([ids[0] for ids in parts], {kind: dict.fromkeys(ids[1:], now) for kind, ids in zip(KINDS, parts)})
+
+    def sent(self):
+        return {(kind, pk) for kind, ids in self.pending.items() for pk in ids}
+
+    def add(self, kind, pk, written_at):
+        if pk > self.floor[kind]:
+            self.pending[kind][pk] = written_at
+
+    def settle(self, now = None):
+        cutoff = (time.time() if now is None else now) - settings.STREAM_COMMIT_GRACE_SECONDS
+        for kind, pending in self.pending.items():
+            floor = max([self.floor[kind], *(pk for pk, at in pending.items() if at <= cutoff)])
+            above = sorted(pk for pk in pending if pk > floor)
+            if len(above) > MAX_PENDING:
+                floor = above[-MAX_PENDING - 1]
+            self.floor[kind] = floor
+            self.pending[kind] = {pk: pending[pk] for pk in above if pk > floor}
+        return self
+
+    def __str__(self):
+        return ":".join(".".join(map(str, [self.floor[kind], *sorted(self.pending[kind])])) for kind in KINDS)
+
+
+def _visible(user):
+    """(announcements queryset, grades queryset, topics) for `user`."""
+    announcements = Announcement.objects.select_related("subject", "created_by")
+    if user.is_staff:
+        topics = ["announcements:all"]
+    else:
+        subject_ids = visibility.enrolled_subject_ids(user)
+        topics = ["announcements:general"] + [f"announcements:subject:{s}" for s in subject_ids]
+        announcements = announcements.filter(visibility.visible_q(subject_ids))
+    topics.append(f"grades:user:{user.pk}")
+    return announcements, Grade.objects.select_related("subject", "user").filter(user = user), topics
+
+
+def issue_ticket(user):
+    """A ticket that opens one stream for `user` within STREAM_TICKET_SECONDS."""
+    return signing.dumps({"user": user.pk, "nonce": secrets.token_urlsafe(16)}, salt = TICKET_SALT)
+
+
+def _redeem(ticket):
+    try:
+        payload = signing.loads(ticket, salt = TICKET_SALT, max_age = settings.STREAM_TICKET_SECONDS)
+    except signing.BadSignature:  # expired tickets included
+        return None
+    if not cache.add(f"stream-ticket:{payload['nonce']}", True, settings.STREAM_TICKET_SECONDS + 1):
+        return None  # already used
+    return get_user_model().objects.filter(pk = payload["user"]).first()
+
+
+def _from_token(raw_token):
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _authenticate(token = None, ticket = None):
+    """(user, topics) for a bearer token or a stream ticket, or None if not valid; runs in a worker thread."""
+    close_old_connections()
+    try:
+        user = _from_token(token) if token is not None else _redeem(ticket)
+        return (user, _visible(user)[2]) if user is not None and user.is_active else None
+    finally:
+        close_old_connections()
+
+
+def _backlog(user, cursor):
+    """
+    What a stream starts with: (backlog as (kind, id, data, written at) oldest first,
+    cursor). Without a cursor, nothing and one at the current newest ids; runs in a
+    worker thread.
+    """
+    close_old_connections()
+    try:
+        announcements, grades, _ = _visible(user)
+        if cursor is None:
+            latest = announcements.order_by("-id").values_list("id", flat = True).first() or 0
+            return [], Cursor((latest, grades.order_by("-id").values_list("id", flat = True).first() or 0))
+
+        limit = settings.STREAM_BACKLOG_LIMIT
+        missed = [
+            (a.created_at, "announcement", a.pk, _render(AnnouncementSerializer, a))
+            for a in announcements.filter(id__gt = cursor.floor["announcement"]).exclude(id__in = list(cursor.pending["announcement"])).order_by("-id")[:limit]
+        ] + [
+            (g.graded_at, "grade", g.pk, _render(GradeSerializer, g))
+            for g in grades.filter(id__gt = cursor.floor["grade"]).exclude(id__in = list(cursor.pending["grade"])).order_by("-id")[:limit]
+        ]
+        missed.sort(key = lambda m: (m[0], m[2]))
+        return [(kind, pk, data, at.timestamp()) for at, kind, pk, data in missed], cursor
+    finally:
+        close_old_connections()
+
+
+def _event(kind, data, cursor):
+    return f"id: {cursor.settle()}\nevent: {kind}\ndata: {data}\n\n".encode()
+
+
+def _cors_headers(scope, headers, preflight = False):
+    """The django-cors-headers response headers for this request, as CorsMiddleware would set them."""
+    if not re.match(cors.CORS_URLS_REGEX, scope["path"]):
+        return []
+    out = [(b"vary", b"origin")]
+    origin = headers.get(b"origin", b"").decode("latin-1")
+    if not origin:
+        return out
+    try:
+        url = urlsplit(origin)
+    except ValueError:
+        return out
+    allowed = (
+        cors.CORS_ALLOW_ALL_ORIGINS
+        or (origin == "null" and origin in cors.CORS_ALLOWED_ORIGINS)
+        or any((o.scheme, o.netloc) == (url.scheme, url.netloc) for o in map(urlsplit, cors.CORS_ALLOWED_ORIGINS))
+        or any(re.match(pattern, origin) for pattern in cors.CORS_ALLOWED_ORIGIN_REGEXES)
+    )
+    if not allowed:
+        return out
+    out.append((b"access-control-allow-origin", b"*" if cors.CORS_ALLOW_ALL_ORIGINS and not cors.CORS_ALLOW_CREDENTIALS else origin.encode("latin-1")))
+    if cors.CORS_ALLOW_CREDENTIALS:
+        out.append((b"access-control-allow-credentials", b"true"))
+    if preflight:
+        out.append((b"access-control-allow-headers", ", ".join(cors.CORS_ALLOW_HEADERS).encode()))
+        out.append((b"access-control-allow-methods", b"GET, HEAD, OPTIONS"))
+        if cors.CORS_PREFLIGHT_MAX_AGE:
+            out.append((b"access-control-max-age", str(cors.CORS_PREFLIGHT_MAX_AGE).encode()))
+    return out
+
+
+async def _respond(send, status, body, headers = ()):
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json"), *headers]})
+    await send({"type": "http.response.body", "body": json.dumps(body).encode()})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def event_stream(scope, receive, send):
+    headers = dict(scope["headers"])
+    if scope["method"] == "OPTIONS" and b"access-control-request-method" in headers:
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"0"), *_cors_headers(scope, headers, preflight = True)]})
+        return await send({"type": "http.response.body", "body": b""})
+    cors_headers = _cors_headers(scope, headers)
+    if scope["method"] not in ("GET", "HEAD"):
+        return await _respond(send, 405, {"detail": f'Method "{scope["method"]}" not allowed.'}, cors_headers)
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    token = ticket = None
+    auth = headers.get(b"authorization", b"").split()
+    if len(auth) == 2 and auth[0].lower() == b"bearer":
+        token = auth[1].decode()
+    elif query.get("ticket"):
+        ticket = query["ticket"][0]
+    else:
+        return await _respond(send, 401, {"detail": "Authentication credentials were not provided."}, cors_headers)
+    last = headers.get(b"last-event-id", b"").decode() or query.get("last_event_id", [""])[0]
+
+    # thread_sensitive = False: opens share the default executor's few threads (and their
+    # connections) instead of queueing behind one another
+    authenticated = await sync_to_async(_authenticate, thread_sensitive = False)(token, ticket)
+    if authenticated is None:
+        detail = "Given token not valid for any token type" if token is not None else "Stream ticket is invalid, expired or already used."
+        return await _respond(send, 401, {"detail": detail}, cors_headers)
+    user, topics = authenticated
+
+    # subscribe before reading the backlog so nothing committed in between is lost;
+    # rows that land in both are sent once
+    sub = pubsub.get_broker().subscribe(topics)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        backlog, cursor = await sync_to_async(_backlog, thread_sensitive = False)(user, Cursor.parse(last))
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),  # nginx: do not buffer the stream
+            *cors_headers,
+        ]})
+        if scope["method"] == "HEAD":
+            return await send({"type": "http.response.body", "body": b""})
+
+        chunk = b"retry: 3000\n\n"
+        sent = cursor.sent()
+        for kind, pk, data, written_at in backlog:
+            cursor.add(kind, pk, written_at)
+            sent.add((kind, pk))
+            chunk += _event(kind, data, cursor)
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        last = str(cursor)
+
+        while True:
+            message = asyncio.ensure_future(sub.get())
+            done, _ = await asyncio.wait({message, disconnected}, timeout = settings.STREAM_HEARTBEAT_SECONDS, return_when = asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                message.cancel()
+                return
+            if message not in done:
+                message.cancel()
+                settled = str(cursor.settle())
+                # an id-only block moves the client's Last-Event-ID without an event
+                body = b": keepalive\n\n" if settled == last else f"id: {settled}\n\n".encode()
+                last = settled
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+                continue
+            item = message.result()
+            if item is pubsub.OVERFLOW:
+                break  # too far behind; the client reconnects and resumes from its last id
+            kind, pk, data = item
+            if (kind, pk) in sent:
+                continue
+            sent.add((kind, pk))
+            cursor.add(kind, pk, time.time())
+            event = _event(kind, data, cursor)
+            last = str(cursor)
+            await send({"type": "http.response.body", "body": event, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    except OSError:
+        pass  # the client went away mid-send
+    finally:
+        sub.close()
+        disconnected.cancel()
+
+
+def with_event_stream(application, path = STREAM_PATH):
+    """Wrap the Django ASGI application so `path` is served by `event_stream`."""
+
+    async def app(scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == path:
+            return await event_stream(scope, receive, send)
+        return await application(scope, receive, send)
+
+    return app
@@ -0,0 +1,93 @@
+import json
+from datetime import date, timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client, TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Subject, Assignment, Grade, Attendance, Enrollment, Announcement
+
+User = get_user_model()
+
+LISTS = ["assignments", "grades", "attendance", "announcements"]
+CONDITIONAL = ["assignments", "announcements"]
+
+
+class AsyncViewTests(TestCase):
+    """The /api/async/ endpoints, served through ASGI, answer like their sync counterparts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("student")
+        math, art, hidden = (Subject.objects.create(code = code, name = name) for code, name in (("MA", "Math"), ("AR", "Art"), ("HI", "Hidden")))
+        for subject in (math, art):
+            Enrollment.objects.create(user = cls.student, subject = subject)
+        now = timezone.now()
+        for i in range(25):
+            subject = (math, art)[i % 2]
+            Assignment.objects.create(subject = subject, title = f"Homework {i}", due_at = now + timedelta(days = i - 5), status = Assignment.DONE if i % 3 else Assignment.PENDING)
+            Grade.objects.create(user = cls.student, subject = subject, value = 50 + i, credits = i % 3 or None)
+            Attendance.objects.create(user = cls.student, subject = subject, date = date.today() - timedelta(days = i), status = Attendance.PRESENT if i % 4 else Attendance.LATE)
+            Announcement.objects.create(subject = subject if i % 5 else None, title = f"Notice {i}", body = "-")
+        Assignment.objects.create(subject = hidden, title = "Not mine", due_at = now)
+        Announcement.objects.create(subject = hidden, title = "Not mine", body = "-")
+
+    def setUp(self):
+        self.auth = {"authorization": f"Bearer {AccessToken.for_user(self.student)}"}
+
+    def both(self, path, params = None, **headers):
+        """(sync response, async response) for GET /api/<path> and /api/async/<path>."""
+        headers = {**self.auth, **headers}
+        sync = Client().get(f"/api/{path}", params, headers = headers)
+        asgi = async_to_sync(AsyncClient().get)(f"/api/async/{path}", params, headers = headers)
+        return sync, asgi
+
+    def assertSamePayload(self, sync, asgi):
+        self.assertEqual(asgi.status_code, sync.status_code)
+        # the pagination links differ only in the path they point at
+        self.assertEqual(json.loads(asgi.content.decode().replace("/api/async/", "/api/")), json.loads(sync.content))
+
+    def test_list_pages_match(self):
+        for name in LISTS:
+            for params in ({}, {"page": 2}, {"ordering": "-value"} if name == "grades" else {"search": "Math"}):
+                with self.subTest(name, **params):
+                    sync, asgi = self.both(f"{name}/", params)
+                    self.assertEqual(sync.status_code, 200)
+                    self.assertGreater(len(json.loads(sync.content)["results"]), 0)
+                    self.assertSamePayload(sync, asgi)
+                    # ETags are per URL, so only their presence can match
+                    self.assertEqual(asgi.has_header("ETag"), sync.has_header("ETag"))
+
+    def test_errors_match(self):
+        for name in LISTS:
+            with self.subTest(name):
+                sync, asgi = self.both(f"{name}/", {"page": 99})
+                self.assertEqual(sync.status_code, 404)
+                self.assertSamePayload(sync, asgi)
+        self.auth = {}
+        for path in ["dashboard/", *(f"{name}/" for name in LISTS)]:
+            with self.subTest(path, authenticated = False):
+                self.assertSamePayload(*self.both(path))
+
+    def test_conditional_requests_match(self):
+        for name in CONDITIONAL:
+            with self.subTest(name):
+                sync, asgi = self.both(f"{name}/")
+                sync, asgi = (
+                    Client().get(f"/api/{name}/", headers = {**self.auth, "if-none-match": sync["ETag"]}),
+                    async_to_sync(AsyncClient().get)(f"/api/async/{name}/", headers = {**self.auth, "if-none-match": asgi["ETag"]}),
+                )
+                self.assertEqual((sync.status_code, asgi.status_code), (304, 304))
+
+    def test_keyset_pages_are_left_to_the_sync_path(self):
+        sync, asgi = self.both("grades/", {"cursor": ""})
+        self.assertNotIn("count", json.loads(sync.content))
+        self.assertSamePayload(sync, asgi)
+
+    def test_dashboard_matches(self):
+        sync, asgi = self.both("dashboard/")
+        self.assertEqual(sync.status_code, 200)
+        self.assertSamePayload(sync, asgi)
+        self.assertEqual(asgi["ETag"], sync["ETag"])   # the dashboard's ETag is per user, not per URL
@@ -0,0 +1,137 @@
+import statistics
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core import class_analytics
+from core.models import Subject, Grade, Enrollment
+
+User = get_user_model()
+
+
+@override_settings(CACHE_SINGLE_PROCESS = True)
+class ClassAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.math = Subject.objects.create(code = "MA", name = "Math")
+        cls.other = Subject.objects.create(code = "PH", name = "Physics")
+        cls.teacher = User.objects.create_user("teacher")
+        Enrollment.objects.create(user = cls.teacher, subject = cls.math, role = Enrollment.TEACHER)
+        Enrollment.objects.create(user = cls.teacher, subject = cls.other, role = Enrollment.STUDENT)
+        # averages 90, 80, 80, 70, 45
+        cls.students = [User.objects.create_user(f"student{i}") for i in range(5)]
+        for user, values in zip(cls.students, ([85, 95], [80], [70, 90], [70], [40, 50])):
+            Enrollment.objects.create(user = user, subject = cls.math)
+            for value in values:
+                Grade.objects.create(user = user, subject = cls.math, value = value)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, user, subject = None):
+        api = APIClient()
+        api.force_authenticate(user)
+        return api.get("/api/grades/analytics/", {"subject": (subject or self.math).pk})
+
+    def test_window_and_sorted_standings_agree_ties_included(self):
+        window = class_analytics._standings_window(self.math.pk)
+        ordered = class_analytics._standings_sorted(self.math.pk)
+        self.assertEqual(
+            [(user, count, round(avg, 6), rank, round(pct, 6)) for user, _, count, avg, rank, pct in window],
+            [(user, count, round(avg, 6), rank, round(pct, 6)) for user, _, count, avg, rank, pct in ordered],
+        )
+        ranking = class_analytics.compute(self.math.pk)["ranking"]
+        self.assertEqual(
+            [(r["user"], r["avg"], r["rank"], r["percentile"]) for r in ranking],
+            [
+                (self.students[0].pk, 90.0, 1, 100.0),
+                (self.students[1].pk, 80.0, 2, 50.0),
+                (self.students[2].pk, 80.0, 2, 50.0),
+                (self.students[3].pk, 70.0, 4, 25.0),
+                (self.students[4].pk, 45.0, 5, 0.0),
+            ],
+        )
+
+    def test_single_student_and_empty_class(self):
+        for standings in (class_analytics._standings_window, class_analytics._standings_sorted):
+            with self.subTest(standings.__name__):
+                self.assertEqual([s[4:] for s in standings(self.math.pk)][-1], (5, 0.0))
+                self.assertEqual(standings(self.other.pk), [])
+        Grade.objects.create(user = self.teacher, subject = self.other, value = 60)
+        self.assertEqual(class_analytics._standings_sorted(self.other.pk)[0][4:], (1, 0.0))
+        self.assertEqual(class_analytics._standings_window(self.other.pk)[0][4:], (1, 0.0))
+
+    def test_quantiles(self):
+        data = [45.0, 70.0, 80.0, 80.0, 90.0]
+        self.assertEqual(class_analytics._quantile(data, 0.5), 80.0)
+        self.assertAlmostEqual(class_analytics._quantile(data, 0.1), 55.0)
+        self.assertAlmostEqual(class_analytics._quantile(data, 0.9), 86.0)
+        deciles = statistics.quantiles(data, n = 10, method = "inclusive")
+        self.assertAlmostEqual(class_analytics._quantile(data, 0.1), deciles[0])
+        self.assertAlmostEqual(class_analytics._quantile(data, 0.9), deciles[-1])
+        self.assertEqual(class_analytics._quantile([42.0], 0.9), 42.0)
+
+        payload = class_analytics.compute(self.math.pk)
+        self.assertEqual(
+            {k: payload[k] for k in ("students", "grades", "mean", "median", "p10", "p90", "stddev")},
+            {"students": 5, "grades": 8, "mean": 73.0, "median": 80.0, "p10": 55.0, "p90": 86.0, "stddev": round(statistics.pstdev(data), 2)},
+        )
+
+    def test_histogram_edges(self):
+        self.assertEqual(class_analytics._histogram([], 10), [])
+        self.assertEqual(class_analytics._histogram([40.0, 49.99, 50.0, 70.0, 100.0], 10), [
+            {"start": 40, "end": 50, "count": 2},
+            {"start": 50, "end": 60, "count": 1},
+            {"start": 60, "end": 70, "count": 0},
+            {"start": 70, "end": 80, "count": 1},
+            {"start": 80, "end": 90, "count": 0},
+            {"start": 90, "end": 100, "count": 0},
+            {"start": 100, "end": 110, "count": 1},
+        ])
+        self.assertEqual(class_analytics._histogram([73.0], 5), [{"start": 70, "end": 75, "count": 1}])
+
+    def test_only_staff_and_the_subjects_teachers_see_analytics(self):
+        staff = User.objects.create_user("staff", is_staff = True)
+        for user, subject, status in [
+            (self.students[0], self.math, 403),
+            (self.teacher, self.other, 403),   # enrolled there as a student
+            (self.teacher, self.math, 200),
+            (staff, self.other, 200),
+        ]:
+            with self.subTest(user = user.username, subject = subject.code):
+                self.assertEqual(self.get(user, subject).status_code, status)
+
+    def test_cache_is_evicted_when_a_grade_write_commits(self):
+        self.assertEqual(self.get(self.teacher)["X-Analytics-Cache"], "miss")
+        self.assertEqual(self.get(self.teacher)["X-Analytics-Cache"], "hit")
+
+        newcomer = User.objects.create_user("newcomer")
+        with self.captureOnCommitCallbacks() as callbacks:
+            Grade.objects.create(user = newcomer, subject = self.math, value = 100)
+            # not committed yet: the cached payload is still served
+            self.assertEqual(self.get(self.teacher)["X-Analytics-Cache"], "hit")
+        for callback in callbacks:
+            callback()
+        response = self.get(self.teacher)
+        self.assertEqual((response["X-Analytics-Cache"], response.data["students"]), ("miss", 6))
+
+        grade = Grade.objects.get(user = newcomer)
+        for write in (lambda: Grade.objects.filter(pk = grade.pk).first().save(), grade.delete):
+            self.get(self.teacher)
+            with self.captureOnCommitCallbacks(execute = True):
+                write()
+            self.assertEqual(self.get(self.teacher)["X-Analytics-Cache"], "miss")
+        self.assertEqual(self.get(self.teacher).data["students"], 5)
+
+    def test_moving_a_grade_evicts_both_subjects(self):
+        staff = User.objects.create_user("staff", is_staff = True)
+        for subject in (self.math, self.other):
+            self.get(staff, subject)
+        grade = Grade.objects.filter(subject = self.math).first()
+        grade.subject = self.other
+        with self.captureOnCommitCallbacks(execute = True):
+            grade.save()
+        for subject in (self.math, self.other):
+            self.assertEqual(self.get(staff, subject)["X-Analytics-Cache"], "miss")
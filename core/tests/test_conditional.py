@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from core.models import Subject, Assignment
+
+
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        subject = Subject.objects.create(code = "S1", name = "Subject")
+        due = timezone.now() + timedelta(days = 1)
+        self.kept, self.deleted = [Assignment.objects.create(subject = subject, title = t, due_at = due) for t in ("Kept", "Deleted")]
+        self.api = APIClient()
+
+    def test_deleting_a_row_invalidates_the_list(self):
+        for url in ("/api/assignments/", "/api/async/assignments/"):
+            with self.subTest(url):
+                first = self.api.get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertNotIn("Last-Modified", first)
+                self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH = first["ETag"]).status_code, 304)
+
+        future = http_date((timezone.now() + timedelta(days = 1)).timestamp())
+        etag = self.api.get("/api/assignments/")["ETag"]
+        self.deleted.delete()
+        for url in ("/api/assignments/", "/api/async/assignments/"):
+            with self.subTest(url):
+                self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH = etag).status_code, 200)
+                response = self.api.get(url, HTTP_IF_MODIFIED_SINCE = future)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([a["title"] for a in response.data["results"]], ["Kept"])
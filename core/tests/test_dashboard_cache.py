@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import shared_cache, visibility
+from core.models import Subject, Assignment, Enrollment, Announcement
+
+User = get_user_model()
+
+
+@override_settings(CACHE_SINGLE_PROCESS = True)
+class DashboardEvictionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.old, self.new = Subject.objects.create(code = "OLD", name = "Old"), Subject.objects.create(code = "NEW", name = "New")
+        self.student = User.objects.create_user("student")
+        Enrollment.objects.create(user = self.student, subject = self.old)
+        self.api = APIClient()
+        self.api.force_authenticate(self.student)
+
+    def dashboard(self):
+        response = self.api.get("/api/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_moved_announcement_leaves_old_subjects_dashboard(self):
+        announcement = Announcement.objects.create(subject = self.old, title = "Quiz", body = "-")
+        self.assertIn("Quiz", [a["title"] for a in self.dashboard().data["announcements"]])
+        announcement.subject = self.new
+        with self.captureOnCommitCallbacks(execute = True):
+            announcement.save()
+        response = self.dashboard()
+        self.assertEqual(response["X-Dashboard-Cache"], "miss")
+        self.assertNotIn("Quiz", [a["title"] for a in response.data["announcements"]])
+
+    def test_moved_assignment_leaves_old_subjects_dashboard(self):
+        assignment = Assignment.objects.create(subject = self.old, title = "HW", due_at = timezone.now() + timedelta(days = 1))
+        self.assertIn("HW", [a["title"] for a in self.dashboard().data["upcoming_assignments"]])
+        assignment.subject = self.new
+        with self.captureOnCommitCallbacks(execute = True):
+            assignment.save()
+        self.assertNotIn("HW", [a["title"] for a in self.dashboard().data["upcoming_assignments"]])
+
+
+    def test_eviction_waits_for_commit(self):
+        self.dashboard()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Assignment.objects.create(subject = self.old, title = "HW", due_at = timezone.now() + timedelta(days = 1))
+            # until the write commits, a rebuild could only see the old rows
+            self.assertEqual(self.dashboard()["X-Dashboard-Cache"], "hit")
+        for callback in callbacks:
+            callback()
+        response = self.dashboard()
+        self.assertEqual(response["X-Dashboard-Cache"], "miss")
+        self.assertIn("HW", [a["title"] for a in response.data["upcoming_assignments"]])
+
+
+@override_settings(CACHE_SINGLE_PROCESS = False)
+class ProcessLocalCacheTests(TestCase):
+    def test_caches_are_bypassed_on_locmem(self):
+        user = User.objects.create_user("student")
+        api = APIClient()
+        api.force_authenticate(user)
+        api.get("/api/dashboard/")
+        self.assertEqual(api.get("/api/dashboard/")["X-Dashboard-Cache"], "miss")
+
+        subject = Subject.objects.create(code = "S", name = "S")
+        self.assertEqual(visibility.enrolled_subject_ids(user), ())
+        Enrollment.objects.create(user = user, subject = subject)
+        self.assertEqual(visibility.enrolled_subject_ids(user), (subject.pk,))
+
+    def test_check_warns(self):
+        self.assertEqual([w.id for w in shared_cache.check_shared_cache(None)], ["core.W001"])
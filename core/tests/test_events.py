@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Event
+from core.views import EventViewSet
+
+User = get_user_model()
+
+
+def _at(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+def _day(item):
+    return timezone.localtime(datetime.fromisoformat(item["starts_at"])).date().isoformat()
+
+
+class EventWindowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner")
+        start = _at(2025, 1, 6, 9)   # a Monday
+        Event.objects.create(owner = cls.user, title = "Weekly", starts_at = start, ends_at = start + timedelta(hours = 1), recurrence = "FREQ=WEEKLY;UNTIL=21991231")
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def get(self, **params):
+        return self.api.get(reverse("event-list"), params)
+
+    def test_window_span_is_capped(self):
+        response = self.get(**{"from": "2025-01-01", "to": "2026-01-03"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("to", response.data)
+
+    def test_open_window_is_capped(self):
+        # the series runs until 2199; one bound alone lists one window's worth of occurrences
+        for params, first, last in [
+            ({"from": "2025-01-01"}, "2025-01-06", "2025-12-29"),
+            ({"to": "2026-01-01"}, "2025-01-06", "2025-12-29"),
+        ]:
+            with self.subTest(params):
+                response = self.get(**params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["count"], 52)
+                last_page = self.get(**params, page = 3).data["results"]
+                self.assertEqual((_day(response.data["results"][0]), _day(last_page[-1])), (first, last))
+
+    def test_full_window_is_allowed(self):
+        response = self.get(**{"from": "2025-01-01", "to": (datetime(2025, 1, 1) + timedelta(days = EventViewSet.MAX_WINDOW_DAYS)).date().isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 52)
+
+
+class EventWindowFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner")
+        for title, start, hours in [
+            ("before", _at(2025, 3, 9, 22), 2),          # ends exactly at the window's start
+            ("overlaps start", _at(2025, 3, 9, 23), 2),
+            ("inside", _at(2025, 3, 12, 9), 1),
+            ("at the end", _at(2025, 3, 17), 1),           # starts exactly at the window's end
+            ("after", _at(2025, 4, 1, 9), 1),
+        ]:
+            Event.objects.create(owner = cls.user, title = title, starts_at = start, ends_at = start + timedelta(hours = hours))
+        Event.objects.create(owner = User.objects.create_user("other"), title = "someone else's", starts_at = _at(2025, 3, 12, 9), ends_at = _at(2025, 3, 12, 10))
+        Event.objects.create(owner = cls.user, title = "Daily standup", starts_at = _at(2025, 3, 3, 8), ends_at = _at(2025, 3, 3, 8, 15), recurrence = "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=6")
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def titles(self, **params):
+        response = self.api.get(reverse("event-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return [(e["title"], _day(e)) for e in response.data["results"]]
+
+    def test_window_is_half_open_and_expands_series(self):
+        self.assertEqual(self.titles(**{"from": "2025-03-10", "to": "2025-03-17"}), [
+            ("overlaps start", "2025-03-09"),
+            ("Daily standup", "2025-03-10"),
+            ("Daily standup", "2025-03-12"),
+            ("inside", "2025-03-12"),
+        ])
+
+    def test_datetime_bounds_with_offsets(self):
+        # 2025-03-12T10:30+01:00 is 09:30 UTC: inside "inside" (09:00-10:00 UTC)
+        self.assertEqual(self.titles(**{"from": "2025-03-12T10:30:00+01:00", "to": "2025-03-12T11:00:00+01:00"}), [("inside", "2025-03-12")])
+        self.assertEqual(self.titles(**{"from": "2025-03-12T11:00:00+01:00", "to": "2025-03-12T12:00:00+01:00"}), [])
+
+    def test_invalid_bounds_and_month(self):
+        for params, field in [
+            ({"from": "yesterday"}, "from"),
+            ({"from": "2025-02-30"}, "from"),
+            ({"to": "2025-13-01"}, "to"),
+            ({"from": "2025-03-10", "to": "2025-03-10T25:00:00"}, "to"),
+        ]:
+            with self.subTest(params):
+                response = self.api.get(reverse("event-list"), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), [field])
+        for month in ("2025-13", "2025/03", "March", "2025-00"):
+            with self.subTest(month = month):
+                response = self.api.get(reverse("event-calendar"), {"month": month})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("month", response.data)
+
+
+@override_settings(TIME_ZONE = "Europe/Berlin")
+class EventCalendarTests(TestCase):
+    """Days are calendar days in the current time zone, which here changes offset on 2025-03-30 and 2025-10-26."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner")
+        make = lambda title, start, end, **kw: Event.objects.create(owner = cls.user, title = title, starts_at = start, ends_at = end, **kw)
+        make("just after midnight", _at(2025, 3, 1, 0, 30), _at(2025, 3, 1, 1))            # 2025-02-28 23:30 UTC
+        make("until midnight", _at(2025, 3, 29, 22), _at(2025, 3, 30))                   # does not touch the 30th
+        make("across the month", _at(2025, 3, 31, 22), _at(2025, 4, 1, 2))
+        make("Sunday class", _at(2025, 3, 16, 9), _at(2025, 3, 16, 10), recurrence = "FREQ=WEEKLY;COUNT=4")   # 16, 23, 30 (CEST), 6 Apr
+        make("Friday lab", _at(2025, 2, 28, 23, 30), _at(2025, 3, 1, 0, 30), recurrence = "FREQ=WEEKLY;UNTIL=20250314")  # each one runs past midnight
+        make("fall back", _at(2025, 10, 26, 1, 30), _at(2025, 10, 26, 4))
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def calendar(self, month):
+        response = self.api.get(reverse("event-calendar"), {"month": month})
+        self.assertEqual(response.status_code, 200)
+        return response.data["total"], {d["date"]: d["count"] for d in response.data["days"] if d["count"]}
+
+    def test_march_across_dst_and_both_month_edges(self):
+        total, days = self.calendar("2025-03")
+        self.assertEqual(days, {
+            "2025-03-01": 2,   # just after midnight; the Friday lab's first occurrence spills into it
+            "2025-03-07": 1, "2025-03-08": 1,
+            "2025-03-14": 1, "2025-03-15": 1,
+            "2025-03-16": 1, "2025-03-23": 1, "2025-03-30": 1,
+            "2025-03-29": 1,
+            "2025-03-31": 1,
+        })
+        self.assertEqual(total, 9)   # events and occurrences touching the month, each once
+
+    def test_february_and_april_see_only_their_days(self):
+        self.assertEqual(self.calendar("2025-02"), (1, {"2025-02-28": 1}))
+        self.assertEqual(self.calendar("2025-04"), (2, {"2025-04-01": 1, "2025-04-06": 1}))
+
+    def test_days_of_the_month_with_a_25_hour_day(self):
+        total, days = self.calendar("2025-10")
+        self.assertEqual((total, days), (1, {"2025-10-26": 1}))
+        response = self.api.get(reverse("event-calendar"), {"month": "2025-10"})
+        self.assertEqual(len(response.data["days"]), 31)
+
+    def test_occurrences_keep_their_wall_clock_time_across_dst(self):
+        response = self.api.get(reverse("event-list"), {"from": "2025-03-16", "to": "2025-04-07"})
+        sundays = [timezone.localtime(datetime.fromisoformat(e["starts_at"])) for e in response.data["results"] if e["title"] == "Sunday class"]
+        self.assertEqual([(s.date().isoformat(), s.hour, s.utcoffset()) for s in sundays], [
+            ("2025-03-16", 9, timedelta(hours = 1)),
+            ("2025-03-23", 9, timedelta(hours = 1)),
+            ("2025-03-30", 9, timedelta(hours = 2)),
+            ("2025-04-06", 9, timedelta(hours = 2)),
+        ])
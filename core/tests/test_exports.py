@@ -0,0 +1,54 @@
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import Subject, Grade
+
+User = get_user_model()
+
+ROWS = 50_000
+PEAK_CEILING = 3 * 1024 * 1024  # bytes of Python heap while streaming; the NDJSON export is ~8 MB
+
+
+class StreamingExportMemoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("student")
+        subject = Subject.objects.create(code = "MA", name = "Mathematics")
+        # bulk_create skips the rollup signals, which this test does not need
+        Grade.objects.bulk_create(
+            [Grade(user = cls.user, subject = subject, value = i % 100, credits = 1 + i % 3) for i in range(ROWS)],
+            batch_size = 5000,
+        )
+
+    def export(self, **params):
+        """(lines, bytes, peak traced bytes) of one export, consumed like a socket would: nothing kept."""
+        api = APIClient()
+        api.force_authenticate(self.user)
+        tracemalloc.start()
+        try:
+            response = api.get("/api/grades/export/", params)
+            self.assertTrue(response.streaming)
+            lines = size = 0
+            for chunk in response.streaming_content:
+                lines += chunk.count(b"\n")
+                size += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lines, size, peak
+
+    def test_peak_memory_does_not_grow_with_rows(self):
+        small_lines, _, small_peak = self.export(**{"as": "ndjson", "max": 9})
+        lines, size, peak = self.export(**{"as": "ndjson"})
+        self.assertEqual((small_lines, lines), (ROWS // 10, ROWS))
+        self.assertLess(peak, small_peak * 1.5)
+        self.assertLess(peak, PEAK_CEILING)
+        self.assertGreater(size, 2 * PEAK_CEILING)
+
+    def test_csv_export_stays_under_ceiling(self):
+        lines, _, peak = self.export(**{"as": "csv"})
+        self.assertEqual(lines, ROWS + 1)
+        self.assertLess(peak, PEAK_CEILING)
@@ -0,0 +1,54 @@
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.mixins import ListModelMixin
+from rest_framework.test import APIClient
+
+from core.fast_serializers import FastListMixin
+from core.models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement
+
+User = get_user_model()
+
+ENDPOINTS = ["/api/assignments/", "/api/grades/", "/api/attendance/", "/api/events/", "/api/announcements/"]
+
+
+class FastListTests(TestCase):
+    """Every FastListMixin endpoint serves the bytes its ModelSerializer would."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin")
+        student = User.objects.create_user("zoë")
+        math = Subject.objects.create(code = "MA", name = "Mathématiques")
+        Enrollment.objects.create(user = student, subject = math)
+        at = timezone.make_aware(datetime(2025, 3, 10, 9, 30, 15, 123456))
+        Assignment.objects.create(subject = math, title = "HW 1", description = "", due_at = at)
+        Assignment.objects.create(subject = math, title = "HW \"2\"", description = "line\nbreak", due_at = at + timedelta(days = 1), status = Assignment.DONE)
+        Grade.objects.create(user = student, subject = math, value = 87.5, credits = 1.5)
+        Grade.objects.create(user = student, subject = math, value = 1e-7)
+        Attendance.objects.create(user = student, subject = math, date = date(2025, 3, 10), status = Attendance.LATE)
+        Attendance.objects.create(user = cls.admin, subject = math, date = date(2025, 3, 11), status = Attendance.PRESENT)
+        Event.objects.create(owner = student, title = "Free", starts_at = at, ends_at = at + timedelta(hours = 1))
+        Event.objects.create(owner = student, subject = math, title = "Lab", location = "Room 1", starts_at = at, ends_at = at + timedelta(hours = 2), recurrence = "FREQ=WEEKLY;COUNT=3", exdates = ["2025-03-17"])
+        Announcement.objects.create(title = "General", body = "-")
+        Announcement.objects.create(subject = math, title = "Quiz", body = "Bring notes", created_by = cls.admin)
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def test_list_bytes_match_the_model_serializer(self):
+        for url in ENDPOINTS:
+            with self.subTest(url):
+                fast = self.api.get(url)
+                with mock.patch.object(FastListMixin, "list", ListModelMixin.list):
+                    cache.clear()
+                    slow = self.api.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertGreaterEqual(fast.data["count"], 2)
+                self.assertEqual(fast.content, slow.content)
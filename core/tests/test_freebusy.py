@@ -0,0 +1,113 @@
+import re
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from core import freebusy
+from core.admin import EventAdmin
+from core.models import Subject, Enrollment, Event
+
+User = get_user_model()
+
+MONDAY = timezone.make_aware(datetime(2025, 3, 10, 9))
+HOUR = timedelta(hours = 1)
+
+
+class EventConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("teacher")
+        cls.student = User.objects.create_user("student")
+        cls.other = User.objects.create_user("other")
+        cls.math = Subject.objects.create(code = "MA", name = "Math")
+        cls.physics = Subject.objects.create(code = "PH", name = "Physics")
+        Enrollment.objects.create(user = cls.student, subject = cls.math)
+        Enrollment.objects.create(user = cls.student, subject = cls.physics)
+
+    def event(self, owner, starts_at, ends_at = None, **fields):
+        return Event.objects.create(owner = owner, title = "Event", starts_at = starts_at, ends_at = ends_at or starts_at + HOUR, **fields)
+
+    def new(self, owner, starts_at, ends_at = None, **fields):
+        return Event(owner = owner, title = "New", starts_at = starts_at, ends_at = ends_at or starts_at + HOUR, **fields)
+
+    def test_owner_is_busy_during_own_events(self):
+        self.event(self.teacher, MONDAY)
+        conflicts = freebusy.event_conflicts(self.new(self.teacher, MONDAY + HOUR / 2))
+        self.assertEqual(conflicts, [("user", self.teacher.pk, MONDAY + HOUR / 2, MONDAY + HOUR)])
+
+    def test_back_to_back_events_do_not_conflict(self):
+        self.event(self.teacher, MONDAY)
+        self.assertEqual(freebusy.event_conflicts(self.new(self.teacher, MONDAY + HOUR)), [])
+
+    def test_enrolled_users_are_busy_during_their_subjects_events(self):
+        self.event(self.other, MONDAY, subject = self.physics)
+        conflicts = freebusy.event_conflicts(self.new(self.teacher, MONDAY, subject = self.math))
+        self.assertEqual(conflicts, [("user", self.student.pk, MONDAY, MONDAY + HOUR)])
+
+    def test_location_matches_ignoring_case_and_spaces(self):
+        self.event(self.other, MONDAY, location = "Room 101")
+        conflicts = freebusy.event_conflicts(self.new(self.teacher, MONDAY, location = "  room 101 "))
+        self.assertEqual(conflicts, [("location", "  room 101 ", MONDAY, MONDAY + HOUR)])
+
+    def test_series_started_long_before_the_window(self):
+        self.event(self.teacher, MONDAY - timedelta(weeks = 20), recurrence = "FREQ=WEEKLY;COUNT=52")
+        conflicts = freebusy.event_conflicts(self.new(self.teacher, MONDAY))
+        self.assertEqual(conflicts, [("user", self.teacher.pk, MONDAY, MONDAY + HOUR)])
+
+    def test_series_skips_exception_dates(self):
+        self.event(self.teacher, MONDAY - timedelta(weeks = 1), recurrence = "FREQ=WEEKLY;COUNT=5", exdates = [timezone.localdate(MONDAY).isoformat()])
+        self.assertEqual(freebusy.event_conflicts(self.new(self.teacher, MONDAY)), [])
+
+    def test_long_one_off_event_started_days_before(self):
+        self.event(self.teacher, MONDAY - timedelta(days = 3), MONDAY + timedelta(days = 2))
+        conflicts = freebusy.event_conflicts(self.new(self.teacher, MONDAY))
+        self.assertEqual(conflicts, [("user", self.teacher.pk, MONDAY, MONDAY + HOUR)])
+
+    def test_one_off_event_that_ended_before_the_window(self):
+        self.event(self.teacher, MONDAY - timedelta(days = 3), MONDAY - HOUR)
+        self.event(self.teacher, MONDAY - freebusy.SHORT_EVENT + HOUR)
+        self.assertEqual(freebusy.event_conflicts(self.new(self.teacher, MONDAY)), [])
+
+    def test_recurring_event_reports_its_first_clash_per_attendee(self):
+        self.event(self.teacher, MONDAY + timedelta(weeks = 2))
+        series = self.new(self.teacher, MONDAY, recurrence = "FREQ=WEEKLY;COUNT=4")
+        start = MONDAY + timedelta(weeks = 2)
+        self.assertEqual(freebusy.event_conflicts(series), [("user", self.teacher.pk, start, start + HOUR)])
+
+    def test_event_does_not_conflict_with_itself(self):
+        event = self.event(self.teacher, MONDAY, subject = self.math, location = "Room 101")
+        self.assertEqual(freebusy.event_conflicts(event), [])
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "plans are only parsed for SQLite")
+    def test_overlap_query_uses_indexes(self):
+        queryset = freebusy.overlapping(Event.objects.values_list("pk"), MONDAY, MONDAY + timedelta(days = 7))
+        plan = queryset.explain()
+        self.assertEqual(re.findall(r"\bSCAN (core_\w+)(?! USING)", plan), [], plan)
+
+
+class EventAdminWarningTests(TestCase):
+    def test_save_model_warns_about_each_conflict(self):
+        superuser = User.objects.create_superuser("admin")
+        student = User.objects.create_user("student")
+        math = Subject.objects.create(code = "MA", name = "Math")
+        Enrollment.objects.create(user = student, subject = math)
+        Event.objects.create(owner = student, title = "Club", starts_at = MONDAY, ends_at = MONDAY + HOUR, location = "Lab")
+
+        request = RequestFactory().post("/")
+        request.user = superuser
+        event = Event(owner = superuser, subject = math, title = "Exam", starts_at = MONDAY, ends_at = MONDAY + 2 * HOUR, location = "lab")
+        model_admin = EventAdmin(Event, admin.site)
+        with mock.patch.object(model_admin, "message_user") as message_user:
+            model_admin.save_model(request, event, None, False)
+
+        self.assertIsNotNone(event.pk)
+        self.assertEqual(message_user.call_args_list, [
+            mock.call(request, "User 'student' is already booked 2025-03-10 09:00 - 10:00.", messages.WARNING),
+            mock.call(request, "Location 'lab' is already booked 2025-03-10 09:00 - 10:00.", messages.WARNING),
+        ])
@@ -0,0 +1,57 @@
+import csv
+import io
+import unittest
+from importlib.util import find_spec
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import grade_import
+from core.models import Subject, Grade
+
+User = get_user_model()
+
+
+class GradeImportFileErrorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("teacher", is_staff = True)
+        User.objects.create_user("alice")
+        Subject.objects.create(code = "MA", name = "Math")
+
+    def upload(self, name, content):
+        api = APIClient()
+        api.force_authenticate(self.staff)
+        return api.post("/api/grades/import/", {"file": SimpleUploadedFile(name, content)}, format = "multipart")
+
+    def test_valid_csv_is_imported(self):
+        response = self.upload("grades.csv", b"username,subject,value\nalice,MA,90\n")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["created"], 1)
+
+    def test_non_utf8_csv_is_rejected(self):
+        response = self.upload("grades.csv", "username,subject,value\nalice,MA,90\nJosé,MA,80\n".encode("latin-1"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("UTF-8", str(response.data["file"]))
+        self.assertFalse(Grade.objects.exists())
+
+    def test_malformed_csv_is_rejected(self):
+        oversized = "x" * (csv.field_size_limit() + 1)
+        response = self.upload("grades.csv", f"username,subject,value\nalice,MA,\"{oversized}\"\n".encode())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("malformed CSV", str(response.data["file"]))
+
+    @unittest.skipUnless(find_spec("openpyxl"), "openpyxl is not installed")
+    def test_corrupt_xlsx_is_rejected(self):
+        response = self.upload("grades.xlsx", b"PK\x03\x04 not really a workbook")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("XLSX", str(response.data["file"]))
+
+    def test_late_error_reports_what_was_already_written(self):
+        content = b"username,subject,value\n" + b"alice,MA,90\n" * 3 + "José,MA,80\n".encode("latin-1")
+        rows = grade_import.read_rows(io.BytesIO(content), "grades.csv")
+        with self.assertRaisesMessage(grade_import.ImportFileError, "The 2 grades before it were imported."):
+            grade_import.import_grades(rows, chunk_size = 2)
+        self.assertEqual(Grade.objects.count(), 2)
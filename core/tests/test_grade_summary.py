@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Subject, Grade
+
+User = get_user_model()
+
+
+class GradeSummaryTests(TestCase):
+    """/api/grades/summary/ from the rollups, and from the raw rows when a value filter needs them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("student")
+        cls.other = User.objects.create_user("other")
+        cls.math = Subject.objects.create(code = "MA", name = "Math")
+        cls.physics = Subject.objects.create(code = "PH", name = "Physics")
+        for value, credits in ((90, 2), (70, 1), (80, None)):
+            Grade.objects.create(user = cls.student, subject = cls.math, value = value, credits = credits)
+        Grade.objects.create(user = cls.student, subject = cls.physics, value = 55, credits = None)
+        Grade.objects.create(user = cls.other, subject = cls.math, value = 10, credits = 3)
+
+    def get(self, user = None, **params):
+        api = APIClient()
+        api.force_authenticate(user or self.student)
+        response = api.get(reverse("grade-summary"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_summary_from_rollups(self):
+        self.assertEqual(self.get(), {
+            "count": 4,
+            "avg": 73.75,
+            "gpa": 83.33,   # (90 * 2 + 70 * 1) / 3; grades without credits are left out
+            "by_subject": [
+                {"subject": "Math", "avg": 80.0, "count": 3, "gpa": 83.33},
+                {"subject": "Physics", "avg": 55.0, "count": 1, "gpa": None},
+            ],
+        })
+
+    def test_value_filter_reads_raw_rows_with_the_same_shape(self):
+        self.assertEqual(self.get(min = "0"), self.get())
+        self.assertEqual(self.get(min = "60", max = "85"), {
+            "count": 2,
+            "avg": 75.0,
+            "gpa": 70.0,
+            "by_subject": [{"subject": "Math", "avg": 75.0, "count": 2, "gpa": 70.0}],
+        })
+
+    def test_subject_filter_on_both_paths(self):
+        expected = {"count": 1, "avg": 55.0, "gpa": None, "by_subject": [{"subject": "Physics", "avg": 55.0, "count": 1, "gpa": None}]}
+        self.assertEqual(self.get(subject = str(self.physics.pk)), expected)
+        self.assertEqual(self.get(subject = str(self.physics.pk), max = "100"), expected)
+
+    def test_no_grades(self):
+        empty = {"count": 0, "avg": None, "gpa": None, "by_subject": []}
+        self.assertEqual(self.get(User.objects.create_user("new")), empty)
+        self.assertEqual(self.get(min = "99"), empty)
+
+    def test_superuser_sees_everyone(self):
+        admin = User.objects.create_superuser("admin")
+        for params in ({}, {"min": "0"}):
+            with self.subTest(params):
+                data = self.get(admin, **params)
+                self.assertEqual((data["count"], data["gpa"]), (5, 46.67))   # (180 + 70 + 30) / 6
@@ -0,0 +1,145 @@
+import time
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+
+class EnqueueTests(TestCase):
+    def run_to_completion(self, job, error = None):
+        Job.objects.filter(pk = job.pk).update(status = Job.RUNNING, locked_by = "worker", attempts = job.max_attempts)
+        job.refresh_from_db()
+        return jobs.finish(job, result = {}, error = error)
+
+    def test_unfinished_jobs_are_shared(self):
+        job = jobs.enqueue("rebuild_rollups")
+        self.assertEqual(jobs.enqueue("rebuild_rollups"), job)
+        self.assertEqual(self.run_to_completion(job), Job.SUCCEEDED)
+        again = jobs.enqueue("rebuild_rollups")
+        self.assertNotEqual(again, job)
+        self.assertEqual(self.run_to_completion(again, error = "boom"), Job.FAILED)
+        self.assertEqual(Job.objects.filter(active_key__isnull = False).count(), 0)
+
+    def test_only_one_unfinished_job_per_key(self):
+        job = jobs.enqueue("rebuild_rollups")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind = job.kind, key = job.key, active_key = job.key)
+
+    def test_losing_a_concurrent_enqueue_returns_the_winner(self):
+        winner = jobs.enqueue("rebuild_rollups")
+        real_first = QuerySet.first
+        stale = iter([None])   # the loser's read ran before the winner's insert committed
+
+        def first(queryset):
+            for missed in stale:
+                return missed
+            return real_first(queryset)
+
+        with mock.patch.object(QuerySet, "first", first):
+            self.assertEqual(jobs.enqueue("rebuild_rollups"), winner)
+        self.assertEqual(Job.objects.count(), 1)
+
+
+def _fails(**args):
+    raise RuntimeError("boom")
+
+
+class WorkerTests(TestCase):
+    def setUp(self):
+        self.registry = mock.patch.dict(jobs.REGISTRY, {
+            "ok": jobs.JobType(lambda **args: args, concurrency = 1),
+            "fails": jobs.JobType(_fails, max_attempts = 3),
+        })
+        self.registry.start()
+        self.addCleanup(self.registry.stop)
+
+    def test_claim_takes_due_jobs_once(self):
+        later = jobs.enqueue("ok", {"n": 1}, delay = 60)
+        due = jobs.enqueue("ok", {"n": 2})
+        job = jobs.claim("w1", Counter())
+        self.assertEqual((job.pk, job.status, job.locked_by, job.attempts), (due.pk, Job.RUNNING, "w1", 1))
+        self.assertIsNone(jobs.claim("w2", Counter()))   # the other one is not due yet
+        Job.objects.filter(pk = later.pk).update(run_after = timezone.now())
+        self.assertIsNone(jobs.claim("w2", Counter({"ok": 1})))   # "ok" runs one at a time per worker
+        self.assertIsNone(jobs.claim("w2", Counter(), kinds = ["fails"]))
+        self.assertEqual(jobs.claim("w2", Counter()).pk, later.pk)
+
+    def test_a_lost_race_moves_on_to_the_next_job(self):
+        first, second = jobs.enqueue("ok", {"n": 1}), jobs.enqueue("ok", {"n": 2})
+        real_update = QuerySet.update
+        stolen = iter([first.pk])
+
+        def update(queryset, **kwargs):
+            for pk in stolen:   # another worker wins the first job just before this one
+                real_update(Job.objects.filter(pk = pk), status = Job.RUNNING, locked_by = "w2")
+            return real_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update):
+            self.assertEqual(jobs.claim("w1", Counter()).pk, second.pk)
+        self.assertEqual(Job.objects.get(pk = first.pk).locked_by, "w2")
+
+    @override_settings(JOB_BACKOFF_BASE_SECONDS = 10, JOB_BACKOFF_MAX_SECONDS = 60)
+    def test_backoff_doubles_up_to_the_cap_with_jitter(self):
+        with mock.patch("core.jobs.random.uniform", return_value = 1):
+            self.assertEqual([jobs.backoff(n) for n in range(1, 6)], [10, 20, 40, 60, 60])
+        with mock.patch("core.jobs.random.uniform", return_value = 0.5):
+            self.assertEqual(jobs.backoff(3), 20)
+
+    def test_failed_attempts_are_retried_after_a_backoff_then_fail(self):
+        job = jobs.enqueue("fails")
+        for attempt, status in ((1, Job.QUEUED), (2, Job.QUEUED), (3, Job.FAILED)):
+            Job.objects.filter(pk = job.pk).update(run_after = timezone.now())
+            claimed = jobs.claim("w1", Counter())
+            self.assertEqual(claimed.attempts, attempt)
+            with mock.patch("core.jobs.backoff", return_value = 30):
+                self.assertEqual(jobs.finish(claimed, error = "boom"), status)
+            job.refresh_from_db()
+            if status == Job.QUEUED:
+                self.assertGreater(job.run_after, timezone.now() + timedelta(seconds = 25))
+                self.assertIsNone(jobs.claim("w1", Counter()))
+        self.assertEqual((job.error, job.locked_by, job.active_key), ("boom", "", None))
+
+    @override_settings(JOB_BACKOFF_BASE_SECONDS = 0)
+    def test_worker_runs_jobs_and_retries_failures(self):
+        ok, failing = jobs.enqueue("ok", {"n": 1}), jobs.enqueue("fails")
+        outcomes = jobs.Worker(concurrency = 2, poll = 0.01).run(once = True)
+        self.assertEqual(outcomes, Counter({Job.SUCCEEDED: 1, Job.QUEUED: 2, Job.FAILED: 1}))
+        ok.refresh_from_db()
+        failing.refresh_from_db()
+        self.assertEqual((ok.status, ok.result, ok.attempts), (Job.SUCCEEDED, {"n": 1}, 1))
+        self.assertEqual((failing.status, failing.attempts), (Job.FAILED, 3))
+        self.assertIn("RuntimeError: boom", failing.error)
+
+    def test_requeue_stale_leaves_jobs_with_a_fresh_heartbeat(self):
+        stale, fresh = jobs.enqueue("ok", {"n": 1}), jobs.enqueue("ok", {"n": 2})
+        long_ago = timezone.now() - timedelta(seconds = settings.JOB_LOCK_TIMEOUT_SECONDS + 1)
+        Job.objects.update(status = Job.RUNNING, locked_by = "w1", locked_at = long_ago)
+        self.assertEqual(jobs.heartbeat("w1", [fresh]), 1)
+        self.assertEqual(jobs.heartbeat("w2", [stale]), 0)   # not its lock
+        self.assertEqual(jobs.requeue_stale(), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by, stale.locked_at), (Job.QUEUED, "", None))
+        self.assertEqual(fresh.status, Job.RUNNING)
+
+    @override_settings(JOB_LOCK_TIMEOUT_SECONDS = 0.2)
+    def test_a_job_running_past_the_lock_timeout_is_not_requeued(self):
+        runs = []
+
+        def slow(**args):
+            runs.append(1)
+            time.sleep(0.6)
+
+        jobs.REGISTRY["slow"] = jobs.JobType(slow)
+        job = jobs.enqueue("slow")
+        self.assertEqual(jobs.Worker(poll = 0.01).run(once = True), Counter({Job.SUCCEEDED: 1}))
+        job.refresh_from_db()
+        self.assertEqual((len(runs), job.status, job.attempts), (1, Job.SUCCEEDED, 1))
@@ -0,0 +1,156 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.backends import TimedConnectMixin
+from core.middleware import ConnectionMetricsMiddleware, RequestMetricsMiddleware, connection_stats
+from core.models import Subject
+
+User = get_user_model()
+
+
+class ConnectionMetricsTests(TestCase):
+    def test_outcomes(self):
+        before = connection_stats()
+        api = APIClient()
+        with self.assertNumQueries(0):
+            self.assertEqual(api.get("/no-such-page/")["X-DB-Connection"], "unused")
+        self.assertEqual(api.get("/api/subjects/")["X-DB-Connection"], "reused")
+
+        def view(request):
+            connection_created.send(sender = connection.__class__, connection = connection)
+            Subject.objects.exists()
+            return HttpResponse()
+
+        self.assertEqual(ConnectionMetricsMiddleware(view)(RequestFactory().get("/"))["X-DB-Connection"], "new")
+        after = connection_stats()
+        self.assertEqual({k: after[k] - before[k] for k in ("requests", "reused", "opened", "unused")}, {"requests": 3, "reused": 1, "opened": 1, "unused": 1})
+
+    def test_new_connection_reports_its_setup_time(self):
+        self.assertIsInstance(connections[DEFAULT_DB_ALIAS], TimedConnectMixin)
+        fresh = connections.create_connection(DEFAULT_DB_ALIAS)
+        before = connection_stats()
+
+        def view(request):
+            fresh.ensure_connection()
+            return HttpResponse()
+
+        try:
+            response = ConnectionMetricsMiddleware(view)(RequestFactory().get("/"))
+        finally:
+            fresh.close()
+        self.assertEqual(response["X-DB-Connection"], "new")
+        self.assertGreater(fresh.connect_seconds, 0)
+        self.assertEqual(response["Server-Timing"], f"db-connect;dur={fresh.connect_seconds * 1000:.2f}")
+        self.assertAlmostEqual(connection_stats()["connect_seconds"] - before["connect_seconds"], fresh.connect_seconds)
+
+
+def _timings(response):
+    """Server-Timing as {name: (duration ms, desc)}."""
+    out = {}
+    for entry in response["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        params = dict(p.split("=", 1) for p in params)
+        out[name] = (float(params["dur"]), params.get("desc", "").strip('"'))
+    return out
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", is_staff = True)
+        cls.student = User.objects.create_user("student")
+        Subject.objects.create(code = "MA", name = "Math")
+
+    def api(self, user = None):
+        api = APIClient()
+        if user is not None:
+            api.force_authenticate(user)
+        return api
+
+    def test_server_timing_reports_the_requests_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api(self.student).get("/api/subjects/")
+        timings = _timings(response)
+        self.assertEqual(set(timings), {"db", "render", "total"})
+        self.assertEqual(timings["db"][1], f"{len(queries)} queries")
+        self.assertGreater(timings["render"][0], 0)
+        self.assertGreaterEqual(timings["total"][0], timings["db"][0] + timings["render"][0])
+
+    def test_prometheus_output_counts_requests(self):
+        def sample(text, line_start):
+            [line] = [line for line in text.splitlines() if line.startswith(line_start + " ")]
+            return float(line.rsplit(" ", 1)[1])
+
+        api = self.api(self.staff)
+        before = api.get("/api/_metrics").content.decode()
+        for _ in range(3):
+            api.get("/api/subjects/")
+        response = api.get("/api/_metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        text = response.content.decode()
+        for name, kind in (("edu_http_requests_total", "counter"), ("edu_http_request_duration_seconds", "histogram"), ("edu_db_connections_total", "counter")):
+            self.assertIn(f"# TYPE {name} {kind}", text)
+
+        requests = 'edu_http_requests_total{view="subject-list",code="200"}'
+        count = 'edu_http_request_duration_seconds_count{view="subject-list"}'
+        for line_start in (requests, count, 'edu_http_request_duration_seconds_bucket{view="subject-list",le="+Inf"}'):
+            with self.subTest(line_start):
+                previous = sample(before, line_start) if line_start + " " in before else 0
+                self.assertEqual(sample(text, line_start) - previous, 3)
+        buckets = [float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith('edu_http_request_duration_seconds_bucket{view="subject-list"')]
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertGreater(sample(text, 'edu_db_queries_total{view="subject-list"}'), 0)
+
+    def test_metrics_token_auth(self):
+        for token, header, user, status in [
+            ("s3cret", "Bearer s3cret", None, 200),
+            ("s3cret", "Bearer wrong", None, 401),
+            ("s3cret", None, None, 401),
+            ("", "Bearer ", None, 401),     # no token configured: nothing matches
+            ("s3cret", None, self.student, 403),
+            ("s3cret", None, self.staff, 200),
+        ]:
+            with self.subTest(header = header, user = user), override_settings(METRICS_TOKEN = token):
+                kwargs = {"HTTP_AUTHORIZATION": header} if header is not None else {}
+                self.assertEqual(self.api(user).get("/api/_metrics", **kwargs).status_code, status)
+
+
+class AsyncMiddlewareTests(TestCase):
+    def test_both_middlewares_adapt_to_the_chain(self):
+        def sync_view(request):
+            return HttpResponse()
+
+        async def async_view(request):
+            return HttpResponse()
+
+        for middleware in (RequestMetricsMiddleware, ConnectionMetricsMiddleware):
+            with self.subTest(middleware.__name__):
+                self.assertFalse(iscoroutinefunction(middleware(sync_view)))
+                self.assertTrue(iscoroutinefunction(middleware(async_view)))
+
+    async def test_async_chain_counts_queries_from_worker_threads(self):
+        async def view(request):
+            await Subject.objects.acount()                                   # the request's sync thread
+            await sync_to_async(Subject.objects.count, thread_sensitive = False)()  # a thread of its own
+            return HttpResponse()
+
+        before = connection_stats()
+        response = await RequestMetricsMiddleware(ConnectionMetricsMiddleware(view))(RequestFactory().get("/"))
+        self.assertEqual(_timings(response)["db"][1], "2 queries")
+        self.assertIn(response["X-DB-Connection"], ("reused", "new"))
+        self.assertEqual(connection_stats()["requests"] - before["requests"], 1)
+
+    async def test_asgi_requests_go_through_the_async_middlewares(self):
+        user = await User.objects.acreate(username = "student")
+        response = await AsyncClient().get("/api/async/grades/", headers = {"authorization": f"Bearer {AccessToken.for_user(user)}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-DB-Connection"], "reused")
+        self.assertNotEqual(_timings(response)["db"][1], "0 queries")
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Subject, Grade
+from core.pagination import KeysetPagination
+
+User = get_user_model()
+
+
+def _cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("student")
+        cls.subjects = [Subject.objects.create(code = code, name = code) for code in ("A", "B", "C")]
+        base = timezone.make_aware(datetime(2025, 3, 10, 9))
+        # 47 grades over 4 timestamps: every page boundary (20, 40) falls inside a run of ties
+        for i in range(47):
+            grade = Grade.objects.create(user = cls.student, subject = cls.subjects[i % 3], value = 50 + i % 7)
+            Grade.objects.filter(pk = grade.pk).update(graded_at = base + timedelta(hours = i % 4))
+        Grade.objects.create(user = User.objects.create_user("other"), subject = cls.subjects[0], value = 1)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.student)
+
+    def walk(self, url, params = None):
+        """Every page from `url`, following `next`; returns the pages' id lists."""
+        pages = []
+        response = self.api.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            pages.append([g["id"] for g in response.data["results"]])
+            if response.data["next"] is None:
+                return pages
+            response = self.api.get(response.data["next"])
+
+    def test_mixed_order_with_ties_across_pages(self):
+        expected = [
+            g.pk for g in sorted(Grade.objects.filter(user = self.student), key = lambda g: (-g.graded_at.timestamp(), g.pk))
+        ]
+        pages = self.walk("/api/grades/", {"cursor": ""})
+        self.assertEqual([len(p) for p in pages], [20, 20, 7])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_page_numbers_are_still_the_default(self):
+        response = self.api.get("/api/grades/")
+        self.assertEqual((response.data["count"], len(response.data["results"])), (47, 20))
+
+    def test_tampered_cursor_is_a_404(self):
+        valid = self.api.get("/api/grades/", {"cursor": ""}).data["next"]
+        self.assertEqual(self.api.get(valid).status_code, 200)
+        for cursor in [
+            "not base64!",
+            base64.urlsafe_b64encode(b"\xff\xfe").decode(),   # not UTF-8
+            _cursor({"graded_at": "2025-03-10T09:00:00Z"}),  # not a list
+            _cursor(["2025-03-10T09:00:00+00:00"]),          # too few values
+            _cursor(["2025-03-10T09:00:00+00:00", 3, 4]),    # too many
+            _cursor(["yesterday", 3]),
+            _cursor(["2025-03-10T09:00:00+00:00", "three"]),
+        ]:
+            with self.subTest(cursor):
+                response = self.api.get("/api/grades/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.data["detail"], KeysetPagination.invalid_cursor_message)
+
+    def test_three_column_mixed_ordering(self):
+        class View:
+            cursor_ordering = ("subject", "-value", "id")
+
+        queryset = Grade.objects.filter(user = self.student)
+        expected = [g.pk for g in sorted(queryset, key = lambda g: (g.subject_id, -g.value, g.pk))]
+        seen, cursor = [], ""
+        while cursor is not None:
+            paginator = KeysetPagination()
+            paginator.page_size = 6
+            request = Request(APIRequestFactory().get("/grades/", {"cursor": cursor}))
+            seen += [g.pk for g in paginator.paginate_queryset(queryset, request, View())]
+            cursor = paginator.encode_cursor(paginator.next_position) if paginator.has_next else None
+        self.assertEqual(seen, expected)
+
+    def test_values_rows_and_dates_round_trip(self):
+        class View:
+            cursor_ordering = ("-graded_at", "id")
+
+        paginator = KeysetPagination()
+        paginator.page_size = 5
+        rows = paginator.paginate_queryset(Grade.objects.filter(user = self.student).values("id", "graded_at"), Request(APIRequestFactory().get("/")), View())
+        cursor = paginator.encode_cursor(paginator.next_position)
+        self.assertEqual(json.loads(base64.urlsafe_b64decode(cursor)), [rows[-1]["graded_at"].isoformat(), rows[-1]["id"]])
+        request = Request(APIRequestFactory().get("/", {"cursor": cursor}))
+        self.assertEqual(paginator.decode_cursor(request), [rows[-1]["graded_at"], rows[-1]["id"]])
+        with self.assertRaises(NotFound):
+            paginator.decode_cursor(Request(APIRequestFactory().get("/", {"cursor": cursor[:-4]})))
@@ -0,0 +1,138 @@
+from datetime import date, timedelta
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement
+from core.query_guard import QueryGuard
+from core.urls import router
+
+User = get_user_model()
+
+SMALL, LARGE = 1, 100
+
+# GET actions that need query parameters, built from the seeded subjects
+PARAMS = {
+    "grade-analytics": lambda subjects: {"subject": subjects[0].pk},
+}
+
+
+# non-staff endpoints that answer with something other than 200, by enrollment role
+STATUS = {
+    (Enrollment.STUDENT, "grade-analytics"): 403,
+}
+
+
+def _seed(user, start, stop, role = Enrollment.STUDENT):
+    """
+    Rows start..stop-1 of every core table, each pointing at its own subject that
+    `user` is enrolled in with `role`; returns the subjects. A teacher's grades and
+    attendance belong to a student of the class.
+    """
+    now = timezone.now()
+    subjects = []
+    for i in range(start, stop):
+        subject = Subject.objects.create(code = f"qc-{user.pk}-{i}", name = f"Query check {i}")
+        subjects.append(subject)
+        Enrollment.objects.create(user = user, subject = subject, role = role)
+        learner = user
+        if role != Enrollment.STUDENT:
+            learner = User.objects.create_user(f"qc-{user.pk}-student-{i}")
+            Enrollment.objects.create(user = learner, subject = subject)
+        Assignment.objects.create(subject = subject, title = f"Assignment {i}", due_at = now + timedelta(days = i + 1), created_by = user)
+        Grade.objects.create(user = learner, subject = subject, value = 50 + i % 50, credits = 1 + i % 3)
+        Attendance.objects.create(user = learner, subject = subject, date = date.today() - timedelta(days = i), status = Attendance.PRESENT)
+        Event.objects.create(owner = user, subject = subject, title = f"Event {i}", location = f"Room {i}", starts_at = now + timedelta(minutes = i), ends_at = now + timedelta(minutes = i + 30))
+        Announcement.objects.create(subject = subject, title = f"Announcement {i}", body = "-", created_by = user)
+    return subjects
+
+
+def _api_urls():
+    """Every collection route of the API router: list plus the GET detail=False actions."""
+    for prefix, viewset, basename in router.registry:
+        if hasattr(viewset, "list"):
+            yield f"{basename}-list", reverse(f"{basename}-list")
+        for action in viewset.get_extra_actions():
+            if not action.detail and "get" in action.mapping:
+                yield f"{basename}-{action.url_name}", reverse(f"{basename}-{action.url_name}")
+
+
+def _admin_urls():
+    for model in admin.site._registry:
+        if model._meta.app_label == "core":
+            name = f"admin:core_{model._meta.model_name}_changelist"
+            yield name, reverse(name)
+
+
+def _get(client, url, data = None):
+    response = client.get(url, data)
+    if getattr(response, "streaming", False):
+        b"".join(response.streaming_content)
+    return response
+
+
+class QueryCountTests(TestCase):
+    """
+    Every API collection endpoint and every core admin changelist runs as many
+    queries with LARGE rows per table as with SMALL, and no query shape repeats
+    (an N+1). Counts are taken in the steady state, after a request that warms the
+    per-user caches. Students and teachers go through the same check on the API,
+    with another student's rows around that their visibility querysets leave out.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def assertFlat(self, endpoints, seed, status = lambda name: 200):
+        subjects = seed(0, SMALL)
+        counts = {}
+        for client, name, url in endpoints:
+            data = PARAMS[name](subjects) if name in PARAMS else None
+            _get(client, url, data)
+            with CaptureQueriesContext(connection) as ctx:
+                response = _get(client, url, data)
+            self.assertEqual(response.status_code, status(name), name)
+            counts[name] = len(ctx)
+
+        subjects += seed(SMALL, LARGE)
+        for client, name, url in endpoints:
+            with self.subTest(name):
+                data = PARAMS[name](subjects) if name in PARAMS else None
+                _get(client, url, data)
+                with self.assertNumQueries(counts[name]), QueryGuard():
+                    response = _get(client, url, data)
+                self.assertEqual(response.status_code, status(name))
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        user = User.objects.create_superuser("query-check", password = None)
+        api = APIClient()
+        api.force_authenticate(user)
+        site = Client()
+        site.force_login(user)
+        endpoints = [(api, name, url) for name, url in _api_urls()] + [(site, name, url) for name, url in _admin_urls()]
+        self.assertFlat(endpoints, lambda start, stop: _seed(user, start, stop))
+
+    def test_non_staff_query_counts_do_not_grow_with_rows(self):
+        for role in (Enrollment.STUDENT, Enrollment.TEACHER):
+            with self.subTest(role = role):
+                cache.clear()
+                user = User.objects.create_user(f"query-check-{role}")
+                other = User.objects.create_user(f"query-check-{role}-other")
+                api = APIClient()
+                api.force_authenticate(user)
+
+                def seed(start, stop):
+                    _seed(other, start, stop)
+                    return _seed(user, start, stop, role)
+
+                self.assertFlat([(api, name, url) for name, url in _api_urls()], seed, lambda name: STATUS.get((role, name), 200))
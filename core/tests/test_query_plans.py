@@ -0,0 +1,77 @@
+import re
+import unittest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement
+from core.views import GradeViewSet, AssignmentViewSet, AttendanceViewSet, EventViewSet, EnrollmentViewSet, AnnouncementViewSet
+
+User = get_user_model()
+
+# SQLite reports "SCAN <table>" (no "USING ... INDEX") for a full table scan
+TABLE_SCAN = re.compile(r"\bSCAN (core_\w+)(?! USING)")
+
+
+def _queryset(viewset, params, user):
+    view = viewset()
+    view.request = Request(APIRequestFactory().get("/", params))
+    view.request.user = user
+    view.format_kwarg = None
+    view.action = "list"
+    view.kwargs = {}
+    return view.filter_queryset(view.get_queryset())[:20]
+
+
+class HotQueryPlanTests(TestCase):
+    """Each viewset's hot list query is one query, reads its table through an index and finds the seeded row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("student")
+        cls.subject = Subject.objects.create(code = "MA", name = "Math")
+        other = Subject.objects.create(code = "PH", name = "Physics")
+        Enrollment.objects.create(user = cls.user, subject = cls.subject)
+        now = timezone.now()
+        march = datetime(2025, 3, 10, 9, tzinfo = dt_timezone.utc)
+        for subject in (cls.subject, other):
+            Assignment.objects.create(subject = subject, title = "HW", due_at = now + timedelta(days = 1))
+            Grade.objects.create(user = cls.user, subject = subject, value = 80)
+            Attendance.objects.create(user = cls.user, subject = subject, date = date(2025, 3, 10), status = Attendance.PRESENT)
+            Event.objects.create(owner = cls.user, subject = subject, title = "Lab", starts_at = march, ends_at = march + timedelta(hours = 1))
+            Event.objects.create(owner = cls.user, subject = subject, title = "Exam", starts_at = now + timedelta(days = 2), ends_at = now + timedelta(days = 2, hours = 1))
+            Announcement.objects.create(subject = subject, title = "Quiz", body = "-")
+
+    def hot_queries(self):
+        subject = str(self.subject.pk)
+        return [
+            ("grades: mine, newest first", GradeViewSet, {}),
+            ("grades: mine in one subject", GradeViewSet, {"subject": subject}),
+            ("assignments: subject, pending, by due date", AssignmentViewSet, {"subject": subject, "status": "pending"}),
+            ("attendance: mine, newest first", AttendanceViewSet, {}),
+            ("attendance: mine in one subject over a term", AttendanceViewSet, {"subject": subject, "start": "2025-01-01", "end": "2025-06-30"}),
+            ("events: mine, upcoming", EventViewSet, {"upcoming": "true"}),
+            ("events: mine overlapping a month", EventViewSet, {"from": "2025-03-01", "to": "2025-04-01"}),
+            ("enrollments: mine", EnrollmentViewSet, {}),
+            ("announcements: one of my subjects", AnnouncementViewSet, {"subject": subject}),
+        ]
+
+    def test_hot_queries_run_once_and_find_rows(self):
+        for label, viewset, params in self.hot_queries():
+            with self.subTest(label):
+                list(_queryset(viewset, params, self.user))  # warm per-user caches; count the steady state
+                with self.assertNumQueries(1):
+                    rows = list(_queryset(viewset, params, self.user))
+                self.assertTrue(rows, "the query matched nothing, so its plan proves nothing")
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "plans are only parsed for SQLite")
+    def test_hot_queries_use_indexes(self):
+        for label, viewset, params in self.hot_queries():
+            with self.subTest(label):
+                plan = _queryset(viewset, params, self.user).explain()
+                self.assertEqual(TABLE_SCAN.findall(plan), [], plan)
@@ -0,0 +1,50 @@
+from datetime import date, datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core import recurrence
+from core.models import Event
+
+User = get_user_model()
+
+
+class LastOccurrenceTests(TestCase):
+    RULES = [
+        ("FREQ=WEEKLY;COUNT=1", ()),
+        ("FREQ=WEEKLY;COUNT=15", ()),
+        ("FREQ=WEEKLY;BYDAY=MO,WE;COUNT=15", ()),
+        ("FREQ=WEEKLY;BYDAY=MO,TU,SU;COUNT=7", ("2025-03-23",)),
+        ("FREQ=WEEKLY;BYDAY=TU,TH;UNTIL=20250601", ()),
+        ("FREQ=WEEKLY;BYDAY=TH;UNTIL=20250529", ("2025-05-29", "2025-05-22")),
+        ("FREQ=WEEKLY;BYDAY=MO;UNTIL=20250301", ()),
+        ("FREQ=WEEKLY;COUNT=2", ("2025-03-05", "2025-03-12")),
+    ]
+
+    def test_matches_the_expanded_series(self):
+        starts_at = timezone.make_aware(datetime(2025, 3, 5, 9, 30))  # a Wednesday
+        ends_at = starts_at + timedelta(minutes = 90)
+        for rule, exdates in self.RULES:
+            with self.subTest(rule, exdates = exdates):
+                expanded = list(recurrence.occurrences(starts_at, ends_at, rule, exdates))
+                self.assertEqual(recurrence.last_occurrence(starts_at, ends_at, rule, exdates), expanded[-1] if expanded else None)
+                if "COUNT" not in rule:
+                    self.assertEqual(recurrence.series_length(starts_at, rule), len(list(recurrence.occurrences(starts_at, ends_at, rule))))
+
+    def test_series_end_does_not_expand_the_series(self):
+        owner = User.objects.create_user("owner")
+        starts_at = timezone.make_aware(datetime(2025, 3, 5, 9, 30))
+        event = Event.objects.create(owner = owner, title = "Forever", starts_at = starts_at, ends_at = starts_at + timedelta(hours = 1), recurrence = "FREQ=WEEKLY;BYDAY=MO,WE,FR;UNTIL=99991230")
+        self.assertEqual(timezone.localtime(event.series_ends_at).date(), date(9999, 12, 29))
+
+    def test_bounds(self):
+        owner = User.objects.create_user("owner")
+        starts_at = timezone.make_aware(datetime(2025, 3, 5, 9, 30))
+        for rule in ("FREQ=WEEKLY;COUNT=1001", "FREQ=WEEKLY;UNTIL=22000101", "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR;UNTIL=20300101"):
+            with self.subTest(rule):
+                event = Event(owner = owner, title = "Long", starts_at = starts_at, ends_at = starts_at + timedelta(hours = 1), recurrence = rule)
+                with self.assertRaises(ValidationError):
+                    event.full_clean()
+        Event(owner = owner, title = "Term", starts_at = starts_at, ends_at = starts_at + timedelta(hours = 1), recurrence = "FREQ=WEEKLY;COUNT=1000").full_clean()
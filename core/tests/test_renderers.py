@@ -0,0 +1,49 @@
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement
+from core.renderers import FastJSONRenderer
+
+User = get_user_model()
+
+SERVED = [
+    "/api/subjects/", "/api/assignments/", "/api/grades/", "/api/grades/summary/", "/api/attendance/",
+    "/api/attendance/summary/", "/api/events/", "/api/enrollments/", "/api/announcements/", "/api/dashboard/",
+]
+
+
+class FastJSONRendererTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("zoë")
+        now = timezone.now()
+        for i, name in enumerate(["Mathématiques", "物理", "Line separator"]):
+            subject = Subject.objects.create(code = f"S{i}", name = name, color = "#22c55e")
+            Enrollment.objects.create(user = cls.user, subject = subject)
+            Assignment.objects.create(subject = subject, title = f"HW «{i}»", description = "emoji 🎓", due_at = now + timedelta(days = i + 1))
+            Grade.objects.create(user = cls.user, subject = subject, value = 87.35 + i / 3, credits = 1.5 if i else None)
+            Attendance.objects.create(user = cls.user, subject = subject, date = date(2025, 3, 1 + i), status = Attendance.PRESENT)
+            Event.objects.create(owner = cls.user, subject = subject, title = "Lab", starts_at = now + timedelta(hours = i), ends_at = now + timedelta(hours = i + 1))
+            Announcement.objects.create(subject = subject, title = "Quiz", body = "\"quoted\" \\ and\ttabs")
+
+    def test_served_payloads_are_byte_identical_to_drf(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        for url in SERVED:
+            with self.subTest(url):
+                response = api.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_exponent_floats_differ_in_spelling_only(self):
+        data = {"big": 1e16, "small": 1.5e-7, "at": datetime(2025, 3, 1, 9, 30, tzinfo = dt_timezone.utc), "amount": Decimal("1.10"), "sep": " "}
+        fast, stock = FastJSONRenderer().render(data), JSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), json.loads(stock))
+        self.assertIn(b"\\u2029", fast)
@@ -0,0 +1,151 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import jobs, report_cards
+from core.models import Subject, Assignment, Grade, Attendance, Enrollment
+
+User = get_user_model()
+
+START, END = date(2025, 1, 6), date(2025, 3, 28)
+
+
+def _at(day):
+    return timezone.make_aware(datetime.combine(day, time(10)))
+
+
+def _pct(part, whole):
+    return round(part / whole * 100, 2) if whole else None
+
+
+def _card(user):
+    """One student's card straight from their rows, the way a per-student report would read them."""
+    in_term = lambda day: START <= day <= END
+    grades = [g for g in Grade.objects.filter(user = user) if in_term(timezone.localtime(g.graded_at).date())]
+    marks = [a for a in Attendance.objects.filter(user = user) if in_term(a.date)]
+    subjects = {e.subject for e in Enrollment.objects.filter(user = user, role = Enrollment.STUDENT).select_related("subject")}
+    subjects |= {g.subject for g in grades} | {a.subject for a in marks}
+    if not subjects:
+        return None
+
+    rows = []
+    for subject in sorted(subjects, key = lambda s: (s.name, s.pk)):
+        values = [g.value for g in grades if g.subject_id == subject.pk]
+        credited = [g for g in grades if g.subject_id == subject.pk and g.credits is not None]
+        held = [a for a in marks if a.subject_id == subject.pk]
+        due = [a for a in Assignment.objects.filter(subject = subject) if in_term(timezone.localtime(a.due_at).date())]
+        done = [a for a in due if a.status == Assignment.DONE]
+        rows.append({
+            "subject": subject.name,
+            "grades": len(values),
+            "avg": round(sum(values) / len(values), 2) if values else None,
+            "gpa": round(sum(g.value * g.credits for g in credited) / sum(g.credits for g in credited), 2) if credited else None,
+            "sessions": len(held),
+            "present_percent": _pct(sum(a.status == Attendance.PRESENT for a in held), len(held)),
+            "assignments": len(due),
+            "assignments_done": len(done),
+            "completion_percent": _pct(len(done), len(due)),
+        })
+    credited = [g for g in grades if g.credits is not None]
+    return {
+        "user": user.pk,
+        "username": user.username,
+        "start": START.isoformat(),
+        "end": END.isoformat(),
+        "avg": round(sum(g.value for g in grades) / len(grades), 2) if grades else None,
+        "gpa": round(sum(g.value * g.credits for g in credited) / sum(g.credits for g in credited), 2) if credited else None,
+        "present_percent": _pct(sum(a.status == Attendance.PRESENT for a in marks), len(marks)),
+        "by_subject": rows,
+    }
+
+
+class ReportCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        subjects = [Subject.objects.create(code = f"S{i}", name = name) for i, name in enumerate(["Physics", "Art", "Biology", "Art"])]
+        days = [START + timedelta(days = d) for d in range(-20, (END - START).days + 20)]
+        for subject in subjects:
+            for i in range(6):
+                Assignment.objects.create(subject = subject, title = f"A{i}", due_at = _at(rng.choice(days)), status = rng.choice([Assignment.PENDING, Assignment.DONE]))
+
+        cls.users = [User.objects.create_user(f"student{i}") for i in range(8)]
+        teacher = User.objects.create_user("teacher")
+        Enrollment.objects.create(user = teacher, subject = subjects[0], role = Enrollment.TEACHER)
+        for user in cls.users[:6]:
+            for subject in rng.sample(subjects, 3):
+                Enrollment.objects.create(user = user, subject = subject)
+        for user in cls.users[1:7]:   # student6 has grades but no enrollment, student7 nothing at all
+            for subject in rng.sample(subjects, 2):
+                for _ in range(rng.randint(0, 8)):
+                    grade = Grade.objects.create(user = user, subject = subject, value = rng.randint(40, 100), credits = rng.choice([None, 0.5, 1, 2]))
+                    Grade.objects.filter(pk = grade.pk).update(graded_at = _at(rng.choice(days)))
+                for day in rng.sample(days, rng.randint(0, 12)):
+                    Attendance.objects.create(user = user, subject = subject, date = day, status = rng.choice([Attendance.PRESENT, Attendance.ABSENT, Attendance.LATE]))
+
+    def test_batched_cards_match_per_student_cards(self):
+        expected = [card for card in map(_card, sorted(self.users, key = lambda u: u.pk)) if card is not None]
+        self.assertGreaterEqual(len(expected), 6)
+        self.assertEqual(report_cards.compute(START, END), expected)
+
+    def test_term_report_job(self):
+        for user in self.users:
+            with self.subTest(user.username):
+                card = jobs.term_report(user.pk, START.isoformat(), END.isoformat())
+                self.assertEqual(card, _card(user) or report_cards.empty_card(user.pk, user.username, START, END))
+
+
+class ReportCardSummaryTests(TestCase):
+    """With all of a student's rows inside the term, a card agrees with the summary endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("student")
+        cls.math, cls.physics, cls.art = (Subject.objects.create(code = code, name = name) for code, name in (("MA", "Math"), ("PH", "Physics"), ("AR", "Art")))
+        for subject in (cls.math, cls.physics, cls.art):
+            Enrollment.objects.create(user = cls.student, subject = subject)
+        for subject, value, credits in ((cls.math, 90, 2), (cls.math, 65, 1), (cls.math, 71, None), (cls.physics, 48, 3), (cls.art, 100, None)):
+            Grade.objects.create(user = cls.student, subject = subject, value = value, credits = credits)
+        statuses = [Attendance.PRESENT, Attendance.ABSENT, Attendance.PRESENT, Attendance.LATE, Attendance.EXCUSED]
+        for i, status in enumerate(statuses):
+            Attendance.objects.create(user = cls.student, subject = cls.math, date = date.today() - timedelta(days = i), status = status)
+        Attendance.objects.create(user = cls.student, subject = cls.physics, date = date.today(), status = Attendance.ABSENT)
+        # no sessions of Art
+
+    def summary(self, user, name):
+        api = APIClient()
+        api.force_authenticate(user)
+        response = api.get(f"/api/{name}/summary/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def card(self, user):
+        [card] = report_cards.compute(date.today() - timedelta(days = 30), date.today(), users = [user.pk])
+        return card
+
+    def test_card_matches_the_summaries(self):
+        card, grades, attendance = self.card(self.student), self.summary(self.student, "grades"), self.summary(self.student, "attendance")
+        self.assertEqual((card["avg"], card["gpa"]), (grades["avg"], grades["gpa"]))
+        self.assertEqual(card["present_percent"], attendance["present_percent"])
+
+        rows = {row["subject"]: row for row in card["by_subject"]}
+        self.assertEqual(
+            {s["subject"]: (s["avg"], s["gpa"], s["count"]) for s in grades["by_subject"]},
+            {name: (row["avg"], row["gpa"], row["grades"]) for name, row in rows.items()},
+        )
+        self.assertEqual(
+            {s["subject"]: (s["percent"], s["total"]) for s in attendance["by_subject"]},
+            {name: (row["present_percent"], row["sessions"]) for name, row in rows.items() if row["sessions"]},
+        )
+
+    def test_no_sessions_is_none_on_the_card_and_zero_in_the_summary(self):
+        self.assertEqual([row["present_percent"] for row in self.card(self.student)["by_subject"] if row["subject"] == "Art"], [None])
+
+        newcomer = User.objects.create_user("newcomer")
+        Enrollment.objects.create(user = newcomer, subject = self.art)
+        self.assertIsNone(self.card(newcomer)["present_percent"])
+        self.assertEqual(self.summary(newcomer, "attendance")["present_percent"], 0.0)
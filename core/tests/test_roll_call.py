@@ -0,0 +1,74 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import rollups
+from core.models import Subject, Attendance, AttendanceRollup, Enrollment
+from core.serializers import RollCallSerializer
+
+User = get_user_model()
+
+DAY = date(2025, 3, 10)
+
+
+def _rollups(rows):
+    return sorted((r.user_id, r.subject_id, r.month, r.present, r.absent, r.late, r.excused) for r in rows)
+
+
+class RollCallTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("teacher")
+        cls.subject = Subject.objects.create(code = "MA", name = "Math")
+        Enrollment.objects.create(user = cls.teacher, subject = cls.subject, role = Enrollment.TEACHER)
+        cls.students = [User.objects.create_user(f"student{i}") for i in range(4)]
+        for s in cls.students:
+            Enrollment.objects.create(user = s, subject = cls.subject, role = Enrollment.STUDENT)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.teacher)
+
+    def post(self, statuses, day = DAY):
+        records = [{"user": u.pk, "status": st} for u, st in statuses]
+        return self.api.post(reverse("attendance-roll-call"), {"subject": self.subject.pk, "date": day.isoformat(), "records": records}, format = "json")
+
+    def assertRollupsMatchRawRows(self):
+        self.assertEqual(_rollups(AttendanceRollup.objects.all()), _rollups(rollups.compute_attendance_rollups()))
+
+    def test_inserts_and_updates_keep_rollups_in_sync(self):
+        a, b, c, d = self.students
+        # an earlier mark this month gives `a` an existing rollup row
+        Attendance.objects.create(user = a, subject = self.subject, date = DAY.replace(day = 3), status = Attendance.LATE)
+
+        response = self.post([(a, Attendance.PRESENT), (b, Attendance.ABSENT), (c, Attendance.PRESENT)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"inserted": 3, "updated": 0, "rejected": 0, "rejected_users": []})
+        self.assertRollupsMatchRawRows()
+
+        response = self.post([(a, Attendance.EXCUSED), (b, Attendance.ABSENT), (d, Attendance.LATE), (self.teacher, Attendance.PRESENT)])
+        self.assertEqual(response.data, {"inserted": 1, "updated": 2, "rejected": 1, "rejected_users": [self.teacher.pk]})
+        self.assertRollupsMatchRawRows()
+        self.assertEqual(AttendanceRollup.objects.get(user = a).total, 2)
+
+    def test_rollup_rows_created_concurrently_are_incremented(self):
+        a, b = self.students[:2]
+        AttendanceRollup.objects.create(user = a, subject = self.subject, month = DAY.replace(day = 1), late = 1)
+        # the rollup read misses `a`'s row, as if another transaction inserted it right after
+        with mock.patch("core.rollups.set", create = True, side_effect = lambda rows: set()):
+            rollups.apply_attendance_changes([(a.pk, self.subject.pk, DAY, None, Attendance.PRESENT), (b.pk, self.subject.pk, DAY, None, Attendance.ABSENT)])
+        self.assertEqual(
+            _rollups(AttendanceRollup.objects.all()),
+            [(a.pk, self.subject.pk, DAY.replace(day = 1), 1, 0, 1, 0), (b.pk, self.subject.pk, DAY.replace(day = 1), 0, 1, 0, 0)],
+        )
+
+    def test_record_count_is_capped(self):
+        too_many = [(self.students[0], Attendance.PRESENT)] * (RollCallSerializer.MAX_RECORDS + 1)
+        response = self.post(too_many)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("records", response.data)
+        self.assertFalse(Attendance.objects.exists())
@@ -0,0 +1,109 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import rollups
+from core.models import Subject, Grade, Attendance, GradeRollup, AttendanceRollup
+
+User = get_user_model()
+
+
+def _grade_rollups(rows):
+    return sorted((r.user_id, r.subject_id, r.count, r.value_sum, r.weighted_sum, r.credit_sum) for r in rows)
+
+
+def _attendance_rollups(rows):
+    return sorted((r.user_id, r.subject_id, r.month, r.present, r.absent, r.late, r.excused) for r in rows)
+
+
+class RollupSignalTests(TestCase):
+    """Every write through the model signals leaves the rollups equal to a recomputation from the raw rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann, cls.bob = User.objects.create_user("ann"), User.objects.create_user("bob")
+        cls.math = Subject.objects.create(code = "MA", name = "Math")
+        cls.physics = Subject.objects.create(code = "PH", name = "Physics")
+
+    def assertGradeRollupsExact(self):
+        self.assertEqual(_grade_rollups(GradeRollup.objects.all()), _grade_rollups(rollups.compute_grade_rollups()))
+
+    def assertAttendanceRollupsExact(self):
+        self.assertEqual(_attendance_rollups(AttendanceRollup.objects.all()), _attendance_rollups(rollups.compute_attendance_rollups()))
+
+    def test_grade_insert_update_move_delete(self):
+        first = Grade.objects.create(user = self.ann, subject = self.math, value = 80, credits = 2)
+        second = Grade.objects.create(user = self.ann, subject = self.math, value = 90)
+        Grade.objects.create(user = self.bob, subject = self.math, value = 70, credits = 1)
+        self.assertGradeRollupsExact()
+
+        first.value, first.credits = 85, None
+        first.save()
+        self.assertGradeRollupsExact()
+
+        second.subject = self.physics
+        second.save()
+        self.assertGradeRollupsExact()
+
+        second.user = self.bob
+        second.save()
+        self.assertGradeRollupsExact()
+
+        first.delete()
+        second.delete()
+        self.assertGradeRollupsExact()
+        self.assertFalse(GradeRollup.objects.filter(user = self.ann).exists())
+
+    def test_float_sums_do_not_drift_across_deletes(self):
+        grades = [Grade.objects.create(user = self.ann, subject = self.math, value = v, credits = 0.1) for v in (0.1, 0.2, 0.7)]
+        for g in grades[1:]:
+            g.delete()
+        rollup = GradeRollup.objects.get()
+        self.assertEqual((rollup.count, rollup.value_sum, rollup.weighted_sum, rollup.credit_sum), (1, 0.1, 0.1 * 0.1, 0.1))
+
+    def test_attendance_insert_update_move_delete(self):
+        mark = Attendance.objects.create(user = self.ann, subject = self.math, date = date(2025, 3, 10), status = Attendance.PRESENT)
+        Attendance.objects.create(user = self.ann, subject = self.math, date = date(2025, 3, 11), status = Attendance.LATE)
+        Attendance.objects.create(user = self.bob, subject = self.math, date = date(2025, 3, 10), status = Attendance.ABSENT)
+        self.assertAttendanceRollupsExact()
+
+        mark.status = Attendance.EXCUSED
+        mark.save()
+        self.assertAttendanceRollupsExact()
+
+        mark.date = date(2025, 4, 1)
+        mark.save()
+        self.assertAttendanceRollupsExact()
+
+        mark.subject = self.physics
+        mark.save()
+        self.assertAttendanceRollupsExact()
+
+        mark.delete()
+        self.assertAttendanceRollupsExact()
+
+    def test_writes_repair_drifted_rollups(self):
+        mark = Attendance.objects.create(user = self.ann, subject = self.math, date = date(2025, 3, 10), status = Attendance.PRESENT)
+        grade = Grade.objects.create(user = self.ann, subject = self.math, value = 80)
+        # queryset writes skip the signals, so the rollups fall behind
+        AttendanceRollup.objects.update(present = 0, absent = 1)
+        GradeRollup.objects.update(count = 0, value_sum = 1.5)
+
+        mark.status = Attendance.LATE
+        mark.save()
+        grade.delete()
+        self.assertAttendanceRollupsExact()
+        self.assertGradeRollupsExact()
+        mark.delete()
+        self.assertAttendanceRollupsExact()
+
+    def test_bulk_changes_repair_drifted_rollups(self):
+        marks = [
+            Attendance.objects.create(user = u, subject = self.math, date = date(2025, 3, 10), status = Attendance.PRESENT)
+            for u in (self.ann, self.bob)
+        ]
+        AttendanceRollup.objects.filter(user = self.ann).update(present = 0)   # drifted
+        Attendance.objects.filter(pk__in = [m.pk for m in marks]).update(status = Attendance.ABSENT)
+        rollups.apply_attendance_changes([(m.user_id, m.subject_id, m.date, Attendance.PRESENT, Attendance.ABSENT) for m in marks])
+        self.assertAttendanceRollupsExact()
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core import search
+from core.models import Subject, Enrollment, Announcement
+
+User = get_user_model()
+
+HIDDEN = 1200
+
+
+class IndexedSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mine, other = Subject.objects.create(code = "MINE", name = "Chemistry"), Subject.objects.create(code = "OTHER", name = "History")
+        cls.student = User.objects.create_user("student")
+        cls.staff = User.objects.create_user("staff", is_staff = True)
+        Enrollment.objects.create(user = cls.student, subject = mine)
+        hidden = Announcement.objects.bulk_create(Announcement(subject = other, title = f"Quiz {i}", body = "-") for i in range(HIDDEN))
+        search.index_documents(hidden)
+        cls.body, cls.title, cls.both = [
+            Announcement.objects.create(subject = mine, title = title, body = body)
+            for title, body in (("Lab", "bring notes for the quiz"), ("Quiz", "-"), ("Quiz", "a quiz on chapter 3"))
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, user, **params):
+        api = APIClient()
+        api.force_authenticate(user)
+        response = api.get("/api/announcements/", {"page_size": 100, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_visibility_applies_before_any_limit(self):
+        data = self.get(self.student, search = "quiz")
+        self.assertEqual(data["count"], 3)
+        self.assertEqual([a["id"] for a in data["results"]], [self.both.pk, self.title.pk, self.body.pk])
+        self.assertEqual(self.get(self.staff, search = "quiz")["count"], HIDDEN + 3)
+
+    def test_short_terms_match_whole_tokens_only(self):
+        self.assertEqual(self.get(self.student, search = "qui")["count"], 3)
+        self.assertEqual(self.get(self.student, search = "qu")["count"], 0)
+        self.assertEqual(self.get(self.student, search = "quiz chem")["count"], 3)
+        self.assertEqual(self.get(self.student, search = "quiz notes")["count"], 1)
+
+    def test_search_runs_inside_the_listing_queries(self):
+        api = APIClient()
+        api.force_authenticate(self.student)
+        api.get("/api/announcements/")  # warm the enrolled-subjects cache
+        with self.assertNumQueries(3):   # validators, COUNT, page
+            api.get("/api/announcements/")
+        with self.assertNumQueries(4):   # plus the visible-id probe
+            api.get("/api/announcements/", {"search": "quiz"})
+
+    def test_few_visible_documents_rank_like_the_corpus_wide_match(self):
+        for text in ("quiz", "quiz notes", "chem qui"):
+            with self.subTest(text):
+                by_id = self.get(self.student, search = text)["results"]
+                with mock.patch.object(search, "VISIBLE_PROBE", 0):
+                    corpus_wide = self.get(self.student, search = text)["results"]
+                self.assertEqual(by_id, corpus_wide)
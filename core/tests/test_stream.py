@@ -0,0 +1,202 @@
+import json
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import stream
+from core.models import Subject, Grade, Announcement
+
+User = get_user_model()
+
+ORIGIN = b"http://localhost:5173"
+
+
+@async_to_sync
+async def _open(query = b"", method = "GET", headers = ()):
+    """(status, headers) of the stream's response start; an opened stream is disconnected again."""
+    scope = {
+        "type": "http", "method": method, "path": stream.STREAM_PATH, "query_string": query,
+        "headers": [(b"origin", ORIGIN), *headers],
+    }
+    app = ApplicationCommunicator(stream.event_stream, scope)
+    await app.send_input({"type": "http.request", "body": b""})
+    start = await app.receive_output(5)
+    if start["status"] == 200 and method == "GET":
+        await app.receive_output(5)   # the retry: preamble
+    await app.send_input({"type": "http.disconnect"})
+    await app.wait(5)
+    return start["status"], dict(start["headers"])
+
+
+class StreamAccessTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("student")
+
+    def ticket(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        response = api.post("/api/stream/ticket/")
+        self.assertEqual(response.status_code, 201)
+        return response.data["ticket"].encode()
+
+    def test_ticket_opens_one_stream_with_cors_headers(self):
+        ticket = self.ticket()
+        status, headers = _open(b"ticket=" + ticket)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"access-control-allow-origin"], ORIGIN)
+        self.assertEqual(headers[b"vary"], b"origin")
+
+        status, headers = _open(b"ticket=" + ticket)
+        self.assertEqual(status, 401)
+        self.assertEqual(headers[b"access-control-allow-origin"], ORIGIN)
+
+    def test_expired_or_forged_tickets_and_query_tokens_are_refused(self):
+        ticket = self.ticket()
+        with override_settings(STREAM_TICKET_SECONDS = -1):
+            self.assertEqual(_open(b"ticket=" + ticket)[0], 401)
+        self.assertEqual(_open(b"ticket=" + ticket[:-2])[0], 401)
+        self.assertEqual(_open(b"access_token=" + str(AccessToken.for_user(self.user)).encode())[0], 401)
+
+    def test_bearer_header_still_works(self):
+        status, _ = _open(headers = [(b"authorization", b"Bearer " + str(AccessToken.for_user(self.user)).encode())])
+        self.assertEqual(status, 200)
+
+    def test_origins_outside_the_allow_list_get_no_cors_headers(self):
+        with override_settings(CORS_ALLOWED_ORIGINS = ["https://app.example.com"]):
+            status, headers = _open(b"ticket=" + self.ticket())
+        self.assertEqual(status, 200)
+        self.assertNotIn(b"access-control-allow-origin", headers)
+
+    def test_preflight(self):
+        status, headers = _open(method = "OPTIONS", headers = [(b"access-control-request-method", b"GET")])
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"access-control-allow-origin"], ORIGIN)
+        self.assertIn(b"GET", headers[b"access-control-allow-methods"])
+
+
+def _events(body):
+    """The blocks of a stream chunk as dicts of their fields; comments and `retry:` are left out."""
+    blocks = []
+    for block in body.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith((":", "retry")))
+        if fields:
+            blocks.append(fields)
+    return blocks
+
+
+class StreamDeliveryTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("student")
+        self.other = User.objects.create_user("other")
+        self.math = Subject.objects.create(code = "MA", name = "Math")
+
+    async def connect(self, last_event_id = None):
+        """(communicator, blocks sent before any live event) for a stream of self.user."""
+        headers = [(b"authorization", b"Bearer " + str(AccessToken.for_user(self.user)).encode())]
+        if last_event_id is not None:
+            headers.append((b"last-event-id", last_event_id.encode()))
+        app = ApplicationCommunicator(stream.event_stream, {
+            "type": "http", "method": "GET", "path": stream.STREAM_PATH, "query_string": b"", "headers": headers,
+        })
+        await app.send_input({"type": "http.request", "body": b""})
+        self.assertEqual((await app.receive_output(5))["status"], 200)
+        return app, _events((await app.receive_output(5))["body"])
+
+    async def receive(self, app):
+        """The next blocks, past any keepalives."""
+        while True:
+            blocks = _events((await app.receive_output(5))["body"])
+            if blocks:
+                return blocks
+
+    async def close(self, app):
+        await app.send_input({"type": "http.disconnect"})
+        await app.wait(5)
+
+    def grade(self, user = None, **kwargs):
+        return Grade.objects.create(user = user or self.user, subject = self.math, value = 90, **kwargs)
+
+    async def test_live_events_reach_only_their_user(self):
+        app, backlog = await self.connect()
+        self.assertEqual(backlog, [])
+        await sync_to_async(self.grade)(self.other)
+        mine = await sync_to_async(self.grade)()
+        announcement = await sync_to_async(Announcement.objects.create)(title = "General", body = "-")
+
+        [event] = await self.receive(app)
+        self.assertEqual((event["event"], json.loads(event["data"])["id"]), ("grade", mine.pk))
+        [event] = await self.receive(app)
+        self.assertEqual((event["event"], json.loads(event["data"])["id"]), ("announcement", announcement.pk))
+        await self.close(app)
+
+    async def test_resume_sends_what_was_missed_once(self):
+        app, _ = await self.connect()
+        first = await sync_to_async(self.grade)()
+        [event] = await self.receive(app)
+        await self.close(app)
+
+        missed = [await sync_to_async(self.grade)() for _ in range(2)]
+        app, backlog = await self.connect(event["id"])
+        self.assertEqual([json.loads(e["data"])["id"] for e in backlog], [g.pk for g in missed])
+        self.assertNotIn(first.pk, [json.loads(e["data"])["id"] for e in backlog])
+        await self.close(app)
+
+    async def test_a_row_committing_after_a_higher_id_is_not_skipped_on_resume(self):
+        base = (await sync_to_async(self.grade)()).pk
+        app, _ = await self.connect()
+        # id base + 1 is taken by a transaction that has not committed yet; base + 2 commits first
+        await sync_to_async(self.grade)(id = base + 2)
+        [event] = await self.receive(app)
+        self.assertEqual(event["id"], f"0:{base}.{base + 2}")
+        await self.close(app)
+
+        late = await sync_to_async(self.grade)(id = base + 1)
+        app, backlog = await self.connect(event["id"])
+        self.assertEqual([json.loads(e["data"])["id"] for e in backlog], [late.pk])
+        self.assertEqual(backlog[-1]["id"], f"0:{base}.{base + 1}.{base + 2}")
+        await self.close(app)
+
+    async def test_settled_cursor_is_pushed_on_the_heartbeat(self):
+        with override_settings(STREAM_HEARTBEAT_SECONDS = 0.05):
+            app, _ = await self.connect()
+            grade = await sync_to_async(self.grade)()
+            [event] = await self.receive(app)
+            with override_settings(STREAM_COMMIT_GRACE_SECONDS = 0):
+                self.assertEqual(await self.receive(app), [{"id": f"0:{grade.pk}"}])
+            await self.close(app)
+        self.assertEqual(event["id"], f"0:0.{grade.pk}")
+
+
+class CursorTests(TransactionTestCase):
+    def test_parse(self):
+        self.assertEqual(str(stream.Cursor.parse("3:7")), "3:7")
+        self.assertEqual(str(stream.Cursor.parse("3.5.4:7")), "3.4.5:7")
+        for value in (None, "", "3", "3:7:1", "a:7", "3.:7"):
+            with self.subTest(value):
+                self.assertIsNone(stream.Cursor.parse(value))
+
+    def test_floor_passes_ids_only_once_their_rows_are_old_enough(self):
+        cursor = stream.Cursor((0, 10))
+        now = time.time()
+        with override_settings(STREAM_COMMIT_GRACE_SECONDS = 60):
+            cursor.add("grade", 12, now - 61)
+            cursor.add("grade", 14, now - 5)
+            cursor.add("grade", 9, now - 5)   # below the floor: already given up on
+            self.assertEqual(str(cursor.settle(now)), "0:12.14")
+            self.assertEqual(str(cursor.settle(now + 60)), "0:14")
+
+    def test_pending_ids_are_capped(self):
+        cursor = stream.Cursor((0, 0))
+        for pk in range(1, 101):
+            cursor.add("announcement", pk, time.time())
+        with mock.patch.object(stream, "MAX_PENDING", 3):
+            self.assertEqual(str(cursor.settle()), "97.98.99.100:0")
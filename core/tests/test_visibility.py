@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core import visibility
+from core.models import Subject, Enrollment
+
+User = get_user_model()
+
+
+@override_settings(CACHE_SINGLE_PROCESS = True)
+class EnrolledSubjectsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("student")
+        self.subject = Subject.objects.create(code = "S1", name = "Subject")
+
+    def test_enrollment_changes_evict_on_commit(self):
+        self.assertEqual(visibility.enrolled_subject_ids(self.user), ())
+        with self.captureOnCommitCallbacks() as callbacks:
+            enrollment = Enrollment.objects.create(user = self.user, subject = self.subject)
+        # not evicted yet: a concurrent request would still have seen the old rows
+        self.assertEqual(visibility.enrolled_subject_ids(self.user), ())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(visibility.enrolled_subject_ids(self.user), (self.subject.pk,))
+
+        with self.captureOnCommitCallbacks(execute = True):
+            enrollment.delete()
+        self.assertEqual(visibility.enrolled_subject_ids(self.user), ())
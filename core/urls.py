@@ -3,7 +3,8 @@ from django.urls import path
 
 
 from rest_framework.routers import DefaultRouter
-from .views import SubjectViewSet, AssignmentViewSet, GradeViewSet, AttendanceViewSet, EventViewSet, register, me, EnrollmentViewSet, AnnouncementViewSet, dashboard
+from . import async_views
+from .views import SubjectViewSet, AssignmentViewSet, GradeViewSet, AttendanceViewSet, EventViewSet, register, me, EnrollmentViewSet, AnnouncementViewSet, JobViewSet, dashboard, metrics_endpoint, stream_ticket
 
 router = DefaultRouter()
 router.register(r"subjects", SubjectViewSet, basename = "subject")
@@ -13,9 +14,19 @@ router.register(r"attendance", AttendanceViewSet, basename = "attendance")
 router.register(r"events", EventViewSet, basename = "event")
 router.register(r"enrollments", EnrollmentViewSet, basename = "enrollment")
 router.register(r"announcements", AnnouncementViewSet, basename = "announcement")
+router.register(r"jobs", JobViewSet, basename = "job")
 
 urlpatterns = router.urls + [
     path("auth/register/", register, name = "register"),
     path("auth/me/", me, name = "me"),
     path("dashboard/", dashboard, name = "dashboard"),
+    path("stream/ticket/", stream_ticket, name = "stream-ticket"),
+    path("_metrics", metrics_endpoint, name = "metrics"),
+
+    # async (ASGI) read path; same responses as the endpoints above
+    path("async/dashboard/", async_views.dashboard, name = "async-dashboard"),
+    path("async/assignments/", async_views.assignments, name = "async-assignments"),
+    path("async/grades/", async_views.grades, name = "async-grades"),
+    path("async/attendance/", async_views.attendance, name = "async-attendance"),
+    path("async/announcements/", async_views.announcements, name = "async-announcements"),
 ]
\ No newline at end of file
@@ -1,39 +1,54 @@
 import pickle
 from http.client import responses
 
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from django.shortcuts import render
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
 from rest_framework import viewsets, permissions
 from django.utils import timezone
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils.dateparse import parse_date, parse_datetime
-from datetime import datetime, time as dtime
+from datetime import datetime, timedelta, time as dtime
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.authentication import BaseAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework import filters
-from django.db import IntegrityError
+from django.db import IntegrityError, connection, transaction
 from rest_framework import serializers
-from django.db.models import Q
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.parsers import MultiPartParser
+from django.db.models import Q, F, Sum, Count
+from django.db.models.functions import TruncDate, TruncDay, TruncWeek, TruncMonth
 from drf_spectacular import types as spectacular_types
 
+from . import class_analytics, dashboard_cache, exports, fast_serializers, freebusy, grade_import, jobs, metrics, recurrence, search, stream, visibility
+from .conditional import ConditionalListMixin, not_modified, set_validators
+from .fast_serializers import FastListMixin
+from .rollups import apply_attendance_changes
 from .admin import AssignmentAdmin
-from .models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement
-from .serializers import SubjectSerializer, AssignmentSerializer, GradeSerializer, AttendanceSerializer, EventSerializer, RegisterSerializer, EnrollmentSerializer, AnnouncementSerializer, DashboardOut
+from .models import Subject, Assignment, Grade, Attendance, Event, Enrollment, Announcement, GradeRollup, AttendanceRollup, Job
+from .serializers import SubjectSerializer, AssignmentSerializer, GradeSerializer, AttendanceSerializer, EventSerializer, RegisterSerializer, EnrollmentSerializer, AnnouncementSerializer, DashboardOut, RollCallSerializer, RollCallResultSerializer, GradeImportSerializer, GradeImportResultSerializer, EventCalendarSerializer, FreeBusyQuerySerializer, FreeBusyResultSerializer, JobSerializer, JobCreateSerializer, TermReportArgsSerializer, ClassAnalyticsQuerySerializer, ClassAnalyticsSerializer, StreamTicketSerializer
 
-class SubjectViewSet (viewsets.ReadOnlyModelViewSet):
+class SubjectViewSet (ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Subject.objects.all().order_by("name")
     serializer_class = SubjectSerializer
     permission_classes = [AllowAny]
 
-class AssignmentViewSet (viewsets.ReadOnlyModelViewSet):
+class AssignmentViewSet (ConditionalListMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
+    fast_columns = fast_serializers.ASSIGNMENT
+    validator_timestamps = ("updated_at", "subject__updated_at")
     serializer_class = AssignmentSerializer
     permission_classes = [AllowAny]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["title", "description", "subject__name"]
+    filter_backends = [filters.OrderingFilter, search.IndexedSearchFilter]
     ordering_fields = ["due_at", "created_at"]
+    cursor_ordering = ("due_at", "id")
 
     def get_queryset(self):
         qs = Assignment.objects.select_related("subject").order_by("due_at")
@@ -48,13 +63,15 @@ class AssignmentViewSet (viewsets.ReadOnlyModelViewSet):
 
 
 
-class GradeViewSet(viewsets.ReadOnlyModelViewSet):
+class GradeViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
+    fast_columns = fast_serializers.GRADE
     queryset = Grade.objects.none()
     serializer_class = GradeSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["subject__name"]
     ordering_fields = ["graded_at", "value"]
+    cursor_ordering = ("-graded_at", "id")
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
@@ -75,29 +92,126 @@ class GradeViewSet(viewsets.ReadOnlyModelViewSet):
         return qs
 
 
+    def _summary_rows(self):
+        p = self.request.query_params
+        if p.get("min") or p.get("max"):
+            # value filters need the raw rows
+            return (
+                self.get_queryset()
+                .order_by()
+                .values("subject__name")
+                .annotate(
+                    total = Sum("value"),
+                    count = Count("id"),
+                    weighted = Sum(F("value") * F("credits"), filter = Q(credits__isnull = False)),
+                    credits = Sum("credits"),
+                )
+            )
+
+        qs = GradeRollup.objects.all()
+        if not self.request.user.is_superuser:
+            qs = qs.filter(user = self.request.user)
+        if p.get("subject"):
+            qs = qs.filter(subject_id = p["subject"])
+        return qs.values("subject__name").annotate(
+            total = Sum("value_sum"),
+            count = Sum("count"),
+            weighted = Sum("weighted_sum"),
+            credits = Sum("credit_sum"),
+        )
+
     @action(detail = False, methods = ["GET"])
     def summary(self, request):
-
-        qs = self.get_queryset()
-        count = qs.count()
+        # one grouped query; the overall figures are folded from the per-subject rows
+        rows = self._summary_rows().order_by("subject__name")
+
+        count = total = weighted = credits = 0
+        by_subject = []
+        for r in rows:
+            count += r["count"]
+            total += r["total"]
+            weighted += r["weighted"] or 0
+            credits += r["credits"] or 0
+            by_subject.append({
+                "subject": r["subject__name"],
+                "avg": round(r["total"] / r["count"], 2),
+                "count": r["count"],
+                "gpa": round(r["weighted"] / r["credits"], 2) if r["credits"] else None,
+            })
         if count == 0:
-            return Response({"count": 0, "avg": None, "by_subject": []})
-        avg = round(sum(g.value for g in qs) / count, 2)
-
-        by_subj = {}
-        for g in qs:
-            by_subj.setdefault(g.subject.name, []).append(g.value)
-        by_subject = [
-            {"subject": s, "avg": round(sum(vals)/len(vals), 2), "count": len(vals)}
-            for s, vals in by_subj.items()
-        ]
-        return Response ({"count": count, "avg": avg, "by_subject": by_subject})
+            return Response({"count": 0, "avg": None, "gpa": None, "by_subject": []})
+        return Response({
+            "count": count,
+            "avg": round(total / count, 2),
+            "gpa": round(weighted / credits, 2) if credits else None,
+            "by_subject": by_subject,
+        })
+
+
+    @extend_schema(parameters = [ClassAnalyticsQuerySerializer], responses = {200: ClassAnalyticsSerializer})
+    @action(detail = False, methods = ["GET"])
+    def analytics(self, request):
+        """One subject's class: distribution of student averages, and each student's rank and percentile."""
+        query = ClassAnalyticsQuerySerializer(data = request.query_params)
+        query.is_valid(raise_exception = True)
+        subject = query.validated_data["subject"]
+
+        user = request.user
+        if not user.is_staff and not Enrollment.objects.filter(user = user, subject = subject, role = Enrollment.TEACHER).exists():
+            raise PermissionDenied("Only staff or teachers of this subject can see class analytics.")
+
+        data, hit = class_analytics.get(subject.pk)
+        response = Response(data)
+        response["X-Analytics-Cache"] = "hit" if hit else "miss"
+        return response
+
+
+    EXPORT_COLUMNS = [
+        ("id", "id"),
+        ("user", "user_id"),
+        ("user_name", "user__username"),
+        ("subject", "subject_id"),
+        ("subject_name", "subject__name"),
+        ("value", "value"),
+        ("credits", "credits"),
+        ("graded_at", "graded_at", exports.as_datetime),
+    ]
+
+    @extend_schema(responses = {200: OpenApiResponse(description = "CSV (default) or NDJSON stream; choose with ?as=csv|ndjson")})
+    @action(detail = False, methods = ["GET"])
+    def export(self, request):
+        qs = self.filter_queryset(self.get_queryset())
+        return exports.stream_export(qs, self.EXPORT_COLUMNS, request.query_params.get("as", "csv"), "grades")
 
 
-class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
+    @extend_schema(
+        request = {"multipart/form-data": GradeImportSerializer},
+        responses = {200: GradeImportResultSerializer},
+        description = "Staff only. Import a CSV/XLSX of username, subject (code), value, credits.",
+    )
+    @action(detail = False, methods = ["POST"], url_path = "import", parser_classes = [MultiPartParser])
+    def import_grades(self, request):
+        if not request.user.is_staff:
+            raise PermissionDenied("Only staff can import grades.")
+        payload = GradeImportSerializer(data = request.data)
+        payload.is_valid(raise_exception = True)
+        upload = payload.validated_data["file"]
+        try:
+            result = grade_import.import_grades(
+                grade_import.read_rows(upload, upload.name),
+                dry_run = payload.validated_data["dry_run"],
+            )
+        except grade_import.ImportFileError as e:
+            raise serializers.ValidationError({"file": str(e)})
+        return Response(result)
+
+
+class AttendanceViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
+    fast_columns = fast_serializers.ATTENDANCE
     queryset = Attendance.objects.none()
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ("-date", "id")
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
@@ -116,21 +230,61 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
         if p.get("end"): qs = qs.filter(date__lte = parse_date(p["end"]))
         return qs.order_by ("-date")
 
+    BUCKETS = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+
+    def _summary_rows(self, bucket, statuses):
+        p = self.request.query_params
+        group_by = ["subject__name"]
+        if bucket:
+            group_by.append("period")
+
+        if bucket in (None, "month") and not any(p.get(k) for k in ("status", "start", "end")):
+            # monthly rollups answer this without touching raw attendance
+            qs = AttendanceRollup.objects.all()
+            if not self.request.user.is_superuser:
+                qs = qs.filter(user = self.request.user)
+            if p.get("user"): qs = qs.filter(user_id = p["user"])
+            if p.get("subject"): qs = qs.filter(subject_id = p["subject"])
+            fields = [s.lower() for s in statuses]
+            return qs.annotate(period = F("month")).values(*group_by).annotate(
+                total = Sum(sum((F(f) for f in fields[1:]), F(fields[0]))),
+                **{f: Sum(f) for f in fields},
+            )
+
+        qs = self.get_queryset().order_by()
+        if bucket:
+            qs = qs.annotate(period = self.BUCKETS[bucket]("date"))
+        return qs.values(*group_by).annotate(
+            total = Count("id"),
+            **{s.lower(): Count("id", filter = Q(status = s)) for s in statuses},
+        )
+
     @action(detail = False, methods = ["GET"])
     def summary(self, request):
-        qs = self.get_queryset()
-        total = qs.count()
-        counts = {s: 0 for s in ["PRESENT", "ABSENT", "LATE", "EXCUSED"]}
-        for a in qs:
-            counts[a.status] += 1
+        bucket = request.query_params.get("bucket")
+        if bucket and bucket not in self.BUCKETS:
+            raise serializers.ValidationError({"bucket": "Must be one of: day, week, month."})
+
+        statuses = [s for s, _ in Attendance.STATUS_CHOICES]
+        rows = self._summary_rows(bucket, statuses)
+
+        # single pass over the grouped rows (O(subjects x buckets), not O(attendance))
+        total = 0
+        counts = {s: 0 for s in statuses}
+        by_subject, by_bucket = {}, {}
+        for r in rows:
+            total += r["total"]
+            for s in statuses:
+                counts[s] += r[s.lower()]
+            d = by_subject.setdefault(r["subject__name"], {"present": 0, "total": 0})
+            d["present"] += r["present"]
+            d["total"] += r["total"]
+            if bucket:
+                b = by_bucket.setdefault(r["period"], {s: 0 for s in statuses})
+                for s in statuses:
+                    b[s] += r[s.lower()]
         present_pct = round((counts["PRESENT"] / total) * 100, 2) if total else 0.0
 
-        by_subject = {}
-        for a in qs:
-            d = by_subject.setdefault(a.subject.name, {"present": 0, "total": 0})
-            d["total"] += 1
-            if a.status == "PRESENT":
-                d["present"] += 1
         per_subject = [
             {
                 "subject": s,
@@ -138,26 +292,89 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
                 "total": v["total"],
                 "percent": round((v["present"] / v["total"])*100, 2) if v["total"] else 0.0,
             }
-            for s, v in by_subject.items()
+            for s, v in sorted(by_subject.items())
         ]
 
-        return Response({
+        data = {
             "total": total,
             "counts": counts,
             "present_percent": present_pct,
             "by_subject": per_subject
+        }
+        if bucket:
+            data["bucket"] = bucket
+            data["by_bucket"] = [
+                {"period": period.isoformat(), "total": sum(v.values()), "counts": v}
+                for period, v in sorted(by_bucket.items())
+            ]
+        return Response(data)
+
+    @extend_schema(request = RollCallSerializer, responses = {200: RollCallResultSerializer})
+    @action(detail = False, methods = ["POST"], url_path = "roll-call")
+    def roll_call(self, request):
+        """Upsert one subject's attendance for one date; students not enrolled in it are rejected."""
+        payload = RollCallSerializer(data = request.data)
+        payload.is_valid(raise_exception = True)
+        subject = payload.validated_data["subject"]
+        day = payload.validated_data["date"]
+
+        user = request.user
+        if not user.is_staff and not Enrollment.objects.filter(user = user, subject = subject, role = Enrollment.TEACHER).exists():
+            raise PermissionDenied("Only staff or teachers of this subject can take roll call.")
+
+        # last entry per student wins; enrollment is checked once for the whole class
+        statuses = {r["user"]: r["status"] for r in payload.validated_data["records"]}
+        students = set(Enrollment.objects.filter(subject = subject, role = Enrollment.STUDENT).values_list("user_id", flat = True))
+        rejected = sorted(uid for uid in statuses if uid not in students)
+        accepted = {uid: st for uid, st in statuses.items() if uid in students}
+
+        conflict = {"unique_fields": ["user", "subject", "date"]} if connection.features.supports_update_conflicts_with_target else {}
+        with transaction.atomic():
+            existing = dict(Attendance.objects.filter(subject = subject, date = day).values_list("user_id", "status"))
+            # rows whose status is unchanged are counted as updated but not rewritten
+            changed = [uid for uid, st in accepted.items() if existing.get(uid) != st]
+            Attendance.objects.bulk_create(
+                [Attendance(user_id = uid, subject = subject, date = day, status = accepted[uid]) for uid in changed],
+                update_conflicts = True, update_fields = ["status"], **conflict,
+            )
+            apply_attendance_changes([(uid, subject.id, day, existing.get(uid), accepted[uid]) for uid in changed])
+
+        updated = sum(1 for uid in accepted if uid in existing)
+        return Response({
+            "inserted": len(accepted) - updated,
+            "updated": updated,
+            "rejected": len(rejected),
+            "rejected_users": rejected,
         })
 
+    EXPORT_COLUMNS = [
+        ("id", "id"),
+        ("user", "user_id"),
+        ("user_name", "user__username"),
+        ("subject", "subject_id"),
+        ("subject_name", "subject__name"),
+        ("date", "date", exports.as_date),
+        ("status", "status"),
+    ]
+
+    @extend_schema(responses = {200: OpenApiResponse(description = "CSV (default) or NDJSON stream; choose with ?as=csv|ndjson")})
+    @action(detail = False, methods = ["GET"])
+    def export(self, request):
+        qs = self.filter_queryset(self.get_queryset())
+        return exports.stream_export(qs, self.EXPORT_COLUMNS, request.query_params.get("as", "csv"), "attendance")
+
 def _aware (dt: datetime) -> datetime:
     tz = timezone.get_current_timezone()
     if timezone.is_naive(dt):
         return timezone.make_aware(dt, tz)
     return dt.astimezone(tz)
 
-class EventViewSet(viewsets.ReadOnlyModelViewSet):
+class EventViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     """Minimal, robust events API."""
+    fast_columns = fast_serializers.EVENT
     permission_classes = [IsAuthenticated]
     serializer_class = EventSerializer
+    MAX_WINDOW_DAYS = 366
     queryset = Event.objects.select_related("owner", "subject").order_by("starts_at")
 
     def get_queryset(self):
@@ -178,13 +395,84 @@ class EventViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(subject_id=int(subject))
 
         if p.get("upcoming") == "true":
-            qs = qs.filter(starts_at__gte=timezone.now())
+            now = timezone.now()
+            qs = qs.filter(Q(starts_at__gte=now) | (Q(series_ends_at__gt=now) & ~Q(recurrence="")))
+
+        # overlap with [from, to), whole series for recurring events: served by the
+        # (owner, starts_at, series_ends_at) index
+        start, end = self._window()
+        if start is not None:
+            qs = qs.filter(series_ends_at__gt=start, starts_at__lt=end)
 
         return qs
 
+    def _window(self):
+        """
+        The [from, to) window asked for, or (None, None). Listing expands series into
+        their occurrences, so a window spans at most MAX_WINDOW_DAYS; a missing bound
+        is that far from the given one.
+        """
+        start, end = self._bound("from"), self._bound("to")
+        span = timedelta(days=self.MAX_WINDOW_DAYS)
+        if start is None and end is None:
+            return None, None
+        if start is None:
+            start = end - span
+        elif end is None:
+            end = start + span
+        elif end - start > span:
+            raise serializers.ValidationError({"to": f"The window can span at most {self.MAX_WINDOW_DAYS} days."})
+        return start, end
+
+    def _bound(self, name):
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return None
+        try:
+            value = parse_datetime(raw)
+            if value is None:
+                day = parse_date(raw)
+                value = datetime.combine(day, dtime.min) if day else None
+        except ValueError:
+            value = None
+        if value is None:
+            raise serializers.ValidationError({name: "Use an ISO 8601 date or datetime."})
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+    def list(self, request, *args, **kwargs):
+        start, end = self._window()
+        if start is None:
+            return super().list(request, *args, **kwargs)
+
+        # a window was asked for: recurring series are listed as their occurrences in it
+        rows = list(fast_serializers.to_values(self.filter_queryset(self.get_queryset()), self.fast_columns))
+        items = []
+        for row, item in zip(rows, fast_serializers.represent(rows, self.fast_columns)):
+            for occ_start, occ_end in recurrence.occurrences(row["starts_at"], row["ends_at"], row["recurrence"], row["exdates"], start, end):
+                items.append((occ_start, row["id"], {**item, "starts_at": exports.as_datetime(occ_start), "ends_at": exports.as_datetime(occ_end)}))
+        items.sort(key=lambda t: t[:2])
+        occurrences = [item for _, _, item in items]
+
+        page = self.paginate_queryset(occurrences)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(occurrences)
+
     @action(detail=False, methods=["GET"])
     def next(self, request):
-        obj = self.get_queryset().filter(starts_at__gte=timezone.now()).first()
+        now = timezone.now()
+        qs = self.get_queryset()
+        obj = qs.filter(recurrence="", starts_at__gte=now).first()
+
+        # a series can only win if it started before the next one-off event
+        series = qs.exclude(recurrence="").filter(series_ends_at__gt=now)
+        if obj is not None:
+            series = series.filter(starts_at__lt=obj.starts_at)
+        for event in series:
+            occ = next((o for o in event.occurrences(now) if o[0] >= now), None)
+            if occ is not None and (obj is None or occ[0] < obj.starts_at):
+                obj = event
+                obj.starts_at, obj.ends_at = occ
         return Response(EventSerializer(obj).data if obj else None)
 
     @action(detail=False, methods=["GET"])
@@ -193,6 +481,90 @@ class EventViewSet(viewsets.ReadOnlyModelViewSet):
         qs = self.get_queryset().filter(subject__isnull=True)
         return Response(EventSerializer(qs, many=True).data)
 
+    @extend_schema(request = FreeBusyQuerySerializer, responses = {200: FreeBusyResultSerializer})
+    @action(detail=False, methods=["POST"], url_path="free-busy")
+    def free_busy(self, request):
+        """Busy intervals in [start, end) for a batch of users and/or locations."""
+        payload = FreeBusyQuerySerializer(data = request.data)
+        payload.is_valid(raise_exception = True)
+        start, end = payload.validated_data["start"], payload.validated_data["end"]
+        users = list(dict.fromkeys(payload.validated_data["users"]))
+        locations = list(dict.fromkeys(payload.validated_data["locations"]))
+
+        user = request.user
+        if not user.is_staff:
+            # others' schedules: only the students and teachers of subjects you teach
+            taught = Enrollment.objects.filter(user = user, role = Enrollment.TEACHER).values("subject_id")
+            visible = {user.id} | set(Enrollment.objects.filter(subject_id__in = taught).values_list("user_id", flat = True))
+            if not visible.issuperset(users):
+                raise PermissionDenied("You can only look up yourself and the members of subjects you teach.")
+
+        index = freebusy.BusyIndex(start, end, users, locations)
+        # users of the same subjects share most boundaries: format each instant once
+        formatted = {}
+        def fmt(value):
+            if value not in formatted:
+                formatted[value] = exports.as_datetime(value)
+            return formatted[value]
+        as_intervals = lambda busy: [{"start": fmt(max(s, start)), "end": fmt(min(e, end))} for s, e in busy]
+        return Response({
+            "start": exports.as_datetime(start),
+            "end": exports.as_datetime(end),
+            "users": [{"user": u, "busy": as_intervals(index.user(u))} for u in users],
+            "locations": [{"location": l, "busy": as_intervals(index.location(l))} for l in locations],
+        })
+
+    @extend_schema(responses = {200: EventCalendarSerializer})
+    @action(detail=False, methods=["GET"])
+    def calendar(self, request):
+        """Per-day event counts (occurrences for recurring events) for one month (?month=YYYY-MM, default: this month)."""
+        raw = request.query_params.get("month")
+        try:
+            first = datetime.strptime(raw, "%Y-%m").date() if raw else timezone.localdate().replace(day=1)
+        except ValueError:
+            raise serializers.ValidationError({"month": "Use YYYY-MM."})
+        last = (first + timedelta(days=31)).replace(day=1)
+        start = timezone.make_aware(datetime.combine(first, dtime.min))
+        end = timezone.make_aware(datetime.combine(last, dtime.min))
+
+        qs = self.get_queryset().filter(starts_at__lt=end, series_ends_at__gt=start).order_by()
+
+        # one-off events: one row per distinct (first day, last day) span rather than per
+        # event; an event ending exactly at midnight does not touch the next day
+        spans = (
+            qs.filter(recurrence="")
+            .annotate(
+                first_day = TruncDate("starts_at"),
+                last_day = TruncDate(F("ends_at") - timedelta(microseconds=1)),
+            )
+            .values("first_day", "last_day")
+            .annotate(n = Count("id"))
+        )
+
+        days = {first + timedelta(days=i): 0 for i in range((last - first).days)}
+        total = 0
+
+        def touch(first_day, last_day, n):
+            nonlocal total
+            total += n
+            day = max(first_day, first)
+            while day < last and day <= last_day:
+                days[day] += n
+                day += timedelta(days=1)
+
+        for row in spans:
+            touch(row["first_day"], row["last_day"], row["n"])
+        # recurring events: only the occurrences inside the month are generated
+        for starts_at, ends_at, rule, exdates in qs.exclude(recurrence="").values_list("starts_at", "ends_at", "recurrence", "exdates"):
+            for occ_start, occ_end in recurrence.occurrences(starts_at, ends_at, rule, exdates, start, end):
+                touch(timezone.localdate(occ_start), timezone.localdate(occ_end - timedelta(microseconds=1)), 1)
+
+        return Response({
+            "month": first.strftime("%Y-%m"),
+            "total": total,
+            "days": [{"date": d.isoformat(), "count": n} for d, n in days.items()],
+        })
+
 
 
 @extend_schema(
@@ -234,6 +606,16 @@ def me(request):
         "last_name": u.last_name,
     })
 
+@extend_schema(
+    request = None,
+    responses = {201: StreamTicketSerializer},
+    description = "A short-lived, single-use ticket for GET /api/stream/?ticket=, for clients (EventSource) that cannot send an Authorization header.",
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def stream_ticket(request):
+    return Response({"ticket": stream.issue_ticket(request.user), "expires_in": settings.STREAM_TICKET_SECONDS}, status = 201)
+
 class EnrollmentViewSet(viewsets.ModelViewSet):
     """
     Enroll/Unenroll the current user; list my enrollments.
@@ -264,15 +646,17 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         return Response({"detail" : "Not allowed"}, status = 403)
 
 
-class AnnouncementViewSet(viewsets.ReadOnlyModelViewSet):
+class AnnouncementViewSet(ConditionalListMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     """List announcements. Users see announcements for their subjects + general ones """
+    fast_columns = fast_serializers.ANNOUNCEMENT
+    validator_timestamps = ("updated_at", "subject__updated_at")
 
     serializer_class = AnnouncementSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["title", "body", "subject_name"]
+    filter_backends = [filters.OrderingFilter, search.IndexedSearchFilter]
     ordering_fields = ["created_at"]
     ordering = ["-created_at"]
+    cursor_ordering = ("-created_at", "id")
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
@@ -284,10 +668,51 @@ class AnnouncementViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(subject_id = int(subject))
 
         if not self.request.user.is_staff:
-            my_subject_ids = Enrollment.objects.filter(user = self.request.user).values_list("subject_id", flat = True)
-            qs = qs.filter(Q(subject__in = my_subject_ids) | Q(subject__isnull=True))
+            qs = qs.filter(visibility.visible_q(visibility.enrolled_subject_ids(self.request.user)))
         return qs.order_by("-created_at")
 
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Queue background jobs and poll their status. Users see the jobs they queued;
+    staff see all of them and may queue any kind.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    queryset = Job.objects.none()
+
+    # kind -> serializer for its args; kinds not listed take none
+    ARGS = {"term_report": TermReportArgsSerializer}
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return self.queryset
+        qs = Job.objects.order_by("-id")
+        if not self.request.user.is_staff:
+            qs = qs.filter(created_by = self.request.user)
+        return qs
+
+    @extend_schema(request = JobCreateSerializer, responses = {202: JobSerializer})
+    def create(self, request):
+        payload = JobCreateSerializer(data = request.data)
+        payload.is_valid(raise_exception = True)
+        kind = payload.validated_data["kind"]
+        user = request.user
+        if jobs.REGISTRY[kind].staff_only and not user.is_staff:
+            raise PermissionDenied("Only staff can run this job.")
+
+        args = {}
+        if kind in self.ARGS:
+            arg_payload = self.ARGS[kind](data = payload.validated_data["args"])
+            arg_payload.is_valid(raise_exception = True)
+            args = {k: v.isoformat() if hasattr(v, "isoformat") else v for k, v in arg_payload.validated_data.items()}
+        if kind == "term_report":
+            args.setdefault("user", user.pk)
+            if args["user"] != user.pk and not user.is_staff:
+                raise PermissionDenied("You can only request your own term report.")
+
+        job = jobs.enqueue(kind, args, user = user)
+        return Response(JobSerializer(job).data, status = status.HTTP_202_ACCEPTED)
+
 @extend_schema (
     summary = "Dashboard snapshot",
     description = "Aggregated data for the signed-in user: my subjects, upcoming assignments, recent grades, announcements.",
@@ -297,46 +722,74 @@ class AnnouncementViewSet(viewsets.ReadOnlyModelViewSet):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def dashboard(request):
-    user = request.user
-    now = timezone.now()
-
-    my_subjects_qs = (Subject.objects.filter(enrollments__user = user).order_by("name").distinct())
-    my_subjects = SubjectSerializer(my_subjects_qs, many =True).data
-
-    upcoming_qs = (
-        Assignment.objects.filter(
-            subject__in = my_subjects_qs,
-            status = "PENDING",
-            due_at__gte = now,
-        )
-        .select_related("subject")
-        .order_by("due_at")[:5]
-    )
-    upcoming_assignments = AssignmentSerializer(upcoming_qs, many = True).data
-
-    recent_grades_qs = (
-        Grade.objects.filter(user = user)
-        .select_related ( "subject")
-        .order_by("-graded_at")[:4]
-    )
-    recent_grades = GradeSerializer(recent_grades_qs, many = True).data
-
-    announcements_qs = (
-        Announcement.objects.filter(
-            Q(subject__in = my_subjects_qs) | Q(subject__isnull=True)
-        )
-        .select_related ("subject", "created_by")
-        .order_by ("-created_at")[:5]
-    )
-    announcements = AnnouncementSerializer(announcements_qs, many = True).data
-
-    return Response(
-        {
-            "my_subjects": my_subjects,
-            "upcoming_assignments": upcoming_assignments,
-            "recent_grades": recent_grades,
-            "announcements": announcements,
-        }
-    )
+    entry, hit = dashboard_cache.get_or_build(request.user, lambda: _dashboard_snapshot(request.user))
+    response = not_modified(request, entry["etag"], entry["last_modified"])
+    if response is None:
+        response = set_validators(Response(entry["data"]), entry["etag"], entry["last_modified"])
+    response["X-Dashboard-Cache"] = "hit" if hit else "miss"
+    return response
 
 
+def _dashboard_queries(user):
+    """The dashboard's independent reads, as unevaluated querysets (the sync and async views share them)."""
+    now = timezone.now()
+    my_subject_ids = visibility.enrolled_subject_ids(user)
+    return {
+        "my_subjects": Subject.objects.filter(id__in = my_subject_ids).order_by("name"),
+        "upcoming_assignments": (
+            Assignment.objects.filter(
+                subject_id__in = my_subject_ids,
+                status = "PENDING",
+                due_at__gte = now,
+            )
+            .select_related("subject")
+            .order_by("due_at")[:5]
+        ),
+        "recent_grades": (
+            Grade.objects.filter(user = user)
+            .select_related ("user", "subject")
+            .order_by("-graded_at")[:4]
+        ),
+        "announcements": visibility.announcement_branches(my_subject_ids, 5),
+    }
+
+
+def _dashboard_data(rows):
+    return {
+        "my_subjects": SubjectSerializer(rows["my_subjects"], many =True).data,
+        "upcoming_assignments": AssignmentSerializer(rows["upcoming_assignments"], many = True).data,
+        "recent_grades": GradeSerializer(rows["recent_grades"], many = True).data,
+        "announcements": AnnouncementSerializer(visibility.merge_latest(rows["announcements"], 5), many = True).data,
+    }
+
+
+def _dashboard_snapshot(user):
+    return _dashboard_data(_dashboard_queries(user))
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """Accepts "Authorization: Bearer <METRICS_TOKEN>" so a Prometheus scraper needs no user account."""
+
+    def authenticate(self, request):
+        token = getattr(settings, "METRICS_TOKEN", "")
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        if token and constant_time_compare(header, f"Bearer {token}"):
+            return (AnonymousUser(), "metrics")
+        return None
+
+    def authenticate_header(self, request):
+        # listed first, so this is the challenge sent with a 401 (DRF sends 403 without one)
+        return 'Bearer realm="metrics"'
+
+
+class CanReadMetrics(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.auth == "metrics" or bool(request.user and request.user.is_staff)
+
+
+@extend_schema(exclude = True)
+@api_view(["GET"])
+@authentication_classes([MetricsTokenAuthentication, JWTAuthentication])
+@permission_classes([CanReadMetrics])
+def metrics_endpoint(request):
+    return HttpResponse(metrics.render_prometheus(), content_type = "text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,74 @@
+"""
+Cached per-user set of enrolled subject ids.
+
+Announcement visibility and the dashboard both need "the subjects this user is
+enrolled in". Resolving it from the cache turns the old correlated subquery into a
+literal `subject_id IN (...)` list, which is computed once per enrollment change
+instead of on every request and lets the database use the subject index. The
+cache is skipped when it is not shared between workers (see core.shared_cache).
+"""
+import heapq
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import shared_cache
+from .models import Announcement, Enrollment
+
+TIMEOUT = 60 * 60  # safety net only; enrollment writes evict precisely
+
+
+def _key(user_id):
+    return f"enrolled-subjects:{user_id}"
+
+
+def enrolled_subject_ids(user):
+    """Sorted tuple of the subject ids `user` is enrolled in."""
+    cache = shared_cache.get()
+    ids = None if cache is None else cache.get(_key(user.pk))
+    if ids is None:
+        ids = tuple(sorted(Enrollment.objects.filter(user = user).values_list("subject_id", flat = True)))
+        if cache is not None:
+            cache.set(_key(user.pk), ids, TIMEOUT)
+    return ids
+
+
+def visible_q(subject_ids):
+    """Announcements visible to a member of `subject_ids`: theirs plus the general ones."""
+    return Q(subject_id__in = subject_ids) | Q(subject__isnull = True)
+
+
+def announcement_branches(subject_ids, limit):
+    """
+    The two ordered, limited queries behind `latest_announcements`: general
+    announcements, and those of `subject_ids`. Each can be read straight off an index.
+    """
+    base = Announcement.objects.select_related("subject", "created_by").order_by("-created_at", "-id")
+    branches = [base.filter(subject__isnull = True)[:limit]]
+    if subject_ids:
+        branches.append(base.filter(subject_id__in = subject_ids)[:limit])
+    return branches
+
+
+def merge_latest(branches, limit):
+    """Merge the (evaluated or not) branches on (created_at, id), newest first."""
+    merged = heapq.merge(*branches, key = lambda a: (a.created_at, a.id), reverse = True)
+    return [a for a, _ in zip(merged, range(limit))]
+
+
+def latest_announcements(user, limit, subject_ids = None):
+    """The newest `limit` announcements visible to `user`: general ones plus those of their subjects."""
+    if subject_ids is None:
+        subject_ids = enrolled_subject_ids(user)
+    return merge_latest(announcement_branches(subject_ids, limit), limit)
+
+
+@receiver([post_save, post_delete], sender = Enrollment)
+def _evict(sender, instance, **kwargs):
+    cache = shared_cache.get()
+    if cache is not None:
+        # after commit, or a concurrent request could re-cache the old set for the full timeout
+        key = _key(instance.user_id)
+        transaction.on_commit(lambda: cache.delete(key))